@@ -0,0 +1,111 @@
+"""
+Times CycloneDX JSON decoding with every available backend of core.json_backend.
+
+    python benchmarks/bench_json_backend.py [components] [repeat]
+
+A synthetic SBOM with realistic per-component metadata (hashes, licenses,
+properties) is generated in memory; each backend decodes the same bytes.
+Every measurement runs in a fresh interpreter, so no backend is timed on a
+heap (and GC generations) left over by another.
+"""
+
+import gc
+import hashlib
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import json_backend  # noqa: E402
+from core.sbom_reader import _componente, _cyclonedx_da_bytes  # noqa: E402
+
+
+def riferimento(raw: bytes):
+    # The reader before core.json_backend: plain json.loads of the whole document.
+    data = json.loads(raw)
+    out = []
+    for c in data.get("components", []):
+        entry = _componente(c.get("name"), c.get("version"), c.get("purl"), c.get("cpe"))
+        if entry:
+            out.append(entry)
+    return out
+
+
+def sbom_sintetico(count: int) -> bytes:
+    components = []
+    for i in range(count):
+        components.append(
+            {
+                "type": "library",
+                "bom-ref": f"pkg:generic/component-{i}@1.{i % 50}.{i % 7}",
+                "name": f"component-{i}",
+                "version": f"1.{i % 50}.{i % 7}",
+                "purl": f"pkg:generic/component-{i}@1.{i % 50}.{i % 7}",
+                "description": "Synthetic component used to benchmark the JSON decoders " * 2,
+                "hashes": [
+                    {"alg": "SHA-256", "content": f"{i:064x}"},
+                    {"alg": "SHA-1", "content": f"{i:040x}"},
+                ],
+                "licenses": [{"license": {"id": "BSD-3-Clause"}}],
+                "properties": [{"name": f"build:flag{j}", "value": str(j)} for j in range(4)],
+            }
+        )
+    components[0].update(name="FreeRTOS", version="10.4.3")
+    doc = {
+        "bomFormat": "CycloneDX",
+        "specVersion": "1.5",
+        "metadata": {"component": {"name": "firmware", "version": "1.0"}},
+        "components": components,
+    }
+    return json.dumps(doc).encode("utf-8")
+
+
+def misura(name: str, count: int, repeat: int) -> None:
+    """Child process: prints the best time of one decoder and a digest of its result."""
+
+    raw = sbom_sintetico(count)
+    if name == "before":
+        decode = riferimento
+    else:
+        json_backend.imposta_backend(name)
+        decode = _cyclonedx_da_bytes
+    best = float("inf")
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = decode(raw)
+        best = min(best, time.perf_counter() - start)
+    digest = hashlib.blake2b(repr(result).encode("utf-8"), digest_size=16).hexdigest()
+    print(best, digest)
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--child"]:
+        misura(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{count} components, {len(sbom_sintetico(count)) / 1e6:.1f} MB")
+
+    def esegui(name: str):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, str(count), str(repeat)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        return float(out[0]), out[1]
+
+    baseline, expected = esegui("before")
+    print(f"  {'before':8} {baseline * 1000:8.1f} ms  x1.00  (json.loads, no backend layer)")
+    for name in json_backend.backend_disponibili():
+        best, digest = esegui(name)
+        assert digest == expected, f"{name} decoded different components"
+        print(f"  {name:8} {best * 1000:8.1f} ms  x{baseline / best:.2f}")
+
+
+if __name__ == "__main__":
+    main()
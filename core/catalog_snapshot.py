@@ -0,0 +1,72 @@
+import hashlib
+import marshal
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+SNAPSHOT_MAGIC = b"SBOMCAT\x00"
+SNAPSHOT_VERSION = 4
+
+
+def firma_db(db_path: Path) -> Optional[str]:
+    """
+    Cheap identity of a SQLite database: its size plus a digest of the
+    100-byte header, whose file change counter moves on every committed
+    write. Returns None when the database cannot be read or has pending WAL
+    content, so the snapshot is never trusted in doubt.
+    """
+
+    try:
+        wal = db_path.with_name(db_path.name + "-wal")
+        if wal.exists() and wal.stat().st_size:
+            return None
+        with db_path.open("rb") as f:
+            header = f.read(100)
+        size = db_path.stat().st_size
+    except OSError:
+        return None
+    return f"{size}:{hashlib.blake2b(header, digest_size=16).hexdigest()}"
+
+
+def scrivi_snapshot(out: Path, db_path: Path, libraries: Dict[str, tuple]) -> None:
+    """
+    Writes the compiled catalog (library name -> LibraryCatalog state) as a
+    versioned snapshot bound to the current content of `db_path`.
+    """
+
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "python": tuple(sys.version_info[:2]),
+        "db": firma_db(db_path),
+        "libraries": libraries,
+    }
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_bytes(SNAPSHOT_MAGIC + marshal.dumps(payload))
+    tmp.replace(out)
+
+
+def leggi_snapshot(path: Path, db_path: Path) -> Optional[Dict[str, tuple]]:
+    """
+    Loads a snapshot with a single read. Returns None when it is missing,
+    was written by another format or Python version, or no longer matches
+    the database, in which case callers fall back to SQLite.
+    """
+
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return None
+    if not raw.startswith(SNAPSHOT_MAGIC):
+        return None
+    try:
+        payload = marshal.loads(raw[len(SNAPSHOT_MAGIC) :])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION or payload.get("python") != tuple(sys.version_info[:2]):
+        return None
+    signature = firma_db(db_path)
+    if signature is None or payload.get("db") != signature:
+        return None
+    return payload.get("libraries")
@@ -0,0 +1,157 @@
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote
+
+from core.constants import CPE_ALIASES, FIRMWARE_LIBRARIES, PURL_ALIASES, SPDX_NAME_ALIASES
+from core.db_manager import get_library_aliases
+
+_matcher = None
+
+
+def parse_purl(purl: Optional[str]) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Splits a package URL into lower-cased (type, namespace, name) plus the
+    version: pkg:github/lwip-tcpip/lwip@2.1.2 -> ("github", "lwip-tcpip", "lwip", "2.1.2").
+    """
+
+    if not purl or not purl.startswith("pkg:"):
+        return None
+    body = purl[4:].split("#", 1)[0].split("?", 1)[0].strip("/")
+    version = ""
+    if "@" in body:
+        body, version = body.rsplit("@", 1)
+    parts = [unquote(p) for p in body.split("/") if p]
+    if len(parts) < 2:
+        return None
+    return parts[0].lower(), "/".join(parts[1:-1]).lower(), parts[-1].lower(), unquote(version)
+
+
+def parse_cpe(cpe: Optional[str]) -> Optional[Tuple[str, str, str]]:
+    """
+    Splits a CPE 2.3 formatted string or CPE 2.2 URI into lower-cased
+    (vendor, product) plus the version.
+    """
+
+    if not cpe:
+        return None
+    cpe = cpe.strip()
+    if cpe.startswith("cpe:2.3:"):
+        parts = cpe[8:].split(":")
+    elif cpe.startswith("cpe:/"):
+        parts = cpe[5:].split(":")
+    else:
+        return None
+    if len(parts) < 3:
+        return None
+    version = parts[3] if len(parts) > 3 and parts[3] not in {"*", "-"} else ""
+    return unquote(parts[1]).lower(), unquote(parts[2]).lower(), version
+
+
+def _euristica_spdx(s: str) -> Optional[str]:
+    # Substring fallback historically used for SPDX package names.
+    if "freertos" in s: return "FreeRTOS"
+    if "lwip" in s: return "LwIP"
+    if "fatfs" in s or "fat-fs" in s: return "FatFs"
+    if "cmsis" in s: return "CMSIS-RTOS"
+    if "mbedtls" in s: return "mbedTLS"
+    if "openamp" in s: return "OpenAMP"
+    if "libjpeg" in s: return "LibJPEG"
+    if "stm32h7" in s or "hal" in s: return "STM32H7xx_HAL_Driver"
+    if "usb" in s and "host" in s: return "STM32_USB_Host_Library"
+    if "usb" in s and "device" in s: return "STM32_USB_Device_Library"
+    if "touchgfx" in s: return "TouchGFX"
+    if "stemwin" in s: return "STemWin"
+    if "audio" in s and "stm32" in s: return "STM32_Audio"
+    return None
+
+
+class ComponentMatcher:
+    """
+    Maps an SBOM component to one of the monitored libraries using hashed
+    lookups on the parsed purl (type/namespace/name), the CPE vendor/product
+    and the component name, in that order. Every lookup is a dict access.
+    """
+
+    def __init__(self, aliases: Iterable[Dict[str, str]] = ()) -> None:
+        self._names: Dict[str, str] = {lib.lower(): lib for lib in FIRMWARE_LIBRARIES}
+        self._spdx_names: Dict[str, str] = dict(SPDX_NAME_ALIASES)
+        self._purls: Dict[Tuple[str, str, str], str] = {}
+        self._purl_names: Dict[str, Optional[str]] = {}
+        self._cpes: Dict[Tuple[str, str], str] = {}
+        self._cpe_products: Dict[str, Optional[str]] = {}
+
+        for purl, library in PURL_ALIASES.items():
+            self.add("purl", purl, library)
+        for cpe, library in CPE_ALIASES.items():
+            self.add("cpe", cpe, library)
+        for alias in aliases:
+            self.add(alias["kind"], alias["alias"], alias["library"])
+
+    @staticmethod
+    def _ambiguous(table: Dict[str, Optional[str]], key: str, library: str) -> None:
+        # A bare name/product shared by two libraries must not match either.
+        if table.get(key, library) != library:
+            table[key] = None
+        else:
+            table[key] = library
+
+    def add(self, kind: str, alias: str, library: str) -> None:
+        if kind == "name":
+            self._names[alias.strip().lower()] = library
+        elif kind == "purl":
+            parsed = parse_purl(alias)
+            if parsed:
+                self._purls[parsed[:3]] = library
+                self._ambiguous(self._purl_names, parsed[2], library)
+        elif kind == "cpe":
+            # Short "vendor:product" aliases are accepted as well as full CPEs.
+            parsed = parse_cpe(alias if alias.startswith("cpe:") else "cpe:2.3:a:" + alias)
+            if parsed:
+                self._cpes[parsed[:2]] = library
+                self._ambiguous(self._cpe_products, parsed[1], library)
+
+    def match(
+        self,
+        name: Optional[str] = None,
+        purl: Optional[str] = None,
+        cpe: Optional[str] = None,
+        spdx: bool = False,
+    ) -> Optional[str]:
+        """
+        Returns the monitored library for a component, or None.
+        With spdx=True the SPDX package-name aliases and substring heuristics
+        of the SPDX reader are also applied to the name.
+        """
+
+        parsed = parse_purl(purl)
+        if parsed:
+            library = self._purls.get(parsed[:3]) or self._purl_names.get(parsed[2])
+            if library:
+                return library
+        parsed = parse_cpe(cpe)
+        if parsed:
+            library = self._cpes.get(parsed[:2]) or self._cpe_products.get(parsed[1])
+            if library:
+                return library
+        if not name:
+            return None
+        key = name.strip().lower()
+        library = self._names.get(key)
+        if library or not spdx:
+            return library
+        return self._spdx_names.get(key) or _euristica_spdx(key)
+
+
+def get_matcher() -> ComponentMatcher:
+    """Process-wide matcher, built once with the aliases stored in the release DB."""
+
+    global _matcher
+    if _matcher is None:
+        _matcher = ComponentMatcher(get_library_aliases())
+    return _matcher
+
+
+def usa_alias(aliases: Iterable[Dict[str, str]]) -> None:
+    """Replaces the process-wide matcher with one built from `aliases` (see get_library_aliases)."""
+
+    global _matcher
+    _matcher = ComponentMatcher(aliases)
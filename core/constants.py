@@ -14,3 +14,86 @@ FIRMWARE_LIBRARIES = {
     "STM32H7xx_HAL_Driver",
     "CMSIS-RTOS",
 }
+
+# Package URL identifiers (type/namespace/name, without version) of the
+# monitored libraries. The namespace may be empty for pkg:generic purls.
+PURL_ALIASES = {
+    "pkg:github/freertos/freertos-kernel": "FreeRTOS",
+    "pkg:github/freertos/freertos": "FreeRTOS",
+    "pkg:generic/freertos": "FreeRTOS",
+    "pkg:github/lwip-tcpip/lwip": "LwIP",
+    "pkg:generic/lwip": "LwIP",
+    "pkg:generic/fatfs": "FatFs",
+    "pkg:github/abbrev/fatfs": "FatFs",
+    "pkg:github/mbed-tls/mbedtls": "mbedTLS",
+    "pkg:github/armmbed/mbedtls": "mbedTLS",
+    "pkg:generic/mbedtls": "mbedTLS",
+    "pkg:generic/libjpeg": "LibJPEG",
+    "pkg:github/openamp/open-amp": "OpenAMP",
+    "pkg:generic/openamp": "OpenAMP",
+    "pkg:github/stmicroelectronics/stm32_mw_usb_device": "STM32_USB_Device_Library",
+    "pkg:github/stmicroelectronics/stm32_mw_usb_host": "STM32_USB_Host_Library",
+    "pkg:github/stmicroelectronics/stm32h7xx_hal_driver": "STM32H7xx_HAL_Driver",
+    "pkg:github/stmicroelectronics/stm32_mw_touchgfx": "TouchGFX",
+    "pkg:github/stmicroelectronics/stm32_mw_stemwin": "STemWin",
+    "pkg:github/arm-software/cmsis-rtos": "CMSIS-RTOS",
+}
+
+# CPE vendor:product pairs of the monitored libraries.
+CPE_ALIASES = {
+    "amazon:freertos": "FreeRTOS",
+    "amazon:freertos_kernel": "FreeRTOS",
+    "freertos:freertos": "FreeRTOS",
+    "lwip_project:lwip": "LwIP",
+    "savannah:lwip": "LwIP",
+    "elm-chan:fatfs": "FatFs",
+    "fatfs_project:fatfs": "FatFs",
+    "arm:mbed_tls": "mbedTLS",
+    "arm:mbedtls": "mbedTLS",
+    "ijg:libjpeg": "LibJPEG",
+    "openampproject:open-amp": "OpenAMP",
+    "openamp:openamp": "OpenAMP",
+    "st:touchgfx": "TouchGFX",
+    "st:stemwin": "STemWin",
+}
+
+# SPDX package names (lower-case) seen in supplier SBOMs, used for SPDX
+# documents only together with substring heuristics.
+SPDX_NAME_ALIASES = {
+    "freertos": "FreeRTOS",
+    "freertos kernel": "FreeRTOS",
+    "component-freertos": "FreeRTOS",
+    "freertos-freertos-kernel": "FreeRTOS",
+    "rt": "FreeRTOS",
+
+    "lwip": "LwIP",
+    "component-lwip": "LwIP",
+    "lwip-lwip": "LwIP",
+
+    "fatfs": "FatFs",
+    "fat-fs": "FatFs",
+    "component-fatfs": "FatFs",
+
+    "cmsis-rtos": "CMSIS-RTOS",
+    "cmsis": "CMSIS-RTOS",
+
+    "mbedtls": "mbedTLS",
+    "libjpeg": "LibJPEG",
+    "openamp": "OpenAMP",
+    "stemwin": "STemWin",
+    "stm32_audio": "STM32_Audio",
+
+    "usb-host": "STM32_USB_Host_Library",
+    "usb": "STM32_USB_Host_Library",
+    "component-usb": "STM32_USB_Host_Library",
+    "stm32_usb_host_library": "STM32_USB_Host_Library",
+    "stm32cube_usb_host": "STM32_USB_Host_Library",
+
+    "usb-device": "STM32_USB_Device_Library",
+    "stm32_usb_device_library": "STM32_USB_Device_Library",
+    "stm32cube_usb_device": "STM32_USB_Device_Library",
+
+    "touchgfx": "TouchGFX",
+    "hal": "STM32H7xx_HAL_Driver",
+    "stm32h7xx_hal_driver": "STM32H7xx_HAL_Driver",
+}
@@ -0,0 +1,132 @@
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.version_resolver import BatchResolver, _normalizza, get_catalog_names, get_library_catalog
+
+# CVE IDs plus the OSV/GHSA advisory IDs that also appear in the "cve" column.
+CVE_PATTERN = re.compile(
+    r"\b(CVE-\d{4}-\d{4,}|OSV-\d{4}-\d+|GHSA(?:-[0-9a-z]{4}){3})\b", re.IGNORECASE
+)
+
+
+def normalizza_cve(text: Optional[str]) -> List[str]:
+    """Extracts the unique, upper-cased advisory IDs from free CVE text."""
+
+    if not text:
+        return []
+    seen = {}
+    for match in CVE_PATTERN.findall(text):
+        seen.setdefault(match.upper(), None)
+    return list(seen)
+
+
+class CveIndex:
+    """
+    CVE ID -> [{library, affected versions, fixed_in}] built from ReleaseNotes.
+    Affected versions are kept in release order.
+
+    The "cve" column lists the advisories affecting that release, so the
+    fixed-in version is the first release (in release order) after the last
+    affected one, or None when no later release exists.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, List[Dict[str, object]]] = {}
+
+    @classmethod
+    def from_catalog(cls, libraries: Optional[Iterable[str]] = None) -> "CveIndex":
+        index = cls()
+        for name in libraries if libraries is not None else get_catalog_names():
+            index.add_library(name, get_library_catalog(name).releases)
+        return index
+
+    def add_library(self, name: str, releases: List[Dict[str, str]]) -> None:
+        """Indexes one library's releases, which must already be in release order."""
+
+        affected: Dict[str, List[int]] = defaultdict(list)
+        for pos, rel in enumerate(releases):
+            # Catalog releases carry the parsed IDs, database rows the text.
+            ids = rel.get("cve_ids")
+            for cve_id in ids if ids is not None else normalizza_cve(rel.get("cve")):
+                affected[cve_id].append(pos)
+
+        for cve_id, positions in affected.items():
+            last = positions[-1]
+            fixed = releases[last + 1] if last + 1 < len(releases) else None
+            self._entries.setdefault(cve_id, []).append(
+                {
+                    "library": name,
+                    "affected": tuple(
+                        _normalizza(releases[pos].get("version")) for pos in positions
+                    ),
+                    "fixed_in": _normalizza(fixed.get("version")) if fixed else None,
+                }
+            )
+
+    def lookup(self, cve_id: str) -> List[Dict[str, object]]:
+        ids = normalizza_cve(cve_id)
+        return self._entries.get(ids[0], []) if ids else []
+
+    def ids(self) -> List[str]:
+        return sorted(self._entries)
+
+
+class FleetIndex:
+    """
+    (library, catalog version) -> [(SBOM path, version it ships)] for every
+    scanned SBOM of the fleet. A version missing from the catalog (e.g. the
+    vendor build "10.4.3-st1") is indexed under the release it is classified
+    by ("matched", see risolvi_versioni), so it is exposed to that release's
+    CVEs.
+    """
+
+    def __init__(self) -> None:
+        self._by_key: Dict[Tuple[str, str], List[Tuple[Path, str]]] = defaultdict(list)
+
+    @classmethod
+    def from_reports(cls, reports) -> "FleetIndex":
+        index = cls()
+        for sbom_file, data, _ in reports:
+            index.add(sbom_file, data)
+        return index
+
+    @classmethod
+    def from_scan(cls, rows: Iterable[Tuple[str, str, str]]) -> "FleetIndex":
+        """From recorded (SBOM path, library, current version) rows (see scan_versions)."""
+
+        index = cls()
+        resolver = BatchResolver()
+        for sbom_path, name, current in rows:
+            index.add(Path(sbom_path), [resolver.row(name, current)])
+        return index
+
+    def add(self, sbom_file: Path, data: List[Dict[str, str]]) -> None:
+        for lib in data:
+            current = _normalizza(lib.get("current"))
+            key = (lib["name"].lower(), _normalizza(lib.get("matched")) or current)
+            self._by_key[key].append((sbom_file, current))
+
+    def sboms_with(self, library: str, version: str) -> List[Tuple[Path, str]]:
+        """(SBOM, shipped version) pairs classified as `version` of `library`."""
+
+        return self._by_key.get((library.lower(), _normalizza(version)), [])
+
+
+def sbom_esposti(cve_id: str, cve_index: CveIndex, fleet: FleetIndex) -> List[Dict[str, object]]:
+    """Returns every SBOM of the fleet that ships a version affected by the CVE."""
+
+    exposed = []
+    for entry in cve_index.lookup(cve_id):
+        for version in entry["affected"]:
+            for sbom_file, shipped in fleet.sboms_with(entry["library"], version):
+                exposed.append(
+                    {
+                        "sbom": sbom_file,
+                        "library": entry["library"],
+                        "version": shipped,
+                        "fixed_in": entry["fixed_in"],
+                    }
+                )
+    return exposed
@@ -1,36 +1,78 @@
+import hashlib
+import re
 import sqlite3
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, Iterable, List, Optional
 
-from utils.paths import DB_PATH
+from core.catalog_snapshot import firma_db
+from utils.paths import DB_PATH, SEARCH_DB_PATH
 
 _conn = None
 _cursor = None
+_owner = None
+_local = threading.local()
+_search_ready = None
+_search_built = None
+
+SEARCH_TABLE = "ReleaseNotesFTS"
+
+# The full-text index lives in its own database file (SEARCH_DB_PATH), attached
+# to the Version.db connection as "search": searching never changes the schema
+# or the file identity of Version.db, and its writes never depend on FTS5. The
+# index records the identity of the Version.db it was built from and is
+# rebuilt when that no longer matches.
+_SEARCH_SCHEMA = [
+    f'CREATE VIRTUAL TABLE "{SEARCH_TABLE}" USING fts5('
+    "release_notes, cve, tokenize=\"unicode61 tokenchars '_'\")",
+    'CREATE TABLE "SearchSource" (db TEXT)',
+]
 
 
 def _ensure_connection():
-    global _conn, _cursor
+    global _conn, _cursor, _owner
     if _conn is None:
         try:
             _conn = sqlite3.connect(str(DB_PATH))
             _cursor = _conn.cursor()
+            _owner = threading.get_ident()
         except Exception:
             _conn = None
             _cursor = None
 
 
+def _thread_connection() -> Optional[sqlite3.Connection]:
+    """
+    The connection of the calling thread. sqlite3 connections only work on
+    the thread that opened them, so any other thread (e.g. a pipeline sink
+    run with asyncio.to_thread) gets its own, kept for the thread's lifetime.
+    """
+
+    _ensure_connection()
+    if _conn is None or threading.get_ident() == _owner:
+        return _conn
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        try:
+            conn = _local.conn = sqlite3.connect(str(DB_PATH))
+        except sqlite3.Error:
+            return None
+    return conn
+
+
 def _library_id(name: str) -> Optional[int]:
     """Returns the library ID for the given name (case-insensitive)."""
 
-    _ensure_connection()
-    if _cursor is None:
+    conn = _thread_connection()
+    if conn is None:
         return None
 
     try:
-        _cursor.execute(
+        row = conn.execute(
             'SELECT ID FROM "FirmwareLibraries" WHERE LOWER(name) = LOWER(?)', (name,)
-        )
-        row = _cursor.fetchone()
+        ).fetchone()
         return row[0] if row else None
+    except sqlite3.ProgrammingError:
+        raise
     except Exception:
         return None
 
@@ -39,32 +81,90 @@ def get_releases_for_library(name: str) -> List[Dict[str, str]]:
     """Returns all releases for a library ordered by date."""
 
     lib_id = _library_id(name)
-    if lib_id is None:
+    conn = _thread_connection()
+    if lib_id is None or conn is None:
         return []
 
     try:
-        _cursor.execute(
+        rows = conn.execute(
             'SELECT version, release_notes, release_date, security, cve '\
             'FROM "ReleaseNotes" WHERE "IDLibraries" = ? '
             'ORDER BY COALESCE(release_date, "") ASC, version ASC',
             (lib_id,),
+        ).fetchall()
+    except sqlite3.ProgrammingError:
+        raise
+    except sqlite3.Error:
+        return []
+    releases = []
+    for version, notes, rel_date, security, cve in rows:
+        releases.append(
+            {
+                "version": version,
+                "release_notes": notes or "",
+                "release_date": rel_date,
+                "security": security,
+                "cve": cve or "",
+            }
         )
-        rows = _cursor.fetchall() or []
-        releases = []
-        for version, notes, rel_date, security, cve in rows:
-            releases.append(
-                {
-                    "version": version,
-                    "release_notes": notes or "",
-                    "release_date": rel_date,
-                    "security": security,
-                    "cve": cve or "",
-                }
-            )
-        return releases
-    except Exception:
+    return releases
+
+
+def get_release_metadata(name: str) -> List[Dict[str, object]]:
+    """
+    Same rows as get_releases_for_library without the release note bodies,
+    for classification: {id (rowid), version, release_date, security, cve}.
+    The notes are fetched on demand with get_release_texts.
+    """
+
+    lib_id = _library_id(name)
+    conn = _thread_connection()
+    if lib_id is None or conn is None:
         return []
 
+    try:
+        rows = conn.execute(
+            'SELECT rowid, version, release_date, security, cve '
+            'FROM "ReleaseNotes" WHERE "IDLibraries" = ? '
+            'ORDER BY COALESCE(release_date, "") ASC, version ASC',
+            (lib_id,),
+        ).fetchall()
+    except sqlite3.ProgrammingError:
+        raise
+    except sqlite3.Error:
+        return []
+    return [
+        {"id": rowid, "version": version, "release_date": rel_date, "security": security, "cve": cve or ""}
+        for rowid, version, rel_date, security, cve in rows
+    ]
+
+
+def get_release_texts(ids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+    """Returns {rowid: {release_notes, cve}} for the given releases, in bulk."""
+
+    conn = _thread_connection()
+    if conn is None:
+        return {}
+
+    ids = list(ids)
+    texts = {}
+    try:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            rows = conn.execute(
+                'SELECT rowid, release_notes, cve FROM "ReleaseNotes" '
+                f'WHERE rowid IN ({", ".join("?" * len(chunk))})',
+                chunk,
+            )
+            for rowid, notes, cve in rows:
+                texts[rowid] = {"release_notes": notes or "", "cve": cve or ""}
+    except sqlite3.ProgrammingError:
+        # A misused connection is a bug, not a missing table: do not report it as "no notes".
+        raise
+    except sqlite3.Error:
+        return {}
+    return texts
+
 
 def get_library_names() -> List[str]:
     """Returns the list of libraries present in the database."""
@@ -78,3 +178,271 @@ def get_library_names() -> List[str]:
         return [row[0] for row in (_cursor.fetchall() or []) if row and row[0]]
     except Exception:
         return []
+
+
+def get_library_aliases() -> List[Dict[str, str]]:
+    """
+    Returns [{library, kind, alias}] from the optional "LibraryAliases" table
+    (IDLibraries, kind: 'name' | 'purl' | 'cpe', alias). The library names
+    themselves are always returned as 'name' aliases.
+    """
+
+    _ensure_connection()
+    if _cursor is None:
+        return []
+
+    aliases = [{"library": name, "kind": "name", "alias": name} for name in get_library_names()]
+    try:
+        rows = _conn.execute(
+            'SELECT l.name, a.kind, a.alias FROM "LibraryAliases" a '
+            'JOIN "FirmwareLibraries" l ON l.ID = a."IDLibraries"'
+        ).fetchall()
+    except sqlite3.Error:
+        # The table is optional.
+        rows = []
+    aliases.extend(
+        {"library": name, "kind": (kind or "").lower(), "alias": alias}
+        for name, kind, alias in rows
+        if name and alias
+    )
+    return aliases
+
+
+def catalog_fingerprint() -> str:
+    """Returns a checksum of the release catalog, used to tell whether two scans are comparable."""
+
+    _ensure_connection()
+    if _cursor is None:
+        return ""
+
+    digest = hashlib.sha256()
+    try:
+        rows = _conn.execute(
+            'SELECT l.name, r.version, COALESCE(r.release_date, ""), COALESCE(r.security, ""), '
+            'COALESCE(r.cve, "") FROM "ReleaseNotes" r '
+            'JOIN "FirmwareLibraries" l ON l.ID = r."IDLibraries" ORDER BY l.name, r.version'
+        )
+        for row in rows:
+            digest.update("\x1f".join(str(v) for v in row).encode("utf-8"))
+            digest.update(b"\x1e")
+    except sqlite3.Error:
+        return ""
+    return digest.hexdigest()[:16]
+
+
+def library_checksums() -> Dict[str, str]:
+    """
+    Returns {library name: checksum of its release rows}. Comparing two
+    results tells which libraries gained, lost or changed releases.
+    """
+
+    _ensure_connection()
+    if _cursor is None:
+        return {}
+
+    digests = {}
+    try:
+        rows = _conn.execute(
+            'SELECT l.name, r.version, COALESCE(r.release_date, ""), COALESCE(r.security, ""), '
+            'COALESCE(r.cve, "") FROM "FirmwareLibraries" l '
+            'LEFT JOIN "ReleaseNotes" r ON r."IDLibraries" = l.ID ORDER BY l.name, r.version'
+        )
+        for name, *row in rows:
+            digest = digests.setdefault(name, hashlib.sha256())
+            if row[0] is not None:
+                digest.update("\x1f".join(str(v) for v in row).encode("utf-8"))
+                digest.update(b"\x1e")
+    except sqlite3.Error:
+        return {}
+    return {name: digest.hexdigest()[:16] for name, digest in digests.items()}
+
+
+def _search_source() -> Optional[str]:
+    """Identity of the Version.db the attached index was built from, None when there is none."""
+
+    try:
+        row = _conn.execute('SELECT db FROM search."SearchSource"').fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _attach_search_index() -> None:
+    if not any(name == "search" for _, name, _ in _conn.execute("PRAGMA database_list")):
+        _conn.execute("ATTACH DATABASE ? AS search", (str(SEARCH_DB_PATH),))
+
+
+def _build_search_index() -> None:
+    """Writes the index of the current ReleaseNotes to a new SEARCH_DB_PATH file and attaches it."""
+
+    global _search_built
+    tmp = SEARCH_DB_PATH.with_name(SEARCH_DB_PATH.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    source = firma_db(DB_PATH)
+    rows = _conn.execute('SELECT rowid, release_notes, cve FROM "ReleaseNotes"').fetchall()
+    index = sqlite3.connect(str(tmp))
+    try:
+        with index:
+            for statement in _SEARCH_SCHEMA:
+                index.execute(statement)
+            index.executemany(
+                f'INSERT INTO "{SEARCH_TABLE}"(rowid, release_notes, cve) VALUES (?, ?, ?)', rows
+            )
+            index.execute('INSERT INTO "SearchSource"(db) VALUES (?)', (source,))
+    finally:
+        index.close()
+    if any(name == "search" for _, name, _ in _conn.execute("PRAGMA database_list")):
+        _conn.execute("DETACH DATABASE search")
+    tmp.replace(SEARCH_DB_PATH)
+    _attach_search_index()
+    _search_built = source
+
+
+def _ensure_search_index() -> bool:
+    """
+    Attaches the full-text index, (re)building it first when it is missing
+    or was built from another state of Version.db. The identity of
+    Version.db is checked on every call (one header read and stat), so a
+    long-running process picks up catalog changes made after it started.
+    """
+
+    global _search_ready, _search_built
+    if _search_ready is False:
+        return False
+
+    _ensure_connection()
+    if _cursor is None:
+        return False
+
+    try:
+        if _search_ready is None:
+            if SEARCH_DB_PATH.exists():
+                _attach_search_index()
+            _search_built = _search_source()
+        if _search_built is None or _search_built != firma_db(DB_PATH):
+            _build_search_index()
+        _search_ready = True
+    except (sqlite3.Error, OSError):
+        # SQLite built without FTS5 or a read-only data folder: fall back to LIKE.
+        _search_ready = False
+    return _search_ready
+
+
+def rebuild_search_index() -> bool:
+    """Rebuilds the full-text index from ReleaseNotes."""
+
+    global _search_ready
+    _ensure_connection()
+    if _cursor is None:
+        return False
+    try:
+        _build_search_index()
+        _search_ready = True
+    except (sqlite3.Error, OSError):
+        _search_ready = False
+    return _search_ready
+
+
+def _fts_query(text: str) -> str:
+    """Turns free text into an FTS5 query; explicit FTS syntax is passed through."""
+
+    if '"' in text or re.search(r"\b(AND|OR|NOT|NEAR)\b|\*", text):
+        return text
+    terms = [t for t in re.findall(r"[\w.-]+", text) if t.strip(".-")]
+    return " ".join(f'"{t}"' for t in terms)
+
+
+def search_release_notes(
+    query: str, limit: int = 50, library: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    Full-text search over release notes and CVE fields.
+    Returns hits ordered by relevance (best first), each with a short snippet.
+    """
+
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    if not _ensure_search_index():
+        return _search_release_notes_like(query, limit, library)
+
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    sql = (
+        "SELECT l.name, r.version, r.release_date, r.security, r.cve, "
+        f'snippet("{SEARCH_TABLE}", -1, \'[\', \']\', \'...\', 16), '
+        f'bm25("{SEARCH_TABLE}") AS score '
+        f'FROM search."{SEARCH_TABLE}" '
+        f'JOIN main."ReleaseNotes" r ON r.rowid = "{SEARCH_TABLE}".rowid '
+        'JOIN main."FirmwareLibraries" l ON l.ID = r."IDLibraries" '
+        f'WHERE "{SEARCH_TABLE}" MATCH ?'
+    )
+    params = [match]
+    if library:
+        sql += " AND LOWER(l.name) = LOWER(?)"
+        params.append(library)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(int(limit))
+
+    try:
+        rows = _conn.execute(sql, params).fetchall()
+    except sqlite3.Error:
+        return _search_release_notes_like(query, limit, library)
+
+    return [
+        {
+            "library": name,
+            "version": version,
+            "release_date": rel_date,
+            "security": security,
+            "cve": cve or "",
+            "snippet": snippet or "",
+            "score": score,
+        }
+        for name, version, rel_date, security, cve, snippet, score in rows
+    ]
+
+
+def _search_release_notes_like(
+    query: str, limit: int, library: Optional[str]
+) -> List[Dict[str, str]]:
+    """Substring search used when FTS5 is not available."""
+
+    _ensure_connection()
+    if _conn is None:
+        return []
+
+    pattern = f"%{query}%"
+    sql = (
+        "SELECT l.name, r.version, r.release_date, r.security, r.cve, "
+        "COALESCE(r.release_notes, '') "
+        'FROM "ReleaseNotes" r JOIN "FirmwareLibraries" l ON l.ID = r."IDLibraries" '
+        "WHERE (r.release_notes LIKE ? OR r.cve LIKE ?)"
+    )
+    params = [pattern, pattern]
+    if library:
+        sql += " AND LOWER(l.name) = LOWER(?)"
+        params.append(library)
+    sql += ' ORDER BY COALESCE(r.release_date, "") DESC LIMIT ?'
+    params.append(int(limit))
+
+    try:
+        rows = _conn.execute(sql, params).fetchall()
+    except sqlite3.Error:
+        return []
+
+    return [
+        {
+            "library": name,
+            "version": version,
+            "release_date": rel_date,
+            "security": security,
+            "cve": cve or "",
+            "snippet": notes[:160],
+            "score": 0.0,
+        }
+        for name, version, rel_date, security, cve, notes in rows
+    ]
@@ -0,0 +1,315 @@
+import gzip
+from array import array
+from collections import deque
+from itertools import accumulate, chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from core.component_matcher import get_matcher
+from core.constants import FIRMWARE_LIBRARIES
+from core.json_backend import decodifica_json
+from core.version_resolver import BatchResolver
+
+PATH_LIMIT = 20
+
+
+class DependencyGraph:
+    """
+    Dependency graph of a CycloneDX document with dense integer node IDs.
+
+    Every component gets an ID: metadata.component (the product, when
+    declared) first, then components and their nested components in
+    document order. Nodes are keyed by bom-ref; refs listed only in
+    `dependencies` become nodes without name or version. Edges come from
+    `dependencies[].dependsOn` and from nesting (a nested component is a
+    dependency of its parent), and are stored in CSR form (one offsets and
+    one targets array per direction), so 100k+ nodes take a few MB.
+
+    All traversals are iterative, with explicit queues and stacks.
+    """
+
+    def __init__(self) -> None:
+        self.refs: List[str] = []
+        self.names: List[str] = []
+        self.versions: List[str] = []
+        self.purls: List[Optional[str]] = []
+        self.cpes: List[Optional[str]] = []
+        self.product: Optional[int] = None
+        self.roots: List[int] = []
+        self._ids: Dict[str, int] = {}
+        self._out = (array("l", [0]), array("l"))
+        self._in = (array("l", [0]), array("l"))
+        self._parents = array("l")
+
+    def _nodo(self, ref: str, component: Optional[dict] = None) -> int:
+        node = self._ids.get(ref)
+        if node is None:
+            node = self._ids[ref] = len(self.refs)
+            self.refs.append(ref)
+            self.names.append("")
+            self.versions.append("")
+            self.purls.append(None)
+            self.cpes.append(None)
+        if component is not None and not self.names[node]:
+            self.names[node] = str(component.get("name") or "")
+            self.versions[node] = str(component.get("version") or "")
+            self.purls[node] = component.get("purl")
+            self.cpes[node] = component.get("cpe")
+        return node
+
+    @classmethod
+    def from_cyclonedx(cls, doc: dict) -> "DependencyGraph":
+        graph = cls()
+        # source node -> dependency nodes, edges of one source arrive together
+        adjacency: Dict[int, List[int]] = {}
+
+        def ref_of(component: dict) -> str:
+            ref = component.get("bom-ref")
+            # Components without a bom-ref cannot be named by `dependencies`;
+            # they are still reachable through nesting.
+            return str(ref) if ref else f"#{len(graph.refs)}"
+
+        metadata = doc.get("metadata")
+        product = metadata.get("component") if isinstance(metadata, dict) else None
+        pending = []
+        if isinstance(product, dict):
+            graph.product = graph._nodo(ref_of(product), product)
+            pending.extend((graph.product, c) for c in reversed(product.get("components") or []))
+        pending.extend((None, c) for c in reversed(doc.get("components") or []))
+        while pending:
+            parent, component = pending.pop()
+            if not isinstance(component, dict):
+                continue
+            node = graph._nodo(ref_of(component), component)
+            if parent is not None:
+                adjacency.setdefault(parent, []).append(node)
+            children = component.get("components")
+            if children:
+                pending.extend((node, c) for c in reversed(children))
+
+        ids = graph._ids
+        for entry in doc.get("dependencies") or []:
+            if not isinstance(entry, dict) or not isinstance(entry.get("ref"), str):
+                continue
+            source = ids.get(entry["ref"])
+            if source is None:
+                source = graph._nodo(str(entry["ref"]))
+            refs = entry.get("dependsOn") or []
+            try:
+                found = [ids[ref] for ref in refs]
+            except (KeyError, TypeError):
+                # Refs no component declares become nodes of their own.
+                found = [graph._nodo(str(ref)) for ref in refs]
+            adjacency.setdefault(source, []).extend(found)
+
+        graph._out, graph._in = _csr(len(graph.refs), adjacency)
+        graph._foresta()
+        return graph
+
+    def _foresta(self) -> None:
+        # Breadth-first search from the product, then from every other node
+        # nothing depends on, then from the first node (in document order) of
+        # any cycle still unreached: every node ends up with a shortest path
+        # from one root.
+        count = len(self.refs)
+        offsets_in = self._in[0]
+        candidates = [self.product] if self.product is not None else []
+        candidates += [node for node in range(count) if offsets_in[node] == offsets_in[node + 1]]
+        parents = array("l", [-2]) * count
+        offsets, targets = self._out
+        self.roots = []
+        for root in chain(candidates, range(count)):
+            if parents[root] != -2:
+                continue
+            self.roots.append(root)
+            parents[root] = -1
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for i in range(offsets[node], offsets[node + 1]):
+                    child = targets[i]
+                    if parents[child] == -2:
+                        parents[child] = node
+                        queue.append(child)
+        self._parents = parents
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def dependencies(self, node: int) -> array:
+        offsets, targets = self._out
+        return targets[offsets[node] : offsets[node + 1]]
+
+    def dependents(self, node: int) -> array:
+        offsets, targets = self._in
+        return targets[offsets[node] : offsets[node + 1]]
+
+    def label(self, node: int) -> str:
+        name = self.names[node]
+        if not name:
+            return self.refs[node]
+        return f"{name} {self.versions[node]}".strip()
+
+    def shortest_path(self, target: int) -> List[int]:
+        """
+        One shortest path root -> ... -> target, starting from the product
+        whenever the product reaches target (parents of the build search).
+        """
+
+        path = []
+        node = target
+        while node != -1:
+            path.append(node)
+            node = self._parents[node]
+        return path[::-1]
+
+    def reaching(self, target: int) -> bytearray:
+        """Marks target and every node with a path to it (one reverse search)."""
+
+        mask = bytearray(len(self.refs))
+        mask[target] = 1
+        stack = [target]
+        offsets, sources = self._in
+        while stack:
+            node = stack.pop()
+            for i in range(offsets[node], offsets[node + 1]):
+                parent = sources[i]
+                if not mask[parent]:
+                    mask[parent] = 1
+                    stack.append(parent)
+        return mask
+
+    def paths(self, target: int, mask: Optional[bytearray] = None) -> Iterator[List[int]]:
+        """
+        Yields every simple path from a root to target.
+
+        The search only enters nodes that can reach target (see reaching), so
+        in an acyclic graph every branch ends in a path and the cost is
+        proportional to the output. There may be exponentially many paths:
+        take as many as needed (e.g. with itertools.islice).
+        """
+
+        mask = mask if mask is not None else self.reaching(target)
+        offsets, targets = self._out
+        on_path = bytearray(len(self.refs))
+        for root in self.roots:
+            if not mask[root]:
+                continue
+            path = [root]
+            on_path[root] = 1
+            # One iterator position per node of the current path.
+            cursors = [offsets[root]]
+            while path:
+                node = path[-1]
+                if node == target:
+                    yield list(path)
+                    cursors[-1] = offsets[node + 1]
+                i = cursors[-1]
+                while i < offsets[node + 1] and (not mask[targets[i]] or on_path[targets[i]]):
+                    i += 1
+                if i < offsets[node + 1]:
+                    cursors[-1] = i + 1
+                    child = targets[i]
+                    path.append(child)
+                    on_path[child] = 1
+                    cursors.append(offsets[child])
+                else:
+                    on_path[path.pop()] = 0
+                    cursors.pop()
+
+
+def _csr(count: int, adjacency: Dict[int, List[int]]):
+    """
+    Both CSR directions of the graph, duplicate edges dropped:
+    ((offsets, dependencies), (offsets, dependents)), in linear time.
+    """
+
+    forward = [list(dict.fromkeys(adjacency[node])) if node in adjacency else [] for node in range(count)]
+    backward: List[List[int]] = [[] for _ in range(count)]
+    for node, children in enumerate(forward):
+        for child in children:
+            backward[child].append(node)
+
+    def compatta(lists: List[List[int]]):
+        offsets = array("l", accumulate(map(len, lists), initial=0))
+        return offsets, array("l", chain.from_iterable(lists))
+
+    return compatta(forward), compatta(backward)
+
+
+def carica_grafo(path: Path) -> Optional[DependencyGraph]:
+    """
+    Builds the dependency graph of a CycloneDX JSON file (plain or .json.gz).
+    Returns None for unreadable files and other formats.
+    """
+
+    try:
+        raw = path.read_bytes()
+        if path.name.lower().endswith(".gz"):
+            raw = gzip.decompress(raw)
+    except (OSError, EOFError):
+        return None
+    doc = decodifica_json(raw)
+    if not isinstance(doc, dict) or "spdxVersion" in doc:
+        return None
+    return DependencyGraph.from_cyclonedx(doc)
+
+
+def percorsi_librerie(
+    graph: DependencyGraph, library: Optional[str] = None, limit: int = PATH_LIMIT
+) -> List[Dict[str, object]]:
+    """
+    Locates the monitored libraries in the graph, resolves each distinct
+    library version once (BatchResolver) and, for each one that needs an update, returns
+
+      {library, version, latest, security_label, node, shortest (node IDs),
+       via (direct dependencies of the product leading to it),
+       paths (up to `limit` root -> library paths), truncated}
+
+    One forward search serves all shortest paths and each flagged library
+    costs one reverse search, so the analysis is linear in the graph size
+    plus the paths returned.
+    """
+
+    matcher = get_matcher()
+    found = []
+    for node in range(len(graph)):
+        name, version = graph.names[node], graph.versions[node]
+        if not (name and version):
+            continue
+        if name not in FIRMWARE_LIBRARIES:
+            name = matcher.match(name, graph.purls[node], graph.cpes[node])
+        if name and (library is None or name.lower() == library.lower()):
+            found.append((node, name, version))
+
+    resolver = BatchResolver()
+    out = []
+    for node, name, version in found:
+        row = resolver.row(name, version)
+        if row["status"] != "needs update":
+            continue
+        mask = graph.reaching(node)
+        paths = []
+        truncated = False
+        for path in graph.paths(node, mask):
+            if len(paths) == limit:
+                truncated = True
+                break
+            paths.append(path)
+        via = []
+        if graph.product is not None:
+            via = [child for child in graph.dependencies(graph.product) if mask[child]]
+        out.append(
+            {
+                "library": name,
+                "version": row["current"],
+                "latest": row["latest"],
+                "security_label": row.get("security_label", ""),
+                "node": node,
+                "shortest": graph.shortest_path(node),
+                "via": via,
+                "paths": paths,
+                "truncated": truncated,
+            }
+        )
+    return out
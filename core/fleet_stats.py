@@ -0,0 +1,201 @@
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from core.scan_history import STATUS_CODES, scan_results_packed
+from core.version_resolver import get_library_catalog
+
+# Optional: group-by runs as one sort of the packed column when NumPy is
+# installed, as a C-level Counter pass otherwise.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOP_VERSIONS = 5
+
+_VERSION_MASK = (1 << 30) - 1
+
+
+class FleetColumns:
+    """
+    Resolved results of a fleet in columnar form, one entry per (SBOM,
+    library) row, packed into a single 64-bit integer column:
+
+      keys = library << 32 | version << 2 | status
+
+    where library is a key of `libraries` (code -> name), version a key of
+    `versions` (code -> value) and status a core.scan_history.STATUS_CODES
+    value; the library, version and status properties are decoded views.
+    Loaded from the history database the codes are its interned IDs, so a
+    100k-SBOM scan is read without building one dict per row.
+
+    The column is a NumPy array when NumPy is installed, an array.array
+    otherwise.
+    """
+
+    def __init__(self, keys, libraries: Dict[int, str], versions: Dict[int, str], sboms: int) -> None:
+        if np is not None:
+            self.keys = np.fromiter(keys, dtype=np.int64, count=len(keys))
+        else:
+            self.keys = array("q", keys)
+        self.libraries = libraries
+        self.versions = versions
+        self.sboms = sboms
+        self.scan_id: Optional[int] = None
+        self.started_at: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def library(self):
+        if np is not None:
+            return (self.keys >> 32).astype(np.int32)
+        return array("l", [key >> 32 for key in self.keys])
+
+    @property
+    def version(self):
+        if np is not None:
+            return ((self.keys >> 2) & _VERSION_MASK).astype(np.int32)
+        return array("l", [(key >> 2) & _VERSION_MASK for key in self.keys])
+
+    @property
+    def status(self):
+        if np is not None:
+            return (self.keys & 3).astype(np.int8)
+        return array("b", [key & 3 for key in self.keys])
+
+    @classmethod
+    def from_history(cls, scan_id: Optional[int] = None) -> Optional["FleetColumns"]:
+        """The rows of a recorded scan (default: the latest); None when there is none."""
+
+        scan = scan_results_packed(scan_id)
+        if scan is None:
+            return None
+        columns = cls(scan["keys"], scan["libraries"], scan["versions"], scan["sbom_count"])
+        columns.scan_id = scan["scan_id"]
+        columns.started_at = scan["started_at"]
+        return columns
+
+    @classmethod
+    def from_reports(cls, reports) -> "FleetColumns":
+        """Columns from (sbom_file, data, count) reports, e.g. those of main._build_reports."""
+
+        library_codes: Dict[str, int] = {}
+        version_codes: Dict[str, int] = {}
+        keys = []
+        unknown = STATUS_CODES["unknown"]
+        for _, data, _ in reports:
+            for lib in data:
+                library = library_codes.setdefault(lib["name"], len(library_codes))
+                version = version_codes.setdefault(lib["current"], len(version_codes))
+                keys.append(library << 32 | version << 2 | STATUS_CODES.get(lib["status"], unknown))
+        return cls(
+            keys,
+            {code: name for name, code in library_codes.items()},
+            {code: value for value, code in version_codes.items()},
+            len(reports),
+        )
+
+    def group_counts(self) -> Dict[Tuple[int, int, int], int]:
+        """Row count of every distinct (library, version, status) code triple."""
+
+        if np is not None:
+            keys, counts = np.unique(self.keys, return_counts=True)
+            grouped = zip(keys.tolist(), counts.tolist())
+        else:
+            grouped = Counter(self.keys).items()
+        return {(key >> 32, (key >> 2) & _VERSION_MASK, key & 3): count for key, count in grouped}
+
+
+def releases_behind(library: str, version: str) -> Optional[int]:
+    """
+    Catalog releases after `version`, 0 for the latest release. Versions
+    missing from the catalog count from the closest lower release, as in
+    risolvi_versioni; None when the version cannot be placed.
+    """
+
+    catalog = get_library_catalog(library)
+    pos, _ = catalog.locate(version)
+    if pos is None:
+        return None
+    return len(catalog.releases) - 1 - pos
+
+
+def _mediana(histogram: List[Tuple[int, int]]) -> Optional[float]:
+    """Median of a [(value, count)] histogram sorted by value."""
+
+    total = sum(count for _, count in histogram)
+    if not total:
+        return None
+
+    def at(index: int) -> int:
+        seen = 0
+        for value, count in histogram:
+            seen += count
+            if index < seen:
+                return value
+        raise IndexError(index)
+
+    return (at((total - 1) // 2) + at(total // 2)) / 2
+
+
+def statistiche_flotta(columns: FleetColumns, top: int = TOP_VERSIONS) -> List[Dict[str, object]]:
+    """
+    Per-library summary of a fleet, sorted by library name:
+
+      {library, sboms, needs_update, up_to_date, unknown, on_latest,
+       on_latest_pct, behind_median, behind_max, unplaced, distinct,
+       versions: [(version, SBOMs, releases behind)], most used first}
+
+    `versions` holds the `top` most used versions (every version when top is
+    None). Releases behind are counted against the current catalog, so an
+    old scan is measured against today's latest releases; `unplaced` counts
+    the SBOMs whose version the catalog cannot place, which are left out of
+    on_latest and the behind figures.
+
+    The rows are grouped once (FleetColumns.group_counts); releases behind
+    are then computed once per distinct (library, version) and weighted by
+    its SBOM count, so the cost past the group-by does not depend on the
+    fleet size.
+    """
+
+    by_status: Dict[int, Dict[int, int]] = {}
+    by_version: Dict[int, Dict[int, int]] = {}
+    for (library, version, status), count in columns.group_counts().items():
+        statuses = by_status.setdefault(library, {})
+        statuses[status] = statuses.get(status, 0) + count
+        versions = by_version.setdefault(library, {})
+        versions[version] = versions.get(version, 0) + count
+
+    out = []
+    for library, versions in by_version.items():
+        name = columns.libraries.get(library, str(library))
+        statuses = by_status[library]
+        rows = [
+            (columns.versions.get(version, ""), count, releases_behind(name, columns.versions.get(version, "")))
+            for version, count in versions.items()
+        ]
+        rows.sort(key=lambda row: (-row[1], row[0]))
+        placed = sorted((behind, count) for _, count, behind in rows if behind is not None)
+        sboms = sum(versions.values())
+        on_latest = sum(count for behind, count in placed if behind == 0)
+        out.append(
+            {
+                "library": name,
+                "sboms": sboms,
+                "needs_update": statuses.get(STATUS_CODES["needs update"], 0),
+                "up_to_date": statuses.get(STATUS_CODES["up-to-date"], 0),
+                "unknown": statuses.get(STATUS_CODES["unknown"], 0),
+                "on_latest": on_latest,
+                "on_latest_pct": 100.0 * on_latest / sboms,
+                "behind_median": _mediana(placed),
+                "behind_max": placed[-1][0] if placed else None,
+                "unplaced": sboms - sum(count for _, count in placed),
+                "distinct": len(rows),
+                "versions": rows if top is None else rows[:top],
+            }
+        )
+    out.sort(key=lambda row: row["library"].lower())
+    return out
@@ -0,0 +1,211 @@
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from core.report_generator import HEADERS
+
+PAGE_SIZE = 100
+
+# Everything is inlined: the report set opens from a file share or a USB stick
+# without network access, and needs no JavaScript.
+_STYLE = """
+body { font-family: Segoe UI, Helvetica, Arial, sans-serif; margin: 24px; color: #1f2a44; background: #f6fbff; }
+h1 { color: #3da9ff; margin-bottom: 4px; }
+h2 { margin: 28px 0 8px; font-size: 16px; }
+.muted { color: #60708f; }
+table { border-collapse: collapse; background: #ffffff; margin-bottom: 12px; }
+th, td { padding: 4px 12px; border-bottom: 1px solid #e8f0fb; text-align: left; }
+th { background: #e8f0fb; }
+td.num { text-align: right; }
+.needs-update { color: #e86b5d; font-weight: bold; }
+.up-to-date { color: #1b8a5f; }
+.unknown { color: #9c640c; }
+nav { margin: 16px 0; }
+nav a { margin-right: 16px; }
+"""
+
+_STATUS_CLASS = {"needs update": "needs-update", "up-to-date": "up-to-date", "unknown": "unknown"}
+
+
+def _pagina(out: TextIO, title: str) -> None:
+    out.write(
+        f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+        f"<title>{escape(title)}</title><style>{_STYLE}</style></head><body>\n"
+        f"<h1>{escape(title)}</h1>\n"
+    )
+
+
+def _nome_pagina(number: int) -> str:
+    return f"sboms-{number:05d}.html"
+
+
+class HtmlReportWriter:
+    """
+    Streams a static HTML report set for a fleet of SBOMs into `out_dir`:
+
+      sboms-00001.html, ... - the per-SBOM tables, `page_size` SBOMs per page,
+                              written as the reports arrive;
+      index.html            - per-library rollups, the list of pages and the
+                              SBOMs that could not be analyzed (add_error),
+                              written by close().
+
+    Only the rollup counters, one line per page and the errors are kept in
+    memory, so the writer can be used as the sink of core.pipeline for any
+    fleet size.
+    """
+
+    def __init__(self, out_dir: Path, page_size: int = PAGE_SIZE, title: str = "SBOM fleet report") -> None:
+        self.out_dir = out_dir
+        self.page_size = page_size
+        self.title = title
+        self.sboms = 0
+        self.needing = 0
+        self.per_library: Dict[str, Dict[str, int]] = {}
+        self.versions: Dict[str, Dict[str, int]] = {}
+        self.pages: List[Dict[str, object]] = []
+        self.errors: List[Dict[str, object]] = []
+        self._page: Optional[TextIO] = None
+        self._in_page = 0
+        self._nav_at = 0
+        out_dir.mkdir(parents=True, exist_ok=True)
+        # Pages left over from a larger previous export would be unreachable.
+        for stale in out_dir.glob("sboms-*.html"):
+            stale.unlink()
+
+    def _apri_pagina(self) -> None:
+        number = len(self.pages) + 1
+        self._page = (self.out_dir / _nome_pagina(number)).open("w", encoding="utf-8")
+        self._in_page = 0
+        self.pages.append({"file": _nome_pagina(number), "first": "", "last": "", "needing": 0})
+        _pagina(self._page, f"{self.title} - page {number}")
+        # Whether another page follows is only known when this one is closed:
+        # the top navigation is written with room for a Next link and
+        # rewritten in place by _chiudi_pagina.
+        self._nav_at = self._page.tell()
+        self._page.write(self._navigazione(number, has_next=False))
+
+    def _navigazione(self, number: int, has_next: bool) -> str:
+        links = ['<a href="index.html">Index</a>']
+        if number > 1:
+            links.append(f'<a href="{_nome_pagina(number - 1)}">&larr; Previous</a>')
+        nav = "<nav>" + "".join(links)
+        next_link = f'<a href="{_nome_pagina(number + 1)}">Next &rarr;</a>'
+        # Same length either way (ASCII only), so the top one can be patched.
+        nav += next_link if has_next else " " * len(next_link)
+        return nav + "</nav>\n"
+
+    def _chiudi_pagina(self, has_next: bool) -> None:
+        nav = self._navigazione(len(self.pages), has_next)
+        self._page.write(nav)
+        self._page.write("</body></html>\n")
+        if has_next:
+            self._page.seek(self._nav_at)
+            self._page.write(nav)
+        self._page.close()
+        self._page = None
+
+    def add(self, sbom_file: Path, data: List[Dict[str, str]], count_needs_update: int) -> None:
+        if self._page is not None and self._in_page >= self.page_size:
+            self._chiudi_pagina(has_next=True)
+        if self._page is None:
+            self._apri_pagina()
+
+        page = self.pages[-1]
+        label = str(sbom_file)
+        page["first"] = page["first"] or label
+        page["last"] = label
+        page["needing"] += 1 if count_needs_update else 0
+        self._in_page += 1
+        self.sboms += 1
+        self.needing += 1 if count_needs_update else 0
+
+        out = self._page
+        out.write(f'<h2 id="sbom-{self.sboms}">{escape(label)}</h2>\n')
+        if not data:
+            out.write('<p class="muted">No monitored libraries.</p>\n')
+            return
+        out.write(
+            "<table><tr>" + "".join(f"<th>{escape(h)}</th>" for h in HEADERS) + "<th>Status</th></tr>\n"
+        )
+        for lib in data:
+            status = lib["status"]
+            stats = self.per_library.setdefault(
+                lib["name"], {"sboms": 0, "needs update": 0, "up-to-date": 0, "unknown": 0}
+            )
+            stats["sboms"] += 1
+            if status in stats:
+                stats[status] += 1
+            versions = self.versions.setdefault(lib["name"], {})
+            versions[lib["current"]] = versions.get(lib["current"], 0) + 1
+
+            css = _STATUS_CLASS.get(status, "unknown")
+            out.write(
+                f"<tr><td>{escape(lib['name'])}</td>"
+                f'<td class="{css}">{escape(lib["current"])}</td>'
+                f"<td>{escape(lib['latest'])}</td>"
+                f"<td>{escape(lib.get('security_label', ''))}</td>"
+                f'<td class="{css}">{escape(status)}</td></tr>\n'
+            )
+        out.write("</table>\n")
+
+    def add_error(self, error: Dict[str, object]) -> None:
+        """Records an SBOM that could not be analyzed (see core.pipeline)."""
+
+        self.errors.append(error)
+
+    def close(self) -> Path:
+        """Finishes the last page and writes index.html; returns its path."""
+
+        if self._page is not None:
+            self._chiudi_pagina(has_next=False)
+
+        index = self.out_dir / "index.html"
+        with index.open("w", encoding="utf-8") as out:
+            _pagina(out, self.title)
+            created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            out.write(
+                f'<p class="muted">{self.sboms} SBOMs, {self.needing} requiring updates, '
+                f"{len(self.errors)} not analyzed. Generated {escape(created)}.</p>\n"
+            )
+
+            out.write(
+                f"<h2>Libraries</h2>\n<table><tr><th>{escape(HEADERS[0])}</th><th>SBOMs</th>"
+                "<th>Needs update</th><th>Up-to-date</th><th>Unknown</th><th>Versions in use</th></tr>\n"
+            )
+            for name in sorted(self.per_library, key=str.lower):
+                stats = self.per_library[name]
+                versions = sorted(self.versions[name].items(), key=lambda kv: (-kv[1], kv[0]))
+                in_use = ", ".join(f"{escape(v)} ({n})" for v, n in versions)
+                css = "needs-update" if stats["needs update"] else "up-to-date"
+                out.write(
+                    f"<tr><td>{escape(name)}</td><td class=\"num\">{stats['sboms']}</td>"
+                    f"<td class=\"num {css}\">{stats['needs update']}</td>"
+                    f"<td class=\"num\">{stats['up-to-date']}</td>"
+                    f"<td class=\"num\">{stats['unknown']}</td><td>{in_use}</td></tr>\n"
+                )
+            out.write("</table>\n")
+
+            out.write("<h2>SBOMs</h2>\n<table><tr><th>Page</th><th>From</th><th>To</th><th>Requiring updates</th></tr>\n")
+            for number, page in enumerate(self.pages, start=1):
+                out.write(
+                    f"<tr><td><a href=\"{page['file']}\">{number}</a></td>"
+                    f"<td>{escape(page['first'])}</td><td>{escape(page['last'])}</td>"
+                    f"<td class=\"num\">{page['needing']}</td></tr>\n"
+                )
+            out.write("</table>\n")
+
+            if self.errors:
+                out.write(
+                    "<h2>SBOMs not analyzed</h2>\n<table><tr><th>SBOM</th><th>Stage</th>"
+                    "<th>Problem</th><th>Detail</th></tr>\n"
+                )
+                for error in self.errors:
+                    out.write(
+                        f"<tr><td>{escape(str(error['sbom']))}</td><td>{escape(error['stage'])}</td>"
+                        f"<td class=\"needs-update\">{escape(error['kind'])}</td>"
+                        f"<td>{escape(error['detail'])}</td></tr>\n"
+                    )
+                out.write("</table>\n")
+            out.write("</body></html>\n")
+        return index
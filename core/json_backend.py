@@ -0,0 +1,128 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Optional accelerated decoders. Both are picked up when installed; the
+# stdlib json module is always available as the fallback.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_FIELDS = ("name", "version", "purl", "cpe")
+
+
+def _json_loads(raw: bytes) -> Any:
+    return json.loads(raw)
+
+
+_BACKENDS: Dict[str, Callable[[bytes], Any]] = {"json": _json_loads}
+_TYPED: Dict[str, Callable[[bytes], Optional[List[Dict[str, str]]]]] = {}
+
+if orjson is not None:
+    _BACKENDS["orjson"] = orjson.loads
+
+if msgspec is not None:
+
+    class _Componente(msgspec.Struct):
+        name: Optional[str] = None
+        version: Optional[str] = None
+        purl: Optional[str] = None
+        cpe: Optional[str] = None
+
+    class _Documento(msgspec.Struct):
+        components: List[_Componente] = []
+        spdxVersion: Optional[str] = None
+
+    _decoder = msgspec.json.Decoder(_Documento)
+
+    def _msgspec_componenti(raw: bytes) -> Optional[List[Dict[str, str]]]:
+        # Typed decoding: only components[].name/version/purl/cpe are built,
+        # every other member of the document is validated and skipped.
+        try:
+            doc = _decoder.decode(raw)
+        except (msgspec.DecodeError, msgspec.ValidationError):
+            return None
+        if doc.spdxVersion is not None:
+            return None
+        return [{f: getattr(c, f) for f in _FIELDS} for c in doc.components]
+
+    _BACKENDS["msgspec"] = msgspec.json.decode
+    _TYPED["msgspec"] = _msgspec_componenti
+
+# Only msgspec is picked automatically: its typed decoder skips everything
+# but the component fields. orjson builds the same full tree as json and was
+# not faster on benchmarks/bench_json_backend.py; it can still be selected
+# with imposta_backend.
+_backend = "msgspec" if "msgspec" in _BACKENDS else "json"
+
+
+def backend_disponibili() -> List[str]:
+    return list(_BACKENDS)
+
+
+def backend_attivo() -> str:
+    return _backend
+
+
+def imposta_backend(name: str) -> None:
+    """Selects the decoding backend ('json', 'orjson' or 'msgspec' when installed)."""
+
+    global _backend
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available ({', '.join(_BACKENDS)})")
+    _backend = name
+
+
+def _decodifica(raw: bytes) -> Any:
+    if _backend != "json":
+        try:
+            return _BACKENDS[_backend](raw)
+        except Exception:
+            pass
+    try:
+        return json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def decodifica_json(raw: bytes) -> Any:
+    """
+    Decodes a whole JSON document (plain dicts and lists) with the active
+    backend, for readers that need more than the component fields; None when
+    the content is not valid JSON.
+    """
+
+    return _decodifica(raw)
+
+
+def decodifica_sbom(raw: bytes) -> Optional[Dict[str, list]]:
+    """
+    Decodes SBOM JSON content with the active backend. Returns
+    {"components": [...]} for CycloneDX (the top-level component objects,
+    dicts to read name/version/purl/cpe from; other entries are left to the
+    caller to skip), {"packages": [...]} for SPDX JSON, or None when the
+    content is not a JSON object.
+
+    The typed decoder is used when the backend has one. Input the fast
+    decoders reject (e.g. a UTF-8 BOM) is retried with the stdlib module,
+    so the result never depends on which backend is installed. With the
+    stdlib backend this is a plain json.loads: the decoded component
+    objects are returned as they are, not copied.
+    """
+
+    typed = _TYPED.get(_backend)
+    components = typed(raw) if typed else None
+    if components is not None:
+        return {"components": components}
+
+    data = _decodifica(raw)
+    if not isinstance(data, dict):
+        return None
+    if "spdxVersion" in data:
+        return {"packages": data.get("packages") or []}
+    return {"components": data.get("components") or []}
@@ -0,0 +1,110 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Container, Iterator, Tuple
+
+_WHITESPACE = " \t\n\r"
+_CHUNK = 1 << 16
+
+
+class _Buffer:
+    """Sliding text window over a binary stream, decoded as UTF-8 chunk by chunk."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def refill(self, size: int = _CHUNK) -> bool:
+        if self.eof:
+            return False
+        raw = self.stream.read(size)
+        if not raw:
+            self.eof = True
+            self.text = self.text[self.pos :] + self.decoder.decode(b"", final=True)
+        else:
+            self.text = self.text[self.pos :] + self.decoder.decode(raw)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character ('' at end of input)."""
+
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.refill():
+                return self.text[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Decodes the next JSON value, reading more input until it is complete."""
+
+        self.peek()
+        size = _CHUNK
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.refill(size):
+                    raise
+                size *= 2
+                continue
+            # A number ending exactly at the buffer edge may still be truncated.
+            if end == len(self.text) and not self.eof:
+                self.refill(size)
+                continue
+            self.pos = end
+            return obj
+
+
+def itera_json(stream: BinaryIO, arrays: Container[str] = ()) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally walks a top-level JSON object.
+
+    Yields (key, value) for every top-level member, except members listed in
+    `arrays`: when those are arrays they are yielded element by element as
+    (key, element), so memory is bounded by the largest element rather than by
+    the document. Every other top-level array is skipped element by element
+    and reported as (key, None), so large unneeded sections are never held
+    in memory as a whole.
+    """
+
+    buf = _Buffer(stream)
+    decoder = json.JSONDecoder()
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+    while True:
+        key = buf.value(decoder)
+        buf.expect(":")
+        if buf.peek() == "[":
+            buf.pos += 1
+            if buf.peek() == "]":
+                buf.pos += 1
+            else:
+                while True:
+                    element = buf.value(decoder)
+                    if key in arrays:
+                        yield key, element
+                    separator = buf.peek()
+                    buf.pos += 1
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"malformed array '{key}' at offset {buf.pos}")
+            if key not in arrays:
+                yield key, None
+        else:
+            yield key, buf.value(decoder)
+        separator = buf.peek()
+        buf.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"malformed object at offset {buf.pos}")
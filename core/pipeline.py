@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import io
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from core.component_matcher import usa_alias
+from core.db_manager import get_library_aliases
+from core.sbom_reader import (
+    GZIP_SUFFIXES,
+    SBOM_SUFFIXES,
+    SbomParseError,
+    _digest_file,
+    _ha_suffisso,
+    _membri_archivio,
+    estrai_librerie,
+    formati_aggiunti,
+    is_archivio,
+    leggi_sbom,
+    registra_formati,
+)
+from core.version_resolver import BatchResolver
+from core.worker_pool import IsolatedWorker, ParseLimits, WorkerFailure
+
+# Files up to this size travel to the parse workers as bytes; larger ones are
+# re-opened by the worker so the streaming parsers keep their memory bound.
+INLINE_LIMIT = 16 << 20
+QUEUE_SIZE = 16
+READERS = 4
+
+_DONE = None
+
+Sink = Callable[[Path, List[Dict[str, str]], int], None]
+
+
+def _analizza(name: str, raw: Optional[bytes], path: Path) -> List[Dict[str, str]]:
+    """Parse stage, run in a worker process: SBOM content -> monitored libraries."""
+
+    try:
+        if raw is None:
+            with path.open("rb") as stream:
+                return estrai_librerie(leggi_sbom(name, stream))
+        return estrai_librerie(leggi_sbom(name, io.BytesIO(raw)))
+    except SbomParseError as exc:
+        raise WorkerFailure("malformed", str(exc)) from None
+    except OSError as exc:
+        raise WorkerFailure("unreadable", str(exc)) from None
+
+
+def _prepara_worker(plugins: list, aliases: List[Dict[str, str]]) -> None:
+    """Worker initializer: parser plugins and library aliases of the parent."""
+
+    registra_formati(plugins)
+    usa_alias(aliases)
+
+
+def _dimensioni(paths: Sequence[Path]) -> Dict[int, List[Path]]:
+    """Plain (non-archive) input files grouped by size."""
+
+    by_size: Dict[int, List[Path]] = {}
+    for path in paths:
+        if not is_archivio(path):
+            try:
+                by_size.setdefault(path.stat().st_size, []).append(path)
+            except OSError:
+                pass
+    return by_size
+
+
+def _leggi_file(path: Path, max_bytes: Optional[int], by_size: Dict[int, List[Path]]):
+    """
+    Returns (content key, bytes or None when the worker should re-open the
+    file). Raises WorkerFailure for files over the size budget, unread.
+
+    Only files sharing their size with another input file are hashed; any
+    other file is keyed by its path, as no other file can have its content
+    (archive members are matched against it in esegui_pipeline).
+    """
+
+    size = path.stat().st_size
+    if max_bytes is not None and size > max_bytes:
+        raise WorkerFailure("size", f"{size >> 20} MB exceeds the {max_bytes >> 20} MB limit")
+    if len(by_size.get(size, ())) < 2:
+        return "p:" + str(path), (None if size > INLINE_LIMIT else path.read_bytes())
+    if size > INLINE_LIMIT:
+        return "f:" + _digest_file(path), None
+    raw = path.read_bytes()
+    return "f:" + hashlib.blake2b(raw, digest_size=16).hexdigest(), raw
+
+
+def _errore(path: Path, stage: str, failure: WorkerFailure) -> Dict[str, object]:
+    return {"sbom": path, "stage": stage, "kind": failure.kind, "detail": failure.detail}
+
+
+async def esegui_pipeline(
+    paths: Sequence[Path],
+    sink: Sink,
+    readers: int = READERS,
+    parsers: Optional[int] = None,
+    queue_size: int = QUEUE_SIZE,
+    limits: Optional[ParseLimits] = None,
+) -> List[Dict[str, object]]:
+    """
+    Scans SBOM files through four stages connected by bounded queues:
+
+      read    - `readers` tasks load files (and archive members) in threads
+                and hash those that may be copies (files sharing a size,
+                archive members), so byte-identical SBOMs are parsed once;
+      parse   - `parsers` tasks, each driving one isolated worker process;
+      resolve - one task classifies the libraries against the catalog;
+      sink    - calls sink(sbom_file, data, count) in input order.
+
+    A full queue blocks the stage feeding it, so at most a few queues' worth
+    of SBOM content is in memory whatever the number of files; only the
+    resolved rows wait in the sink to be emitted in order.
+
+    Every file is held to the budgets of `limits`: oversized files are not
+    read, and a parse that runs out of time or memory only loses its worker.
+    Such SBOMs are not passed to the sink; the returned list describes them,
+    in input order, as {sbom, stage, kind, detail} (kinds: size, unreadable,
+    malformed, timeout, memory, crashed, error).
+    """
+
+    loop = asyncio.get_running_loop()
+    parsers = parsers or os.cpu_count() or 1
+    limits = limits or ParseLimits()
+    # The aliases the workers match components with are read once here and
+    # passed to them, so workers never open Version.db; versions are
+    # resolved in this process. Parser plugins registered here are
+    # registered in the workers too.
+    setup = (formati_aggiunti(), get_library_aliases())
+    workers = [IsolatedWorker(_analizza, limits, _prepara_worker, setup) for _ in range(parsers)]
+    # Dedicated threads wait on the workers, so a slow parse never holds up
+    # the readers' threads.
+    waiters = ThreadPoolExecutor(max_workers=parsers)
+    errors: List[Dict[str, object]] = []
+    path_q: asyncio.Queue = asyncio.Queue(queue_size)
+    parse_q: asyncio.Queue = asyncio.Queue(queue_size)
+    resolve_q: asyncio.Queue = asyncio.Queue(queue_size)
+    sink_q: asyncio.Queue = asyncio.Queue(queue_size)
+    seen = set()
+    # One stat per plain file; _leggi_file only hashes files of a shared size.
+    by_size = await asyncio.to_thread(_dimensioni, paths)
+    twins: Dict[Path, str] = {}
+
+    def chiave_membro(raw: bytes) -> str:
+        # A member with the content of a plain file keyed by its path gets
+        # that key; such files are hashed here, once each, when a member of
+        # their size turns up.
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        candidates = by_size.get(len(raw), ())
+        if len(candidates) == 1:
+            path = candidates[0]
+            if path not in twins:
+                try:
+                    twins[path] = _digest_file(path)
+                except OSError:
+                    twins[path] = ""
+            if twins[path] == digest:
+                return "p:" + str(path)
+        return "f:" + digest
+
+    async def inoltra(seq, path: Path, name: str, key: str, raw: Optional[bytes]) -> None:
+        if key in seen:
+            await resolve_q.put((seq, path, key, None))
+        else:
+            seen.add(key)
+            await parse_q.put((seq, path, name, key, raw))
+
+    def invia(coro) -> None:
+        asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def leggi_archivio(index: int, archive: Path) -> int:
+        # Runs in a thread: members are decompressed one at a time and each
+        # put blocks while the parse queue is full.
+        count = 0
+        try:
+            for name, stream in _membri_archivio(archive):
+                if not _ha_suffisso(name, SBOM_SUFFIXES + GZIP_SUFFIXES):
+                    continue
+                member = archive / name
+                # One byte past the budget is enough to know it is exceeded.
+                raw = stream.read(-1 if limits.max_bytes is None else limits.max_bytes + 1)
+                if limits.max_bytes is not None and len(raw) > limits.max_bytes:
+                    failure = WorkerFailure("size", f"exceeds the {limits.max_bytes >> 20} MB limit")
+                    invia(sink_q.put(("error", (index, count), _errore(member, "read", failure))))
+                else:
+                    key = chiave_membro(raw)
+                    invia(inoltra((index, count), member, name, key, raw))
+                count += 1
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as exc:
+            failure = WorkerFailure("unreadable", f"{type(exc).__name__}: {exc}")
+            invia(sink_q.put(("error", (index, count), _errore(archive, "read", failure))))
+            count += 1
+        return count
+
+    async def lettore() -> None:
+        while (job := await path_q.get()) is not _DONE:
+            index, path = job
+            if is_archivio(path):
+                count = await asyncio.to_thread(leggi_archivio, index, path)
+            else:
+                count = 1
+                try:
+                    key, raw = await asyncio.to_thread(_leggi_file, path, limits.max_bytes, by_size)
+                except WorkerFailure as failure:
+                    await sink_q.put(("error", (index, 0), _errore(path, "read", failure)))
+                except OSError as exc:
+                    failure = WorkerFailure("unreadable", str(exc))
+                    await sink_q.put(("error", (index, 0), _errore(path, "read", failure)))
+                else:
+                    await inoltra((index, 0), path, path.name, key, raw)
+            await sink_q.put(("end", index, count))
+
+    async def analizzatore(worker: IsolatedWorker) -> None:
+        while (item := await parse_q.get()) is not _DONE:
+            seq, path, name, key, raw = item
+            try:
+                libs = await loop.run_in_executor(waiters, worker.run, name, raw, path)
+            except WorkerFailure as failure:
+                libs = failure
+            await resolve_q.put((seq, path, key, libs))
+
+    def esito(seq, path: Path, result) -> tuple:
+        if isinstance(result, WorkerFailure):
+            return ("error", seq, _errore(path, "parse", result))
+        return ("report", seq, (path,) + result)
+
+    async def risolutore() -> None:
+        # One resolver for the whole scan: each library version met in any
+        # SBOM is resolved once and its row shared by every report.
+        resolver = BatchResolver()
+        results: Dict[str, tuple] = {}
+        waiting: Dict[str, list] = {}
+        while (item := await resolve_q.get()) is not _DONE:
+            seq, path, key, libs = item
+            if libs is None:
+                if key in results:
+                    await sink_q.put(esito(seq, path, results[key]))
+                else:
+                    waiting.setdefault(key, []).append((seq, path))
+                continue
+            if isinstance(libs, WorkerFailure):
+                # Byte-identical twins fail the same way, each with its entry.
+                results[key] = libs
+            else:
+                data = resolver.resolve(libs)
+                results[key] = (data, sum(1 for lib in data if lib["status"] == "needs update"))
+            for twin_seq, twin_path in [(seq, path)] + waiting.pop(key, []):
+                await sink_q.put(esito(twin_seq, twin_path, results[key]))
+
+    async def scrittore() -> None:
+        expected: Dict[int, int] = {}
+        ready: Dict[int, Dict[int, tuple]] = {}
+        next_file = 0
+        while (item := await sink_q.get()) is not _DONE:
+            if item[0] == "end":
+                expected[item[1]] = item[2]
+            else:
+                kind, (index, member), payload = item
+                ready.setdefault(index, {})[member] = (kind, payload)
+            while next_file in expected and len(ready.get(next_file, ())) == expected[next_file]:
+                members = ready.pop(next_file, {})
+                for member in sorted(members):
+                    kind, payload = members[member]
+                    if kind == "error":
+                        errors.append(payload)
+                    else:
+                        await asyncio.to_thread(sink, *payload)
+                del expected[next_file]
+                next_file += 1
+
+    async def alimenta() -> None:
+        for job in enumerate(paths):
+            await path_q.put(job)
+        for _ in range(readers):
+            await path_q.put(_DONE)
+
+    async def fase(tasks, out_q: asyncio.Queue, consumers: int) -> None:
+        await asyncio.gather(*tasks)
+        for _ in range(consumers):
+            await out_q.put(_DONE)
+
+    try:
+        await asyncio.gather(
+            alimenta(),
+            fase([lettore() for _ in range(readers)], parse_q, parsers),
+            fase([analizzatore(worker) for worker in workers], resolve_q, 1),
+            fase([risolutore()], sink_q, 1),
+            scrittore(),
+        )
+    finally:
+        waiters.shutdown(wait=False)
+        for worker in workers:
+            worker.close()
+    return errors
+
+
+def analizza_sbom(
+    paths: Sequence[Path],
+    sink: Sink,
+    readers: int = READERS,
+    parsers: Optional[int] = None,
+    queue_size: int = QUEUE_SIZE,
+    limits: Optional[ParseLimits] = None,
+) -> List[Dict[str, object]]:
+    """
+    Runs esegui_pipeline with `parsers` isolated worker processes (one per
+    CPU by default); returns the list of SBOMs that could not be analyzed.
+    """
+
+    return asyncio.run(esegui_pipeline(paths, sink, readers, parsers, queue_size, limits))
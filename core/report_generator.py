@@ -1,9 +1,9 @@
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from utils.colors import Fore, Style
 from core.sbom_reader import carica_sbom_generico, estrai_librerie
-from core.version_resolver import risolvi_versioni
+from core.version_resolver import risolvi_versioni, testi_release
 
 
 HEADERS = [
@@ -40,10 +40,13 @@ def _security_color(label: str) -> str:
     return Fore.YELLOW
 
 
-def report_for_sbom(path: Path) -> None:
-    comps = carica_sbom_generico(path)
-    libs = estrai_librerie(comps)
-    data = risolvi_versioni(libs)
+def report_for_sbom(path: Path, data: Optional[List[Dict[str, str]]] = None) -> None:
+    """Prints the report of one SBOM; `data` skips parsing when already resolved."""
+
+    if data is None:
+        comps = carica_sbom_generico(path)
+        libs = estrai_librerie(comps)
+        data = risolvi_versioni(libs)
     count_needs_update = sum(1 for lib in data if lib["status"] == "needs update")
 
     widths = _column_widths(data)
@@ -86,16 +89,183 @@ def report_for_sbom(path: Path) -> None:
 
     notes_to_print = [lib for lib in data if lib.get("security_notes")]
     if notes_to_print:
+        # Only the bodies printed here are read from the database, in one query.
+        texts = testi_release(rel for lib in notes_to_print for rel in lib["security_notes"])
         print(f"\n{Fore.MAGENTA}Release notes with security updates:{Style.RESET_ALL}")
         for lib in notes_to_print:
             print(f"\n{Fore.CYAN}{lib['name']}{Style.RESET_ALL}")
             for rel in lib["security_notes"]:
                 version = rel.get("version", "")
                 date = rel.get("release_date") or "date n/a"
-                notes = rel.get("release_notes") or "No release notes available."
+                notes = texts.get(rel.get("id"), {}).get("release_notes") or "No release notes available."
                 print(f"  {Fore.YELLOW}{version}{Style.RESET_ALL} ({date})")
                 for line in notes.splitlines():
                     print(f"    - {line}")
     else:
         print(f"\n{Style.DIM}No security updates detected in later versions.{Style.RESET_ALL}")
 
+
+_DIFF_MARKERS = {
+    "added": (Fore.GREEN, "+"),
+    "removed": (Fore.RED, "-"),
+    "upgraded": (Fore.CYAN, "↑"),
+    "downgraded": (Fore.YELLOW, "↓"),
+    "changed": (Fore.YELLOW, "~"),
+}
+
+
+def report_for_diff(title: str, changes: List[Dict[str, object]]) -> None:
+    """Prints the compact change report produced by core.sbom_diff.diff_sbom."""
+
+    print(f"\n{Fore.GREEN}SBOM diff: {title}{Style.RESET_ALL}")
+    if not changes:
+        print(f"  {Style.DIM}No library changes.{Style.RESET_ALL}")
+        return
+
+    counts = {kind: 0 for kind in _DIFF_MARKERS}
+    status_changes = 0
+    for change in changes:
+        kind = change["change"]
+        counts[kind] += 1
+        color, marker = _DIFF_MARKERS[kind]
+        old, new = change["old"], change["new"]
+        if old and new:
+            versions = f"{old['current']} → {new['current']}"
+        else:
+            versions = (new or old)["current"]
+        line = f"  {color}{marker} {change['name']}{Style.RESET_ALL} {versions}"
+        if change["status_changed"]:
+            status_changes += 1
+            line += (
+                f"  [{_current_color(old['status'])}{old['status']}{Style.RESET_ALL}"
+                f" → {_current_color(new['status'])}{new['status']}{Style.RESET_ALL}]"
+            )
+        elif new:
+            line += f"  [{_current_color(new['status'])}{new['status']}{Style.RESET_ALL}]"
+        print(line)
+
+    summary = ", ".join(f"{counts[kind]} {kind}" for kind in _DIFF_MARKERS if counts[kind])
+    print(f"  Summary: {summary}; security status changes: {status_changes}")
+
+
+def report_for_fleet(reports) -> None:
+    """Prints a per-library rollup of many (sbom_file, data, count) reports."""
+
+    per_library: Dict[str, Dict[str, int]] = {}
+    for _, data, _ in reports:
+        for lib in data:
+            stats = per_library.setdefault(lib["name"], {"sboms": 0, "needs update": 0, "unknown": 0})
+            stats["sboms"] += 1
+            if lib["status"] in stats:
+                stats[lib["status"]] += 1
+
+    needing = sum(1 for _, _, count in reports if count)
+    print(f"\n{Fore.GREEN}Fleet report: {len(reports)} SBOMs{Style.RESET_ALL}")
+    print(
+        f"SBOMs requiring updates: {Fore.RED if needing else Fore.GREEN}{needing}{Style.RESET_ALL}"
+    )
+    if not per_library:
+        return
+
+    width = max(len(HEADERS[0]), *(len(name) for name in per_library))
+    print(f"\n{Fore.MAGENTA}{HEADERS[0].ljust(width)}  {'SBOMs':>7}  {'Needs update':>12}  {'Unknown':>7}{Style.RESET_ALL}")
+    for name in sorted(per_library, key=str.lower):
+        stats = per_library[name]
+        color = Fore.RED if stats["needs update"] else Fore.GREEN
+        print(
+            f"{Fore.CYAN}{name.ljust(width)}{Style.RESET_ALL}  {stats['sboms']:>7}  "
+            f"{color}{stats['needs update']:>12}{Style.RESET_ALL}  {stats['unknown']:>7}"
+        )
+
+
+def report_for_errors(errors: List[Dict[str, object]]) -> None:
+    """Prints the SBOMs a scan could not analyze (see core.pipeline)."""
+
+    if not errors:
+        return
+    print(f"\n{Fore.RED}SBOMs that could not be analyzed: {len(errors)}{Style.RESET_ALL}")
+    for error in errors:
+        print(
+            f"  {Fore.YELLOW}{error['kind']}{Style.RESET_ALL} ({error['stage']}) "
+            f"{error['sbom']}: {error['detail']}"
+        )
+
+
+def _dietro(value) -> str:
+    if value is None:
+        return "n/a"
+    return f"{value:g}"
+
+
+def report_for_stats(title: str, sboms: int, stats: List[Dict[str, object]], detail: bool = False) -> None:
+    """
+    Prints the fleet summaries of core.fleet_stats.statistiche_flotta, with
+    the versions each row lists; with `detail`, every library is followed by
+    its version distribution as a table.
+    """
+
+    print(f"\n{Fore.GREEN}{title}: {sboms} SBOMs{Style.RESET_ALL}")
+    if not stats:
+        print(" No monitored libraries.")
+        return
+
+    width = max(len(HEADERS[0]), *(len(row["library"]) for row in stats))
+    print(
+        f"\n{Fore.MAGENTA}{HEADERS[0].ljust(width)}  {'SBOMs':>7}  {'Needs update':>12}  {'On latest':>9}  "
+        f"{'Behind (median/max)':>19}  {'Versions':>8}  Most used{Style.RESET_ALL}"
+    )
+    for row in stats:
+        color = Fore.RED if row["needs_update"] else Fore.GREEN
+        behind = f"{_dietro(row['behind_median'])} / {_dietro(row['behind_max'])}"
+        most_used = ", ".join(
+            f"{version} ({100.0 * count / row['sboms']:.0f}%)" for version, count, _ in row["versions"]
+        )
+        print(
+            f"{Fore.CYAN}{row['library'].ljust(width)}{Style.RESET_ALL}  {row['sboms']:>7}  "
+            f"{color}{row['needs_update']:>12}{Style.RESET_ALL}  {row['on_latest_pct']:>8.1f}%  "
+            f"{behind:>19}  {row['distinct']:>8}  {most_used}"
+        )
+    print(" Behind: catalog releases after the version in use; versions the catalog cannot place are left out.")
+
+    if not detail:
+        return
+    for row in stats:
+        print(f"\n{Fore.CYAN}{row['library']}{Style.RESET_ALL} ({row['sboms']} SBOMs, {row['unplaced']} unplaced)")
+        version_width = max(len("Version"), *(len(version) for version, _, _ in row["versions"]))
+        print(f"{Fore.MAGENTA}{'Version'.ljust(version_width)}  {'SBOMs':>7}  {'Share':>6}  {'Behind':>6}{Style.RESET_ALL}")
+        for version, count, behind in row["versions"]:
+            color = Fore.GREEN if behind == 0 else Fore.YELLOW if behind is None else Fore.RED
+            print(
+                f"{color}{version.ljust(version_width)}{Style.RESET_ALL}  {count:>7}  "
+                f"{100.0 * count / row['sboms']:>5.1f}%  {_dietro(behind):>6}"
+            )
+
+
+def _catena(graph, path: List[int], keep: int = 4) -> str:
+    labels = [graph.label(node) for node in path]
+    if len(labels) > 2 * keep + 1:
+        labels = labels[:keep] + [f"... {len(labels) - 2 * keep} more ..."] + labels[-keep:]
+    return " → ".join(labels)
+
+
+def report_for_paths(path: Path, graph, entries: List[Dict[str, object]]) -> None:
+    """Prints how the outdated libraries are pulled in (core.dependency_graph.percorsi_librerie)."""
+
+    print(f"\n{Fore.GREEN}SBOM: {path.name}{Style.RESET_ALL} ({len(graph)} components)")
+    if not entries:
+        print(f"  {Style.DIM}No monitored library needs an update.{Style.RESET_ALL}")
+        return
+    for entry in entries:
+        label = entry["security_label"]
+        print(
+            f"\n  {Fore.CYAN}{entry['library']}{Style.RESET_ALL} "
+            f"{_current_color('needs update')}{entry['version']}{Style.RESET_ALL} → {entry['latest']}"
+            + (f"  {_security_color(label)}{label}{Style.RESET_ALL}" if label else "")
+        )
+        print(f"    shortest: {_catena(graph, entry['shortest'])}")
+        if entry["via"]:
+            print(f"    pulled in by: {', '.join(graph.label(node) for node in entry['via'])}")
+        more = " (more exist)" if entry["truncated"] else ""
+        print(f"    paths: {len(entry['paths'])}{more}")
+        for chain in entry["paths"]:
+            print(f"      {_catena(graph, chain)}")
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Dict, List
+
+from core.sbom_reader import carica_sbom_generico, elenca_file_sbom, estrai_librerie, itera_sbom
+from core.version_resolver import BatchResolver, _normalizza, _version_key, get_library_catalog
+
+
+def _componenti(path: Path, components=None) -> Dict[str, str]:
+    """Parses an SBOM once and returns {library name: normalized version}."""
+
+    if components is None:
+        components = carica_sbom_generico(path)
+    out: Dict[str, str] = {}
+    for lib in estrai_librerie(components):
+        out.setdefault(lib["name"], _normalizza(lib["version"]))
+    return out
+
+
+class _Resolver:
+    """Resolves (library, version) pairs on demand, each distinct pair once."""
+
+    def __init__(self) -> None:
+        self._batch = BatchResolver()
+        self._order: Dict[str, Dict[str, int]] = {}
+
+    def get(self, name: str, version: str) -> Dict[str, str]:
+        return self._batch.row(name, version)
+
+    def compare(self, name: str, old: str, new: str) -> int:
+        """Orders two versions by catalog release order, falling back to version keys."""
+
+        if name not in self._order:
+            releases = get_library_catalog(name).releases
+            self._order[name] = {
+                _normalizza(rel.get("version")): pos for pos, rel in enumerate(releases)
+            }
+        order = self._order[name]
+        if old in order and new in order:
+            a, b = order[old], order[new]
+        else:
+            a, b = _version_key(old), _version_key(new)
+        return (a > b) - (a < b)
+
+
+def _diff_componenti(
+    old: Dict[str, str], new: Dict[str, str], resolver: _Resolver
+) -> List[Dict[str, object]]:
+    old_set = set(old.items())
+    new_set = set(new.items())
+    if old_set == new_set:
+        return []
+
+    # Only the pairs outside the intersection can carry a change.
+    changed_names = sorted({name for name, _ in old_set ^ new_set})
+
+    changes = []
+    for name in changed_names:
+        before = resolver.get(name, old[name]) if name in old else None
+        after = resolver.get(name, new[name]) if name in new else None
+        if before is None:
+            change = "added"
+        elif after is None:
+            change = "removed"
+        else:
+            direction = resolver.compare(name, old[name], new[name])
+            change = "upgraded" if direction < 0 else "downgraded" if direction > 0 else "changed"
+        status_changed = bool(before and after and before["status"] != after["status"])
+        changes.append(
+            {
+                "name": name,
+                "change": change,
+                "old": before,
+                "new": after,
+                "status_changed": status_changed,
+            }
+        )
+    return changes
+
+
+def diff_sbom(old_path: Path, new_path: Path) -> List[Dict[str, object]]:
+    """
+    Compares two revisions of an SBOM. Each file is parsed once and only the
+    components whose (name, version) differ are resolved against the catalog.
+    """
+
+    return _diff_componenti(_componenti(old_path), _componenti(new_path), _Resolver())
+
+
+def _componenti_cartella(folder: Path) -> Dict[str, Dict[str, str]]:
+    """{path relative to folder: components} for every SBOM, archives included."""
+
+    return {
+        path.relative_to(folder).as_posix(): _componenti(path, components)
+        for path, components in itera_sbom(elenca_file_sbom(folder))
+    }
+
+
+def diff_cartelle(old_dir: Path, new_dir: Path) -> List[Dict[str, object]]:
+    """
+    Compares two folders of SBOMs, pairing files by relative path
+    (archive members as archive/member).
+    Returns one entry per SBOM that was added, removed or changed.
+    """
+
+    old_sboms = _componenti_cartella(old_dir)
+    new_sboms = _componenti_cartella(new_dir)
+    resolver = _Resolver()
+
+    out = []
+    for name in sorted(old_sboms.keys() | new_sboms.keys()):
+        if name not in new_sboms:
+            out.append({"sbom": name, "change": "removed", "components": []})
+        elif name not in old_sboms:
+            out.append({"sbom": name, "change": "added", "components": []})
+        else:
+            changes = _diff_componenti(old_sboms[name], new_sboms[name], resolver)
+            if changes:
+                out.append({"sbom": name, "change": "changed", "components": changes})
+    return out
@@ -1,144 +1,489 @@
-import json
+import gzip
+import hashlib
+import io
+import tarfile
+import xml.etree.ElementTree as ET
+import zipfile
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 import re
+from core.component_matcher import get_matcher
 from core.constants import FIRMWARE_LIBRARIES
+from core.json_backend import decodifica_sbom
+from core.json_stream import itera_json
 
-def _carica_cyclonedx_json(path: Path) -> List[Dict[str, str]]:
+SBOM_SUFFIXES = (".json", ".spdx", ".xml")
+GZIP_SUFFIXES = tuple(s + ".gz" for s in SBOM_SUFFIXES)
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+class SbomParseError(ValueError):
+    """Raised by the strict readers (leggi_sbom) for malformed SBOM content."""
+
+def _cyclonedx_da_stream(stream: BinaryIO) -> List[Dict[str, str]]:
     """
-    Extracts [{name, version}] from a CycloneDX JSON file.
+    Extracts [{name, version}] from CycloneDX JSON read from a binary stream.
     """
-    try:
-        data = json.load(path.open("r", encoding="utf-8"))
-    except Exception:
-        return []
-    comps = data.get("components", [])
+    return _cyclonedx_da_bytes(stream.read())
+
+def _cyclonedx_da_bytes(raw: bytes) -> List[Dict[str, str]]:
+    """
+    Decodes CycloneDX JSON content with the active backend of core.json_backend
+    (typed components-only decoding when available, stdlib json otherwise).
+    """
+    doc = decodifica_sbom(raw)
+    if doc is None:
+        raise SbomParseError("not a JSON object")
+    if "packages" in doc:
+        # SPDX JSON saved with a plain .json suffix
+        return _spdx_json_pacchetti(doc["packages"])
     out = []
-    for c in comps:
-        name = c.get("name")
-        version = c.get("version")
-        if name and version:
-            out.append({"name": name, "version": version})
+    for c in doc["components"]:
+        if not isinstance(c, dict):
+            continue
+        entry = _componente(c.get("name"), c.get("version"), c.get("purl"), c.get("cpe"))
+        if entry:
+            out.append(entry)
     return out
 
-def _carica_spdx_tag_value(path: Path) -> List[Dict[str, str]]:
-    """
-    Minimal SPDX tag-value parser: pairs of PackageName / PackageVersion.
-    Returns only packages mapped to the target libraries.
-    """
-    NAME_MAP = {
-        "freertos": "FreeRTOS",
-        "freertos kernel": "FreeRTOS",
-        "component-freertos": "FreeRTOS",
-        "freertos-freertos-kernel": "FreeRTOS",
-        "rt": "FreeRTOS",
-
-        "lwip": "LwIP",
-        "component-lwip": "LwIP",
-        "lwip-lwip": "LwIP",
-
-        "fatfs": "FatFs",
-        "fat-fs": "FatFs",
-        "component-fatfs": "FatFs",
-
-        "cmsis-rtos": "CMSIS-RTOS",
-        "cmsis": "CMSIS-RTOS",
-
-        "mbedtls": "mbedTLS",
-        "libjpeg": "LibJPEG",
-        "openamp": "OpenAMP",
-        "stemwin": "STemWin",
-        "stm32_audio": "STM32_Audio",
-
-        "usb-host": "STM32_USB_Host_Library",
-        "usb": "STM32_USB_Host_Library",
-        "component-usb": "STM32_USB_Host_Library",
-        "stm32_usb_host_library": "STM32_USB_Host_Library",
-        "stm32cube_usb_host": "STM32_USB_Host_Library",
-
-        "usb-device": "STM32_USB_Device_Library",
-        "stm32_usb_device_library": "STM32_USB_Device_Library",
-        "stm32cube_usb_device": "STM32_USB_Device_Library",
-
-        "touchgfx": "TouchGFX",
-        "hal": "STM32H7xx_HAL_Driver",
-        "stm32h7xx_hal_driver": "STM32H7xx_HAL_Driver",
-    }
-
-    def canonizza_nome(pkg_name: str) -> Optional[str]:
-        s = pkg_name.strip().lower()
-        if s in NAME_MAP:
-            return NAME_MAP[s]
-        # heuristic fallback
-        if "freertos" in s: return "FreeRTOS"
-        if "lwip" in s: return "LwIP"
-        if "fatfs" in s or "fat-fs" in s: return "FatFs"
-        if "cmsis" in s: return "CMSIS-RTOS"
-        if "mbedtls" in s: return "mbedTLS"
-        if "openamp" in s: return "OpenAMP"
-        if "libjpeg" in s: return "LibJPEG"
-        if "stm32h7" in s or "hal" in s: return "STM32H7xx_HAL_Driver"
-        if "usb" in s and "host" in s: return "STM32_USB_Host_Library"
-        if "usb" in s and "device" in s: return "STM32_USB_Device_Library"
-        if "touchgfx" in s: return "TouchGFX"
-        if "stemwin" in s: return "STemWin"
-        if "audio" in s and "stm32" in s: return "STM32_Audio"
+def _componente(name, version, purl=None, cpe=None) -> Optional[Dict[str, str]]:
+    """
+    Builds a {name, version} component; purl/cpe are kept when present so
+    estrai_librerie can match libraries published under other names.
+    """
+    if not (name and version):
         return None
+    entry = {"name": name, "version": version}
+    if purl:
+        entry["purl"] = purl
+    if cpe:
+        entry["cpe"] = cpe
+    return entry
+
+# SPDX external reference types carrying a purl or a CPE.
+_TIPO_RIFERIMENTO = {"purl": "purl", "cpe23type": "cpe", "cpe22type": "cpe"}
 
+def canonizza_nome_spdx(pkg_name: str, purl: Optional[str] = None, cpe: Optional[str] = None) -> Optional[str]:
+    """
+    Maps an SPDX package to one of the target libraries (or None).
+    """
+    return get_matcher().match(pkg_name, purl=purl, cpe=cpe, spdx=True)
+
+def _dedup_per_nome(components: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    # Deduplicate by name
+    dedup = {}
+    for c in components:
+        if c["name"] not in dedup:
+            dedup[c["name"]] = c["version"]
+    return [{"name": k, "version": v} for k, v in dedup.items()]
+
+def _spdx_da_righe(righe: Iterable[str]) -> List[Dict[str, str]]:
+    """
+    Minimal SPDX tag-value parser: pairs of PackageName / PackageVersion, from
+    any iterable of text lines. Returns only packages mapped to the target
+    libraries.
+    """
     components = []
     current_name = None
     current_version = None
+    refs = {}
 
     def flush():
         nonlocal current_name, current_version
         if current_name and current_version:
-            canon = canonizza_nome(current_name)
+            canon = canonizza_nome_spdx(current_name, refs.get("purl"), refs.get("cpe"))
             if canon in FIRMWARE_LIBRARIES:
                 components.append({"name": canon, "version": current_version})
         current_name, current_version = None, None
+        refs.clear()
+
+    try:
+        for raw in righe:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("PackageName:"):
+                flush()
+                current_name = line.split("PackageName:", 1)[1].strip()
+                continue
+            if line.startswith("PackageVersion:"):
+                current_version = line.split("PackageVersion:", 1)[1].strip()
+                continue
+            if line.startswith("ExternalRef:"):
+                # ExternalRef: <category> <type> <locator>
+                parts = line.split(None, 3)
+                if len(parts) == 4:
+                    kind = _TIPO_RIFERIMENTO.get(parts[2].lower())
+                    if kind:
+                        refs.setdefault(kind, parts[3].strip())
+                continue
+        flush()
+    except (OSError, EOFError, ValueError) as exc:
+        raise SbomParseError(f"malformed SPDX tag-value: {exc}") from exc
 
+    return _dedup_per_nome(components)
+
+def _spdx_json_pacchetti(packages: Iterable[Dict]) -> List[Dict[str, str]]:
+    components = []
+    for pkg in packages:
+        if not isinstance(pkg, dict):
+            continue
+        name = pkg.get("name")
+        version = pkg.get("versionInfo")
+        if name and version:
+            refs = {}
+            for ref in pkg.get("externalRefs") or []:
+                kind = _TIPO_RIFERIMENTO.get(str(ref.get("referenceType", "")).lower())
+                if kind:
+                    refs.setdefault(kind, ref.get("referenceLocator"))
+            canon = canonizza_nome_spdx(name, refs.get("purl"), refs.get("cpe"))
+            if canon in FIRMWARE_LIBRARIES:
+                components.append({"name": canon, "version": version})
+    return _dedup_per_nome(components)
+
+def _spdx_json_da_stream(stream: BinaryIO) -> List[Dict[str, str]]:
+    """
+    SPDX 2.x JSON reader: name / versionInfo of every package, with the same
+    canonicalization as the tag-value parser. The document is walked
+    incrementally, one package at a time, so memory does not grow with size.
+    """
     try:
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
-            for raw in f:
-                line = raw.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if line.startswith("PackageName:"):
-                    flush()
-                    current_name = line.split("PackageName:", 1)[1].strip()
-                    continue
-                if line.startswith("PackageVersion:"):
-                    current_version = line.split("PackageVersion:", 1)[1].strip()
-                    continue
-            flush()
-    except Exception:
+        packages = (pkg for key, pkg in itera_json(stream, arrays={"packages"}) if key == "packages")
+        return _spdx_json_pacchetti(packages)
+    except ValueError as exc:
+        raise SbomParseError(f"malformed SPDX JSON: {exc}") from exc
+
+def _tag_locale(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _cyclonedx_xml_da_stream(stream: BinaryIO) -> List[Dict[str, str]]:
+    """
+    CycloneDX XML reader: name / version of the top-level components
+    (bom/components/component), like the JSON reader. Parsed with iterparse;
+    every finished component and every finished child of the root
+    (metadata, dependencies, services, ...) is cleared and detached, so
+    memory stays constant whatever the document size.
+    """
+    out = []
+    stack = []
+    root = None
+    components_elem = None
+    try:
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            tag = _tag_locale(elem.tag)
+            if event == "start":
+                stack.append(tag)
+                if root is None:
+                    root = elem
+                elif stack == ["bom", "components"]:
+                    components_elem = elem
+                continue
+            if stack == ["bom", "components", "component"]:
+                fields = {}
+                for child in elem:
+                    child_tag = _tag_locale(child.tag)
+                    if child_tag in {"name", "version", "purl", "cpe"}:
+                        fields[child_tag] = (child.text or "").strip()
+                entry = _componente(
+                    fields.get("name"), fields.get("version"), fields.get("purl"), fields.get("cpe")
+                )
+                if entry:
+                    out.append(entry)
+                # Drop the finished component (and its subtree) from the tree.
+                components_elem.clear()
+            elif len(stack) == 2:
+                elem.clear()
+                root.remove(elem)
+            stack.pop()
+    except ET.ParseError as exc:
+        raise SbomParseError(f"malformed CycloneDX XML: {exc}") from exc
+    return out
+
+def _ha_suffisso(name: str, suffixes: Tuple[str, ...]) -> bool:
+    return name.lower().endswith(suffixes)
+
+def is_archivio(path: Path) -> bool:
+    return _ha_suffisso(path.name, ARCHIVE_SUFFIXES)
+
+# Bytes of a file inspected to recognize its format.
+SNIFF_BYTES = 4096
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_UTF8_BOM = b"\xef\xbb\xbf"
+_RADICE_XML = re.compile(rb"<(?![?!])(?:[\w.-]+:)?([\w.-]+)")
+_TAG_SPDX = re.compile(rb"^[ \t]*(?:SPDXVersion|DataLicense|SPDXID|DocumentName|PackageName)[ \t]*:", re.M)
+
+def _inizio(head: bytes) -> bytes:
+    if head.startswith(_UTF8_BOM):
+        head = head[len(_UTF8_BOM):]
+    return head.lstrip()
+
+def _json_con(head: bytes, marker: bytes) -> bool:
+    return _inizio(head).startswith(b"{") and marker in head
+
+def _sniff_cyclonedx_json(head: bytes) -> bool:
+    return _json_con(head, b'"bomFormat"')
+
+def _sniff_spdx_json(head: bytes) -> bool:
+    return _json_con(head, b'"spdxVersion"')
+
+def _sniff_cyclonedx_xml(head: bytes) -> bool:
+    head = _inizio(head)
+    if not head.startswith(b"<"):
+        return False
+    root = _RADICE_XML.search(head)
+    return root is not None and root.group(1) == b"bom"
+
+def _sniff_spdx_tag_value(head: bytes) -> bool:
+    return not _inizio(head).startswith((b"{", b"<")) and _TAG_SPDX.search(head) is not None
+
+def _spdx_tag_value_da_stream(stream: BinaryIO) -> List[Dict[str, str]]:
+    return _spdx_da_righe(io.TextIOWrapper(stream, encoding="utf-8", errors="ignore"))
+
+class SbomFormat:
+    """
+    A parser plugin of the reader registry (see riconosci_formato):
+
+      name     - identifier, e.g. "cyclonedx-json";
+      parse    - parse(binary stream) -> [{name, version[, purl, cpe]}],
+                 raising SbomParseError for malformed content;
+      sniff    - sniff(head) -> True when the first SNIFF_BYTES of a file
+                 are recognizably this format;
+      suffixes - file name suffixes used when no sniff recognizes the head.
+
+    `parse` and `sniff` must be module-level functions when the format is
+    used by core.pipeline, whose worker processes receive them pickled.
+    """
+
+    def __init__(self, name: str, parse, sniff, suffixes: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.parse = parse
+        self.sniff = sniff
+        self.suffixes = suffixes
+
+_BUILTIN = {
+    fmt.name: fmt
+    for fmt in (
+        SbomFormat("cyclonedx-json", _cyclonedx_da_stream, _sniff_cyclonedx_json, (".json",)),
+        SbomFormat("spdx-json", _spdx_json_da_stream, _sniff_spdx_json, (".spdx.json",)),
+        SbomFormat("cyclonedx-xml", _cyclonedx_xml_da_stream, _sniff_cyclonedx_xml, (".xml",)),
+        SbomFormat("spdx-tag-value", _spdx_tag_value_da_stream, _sniff_spdx_tag_value, (".spdx",)),
+    )
+}
+
+# Sniffed in order: plugins first, then the built-in formats.
+FORMATS: List[SbomFormat] = list(_BUILTIN.values())
+
+def registra_formato(fmt: SbomFormat) -> None:
+    """
+    Adds a parser plugin, sniffed before every format already registered
+    (a format with the same name is replaced).
+    """
+    FORMATS[:] = [fmt] + [f for f in FORMATS if f.name != fmt.name]
+
+def formati_aggiunti() -> List[SbomFormat]:
+    """The registered formats that are not built in, in sniffing order."""
+    return [f for f in FORMATS if _BUILTIN.get(f.name) is not f]
+
+def registra_formati(formats: Iterable[SbomFormat]) -> None:
+    """Registers `formats` so that they keep the given sniffing order."""
+    for fmt in reversed(list(formats)):
+        registra_formato(fmt)
+
+def riconosci_formato(head: bytes, name: str = "") -> Optional[SbomFormat]:
+    """
+    Picks the parser for a file from its first bytes: the first registered
+    format whose sniff recognizes them, else the format with the longest
+    suffix matching `name`. A JSON object carrying neither marker is read as
+    CycloneDX, whose decoder also accepts SPDX documents. None when nothing
+    fits.
+    """
+    for fmt in FORMATS:
+        if fmt.sniff(head):
+            return fmt
+    lower = name.lower()
+    matches = [(len(s), fmt) for fmt in FORMATS for s in fmt.suffixes if lower.endswith(s)]
+    if matches:
+        return max(matches, key=lambda m: m[0])[1]
+    if _inizio(head).startswith(b"{"):
+        return _BUILTIN["cyclonedx-json"]
+    return None
+
+class _ConTesta(io.RawIOBase):
+    """Replays the sniffed head, then continues with the rest of the stream."""
+
+    def __init__(self, head: bytes, stream: BinaryIO) -> None:
+        self._head = memoryview(head)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        return self._stream.readinto(b)
+
+    def readall(self) -> bytes:
+        head, self._head = bytes(self._head), memoryview(b"")
+        return head + self._stream.read()
+
+def _testa(stream: BinaryIO) -> Tuple[bytes, BinaryIO]:
+    """
+    Returns the first SNIFF_BYTES of the stream and a stream positioned
+    before them. In-memory and opened disk files just seek back (within their
+    buffer); other streams (archive members, gzip) are never read twice.
+    """
+    if isinstance(stream, io.BytesIO) or isinstance(getattr(stream, "raw", None), io.FileIO):
+        start = stream.tell()
+        head = stream.read(SNIFF_BYTES)
+        stream.seek(start)
+        return head, stream
+    head = stream.read(SNIFF_BYTES)
+    return head, io.BufferedReader(_ConTesta(head, stream), 1 << 16)
+
+def leggi_sbom(name: str, stream: BinaryIO) -> List[Dict[str, str]]:
+    """
+    Parses one SBOM from a binary stream with the format recognized from its
+    first SNIFF_BYTES (riconosci_formato); the file name only decides when the
+    content is not recognizable. Gzip-compressed SBOMs are decompressed on
+    the fly. The stream is read once.
+    Raises SbomParseError when the content is malformed or of no known format,
+    instead of returning an empty list like the other readers of this module.
+    """
+    try:
+        head, stream = _testa(stream)
+        if head.startswith(_GZIP_MAGIC):
+            inner_name = name[:-3] if name.lower().endswith(".gz") else name
+            with gzip.GzipFile(fileobj=stream) as inner:
+                return leggi_sbom(inner_name, inner)
+        fmt = riconosci_formato(head, name)
+        if fmt is None:
+            raise SbomParseError(f"{name}: not a recognized SBOM format")
+        return fmt.parse(stream)
+    except (OSError, EOFError) as exc:
+        # Truncated or corrupt gzip data, in the middle of any of the parsers.
+        raise SbomParseError(f"cannot read {name}: {exc}") from exc
+
+def _carica_da_stream(name: str, stream: BinaryIO) -> List[Dict[str, str]]:
+    """
+    Same as leggi_sbom, but malformed content yields no components.
+    """
+    try:
+        return leggi_sbom(name, stream)
+    except SbomParseError:
         return []
 
-    # Deduplicate by name
-    dedup = {}
-    for c in components:
-        if c["name"] not in dedup:
-            dedup[c["name"]] = c["version"]
-    return [{"name": k, "version": v} for k, v in dedup.items()]
+def _membri_archivio(archive: Path) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yields (member name, stream) for every regular file of a zip or tar archive,
+    in a single sequential pass. Each stream is only valid until the next
+    member is requested.
+    """
+    if archive.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive) as zf:
+            infos = sorted(
+                (i for i in zf.infolist() if not i.is_dir()), key=lambda i: i.header_offset
+            )
+            for info in infos:
+                with zf.open(info) as stream:
+                    yield info.filename, stream
+        return
+    # "r|*" is tarfile's streaming mode: no seeking, members in archive order.
+    with tarfile.open(archive, mode="r|*") as tf:
+        for member in tf:
+            if member.isfile():
+                stream = tf.extractfile(member)
+                if stream is not None:
+                    yield member.name, stream
+
+def _dividi_membro(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Splits a virtual path such as bundle.zip/sboms/a.json into (archive, member).
+    """
+    if path.exists():
+        return None
+    for parent in path.parents:
+        if is_archivio(parent) and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+def _carica_membro(archive: Path, member: str) -> List[Dict[str, str]]:
+    try:
+        for name, stream in _membri_archivio(archive):
+            if name == member:
+                return _carica_da_stream(name, stream)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+        pass
+    return []
 
 def carica_sbom_generico(path: Path) -> List[Dict[str, str]]:
     """
-    Supports CycloneDX JSON (*.json) and SPDX tag-value (*.spdx).
+    Supports CycloneDX JSON and XML, SPDX tag-value and SPDX JSON, optionally
+    gzip-compressed, recognized by content whatever the suffix (see
+    leggi_sbom), and archive members addressed by the archive/member paths
+    produced by itera_sbom.
     """
-    suffix = path.suffix.lower()
-    if suffix == ".json":
-        return _carica_cyclonedx_json(path)
-    if suffix == ".spdx":
-        return _carica_spdx_tag_value(path)
-    # auto-detect
-    data = _carica_cyclonedx_json(path)
-    return data if data else _carica_spdx_tag_value(path)
+    membro = _dividi_membro(path)
+    if membro:
+        return _carica_membro(*membro)
+    try:
+        with path.open("rb") as f:
+            return _carica_da_stream(path.name, f)
+    except (OSError, EOFError):
+        return []
+
+def itera_sbom(paths: Iterable[Path]) -> Iterator[Tuple[Path, List[Dict[str, str]]]]:
+    """
+    Yields (path, components) for plain and gzip-compressed SBOM files and for
+    every SBOM inside zip/tar archives. Archives are read once, sequentially,
+    and each member is parsed while it is decompressed, without extracting it
+    to disk; members are reported as archive/member virtual paths.
+    """
+    for path in paths:
+        if not is_archivio(path):
+            yield path, carica_sbom_generico(path)
+            continue
+        try:
+            for name, stream in _membri_archivio(path):
+                if _ha_suffisso(name, SBOM_SUFFIXES + GZIP_SUFFIXES):
+                    yield path / name, _carica_da_stream(name, stream)
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+            continue
+
+def _digest_file(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def elenca_file_sbom(folder: Path) -> List[Path]:
+    """
+    Lists the SBOM files of a folder (*.json, *.spdx, *.xml), followed by
+    gzip-compressed SBOMs and zip/tar archives (see itera_sbom).
+    """
+    files = [p for suffix in SBOM_SUFFIXES for p in sorted(folder.glob("*" + suffix))]
+    extra = [
+        p for p in sorted(folder.iterdir())
+        if p.is_file() and _ha_suffisso(p.name, GZIP_SUFFIXES + ARCHIVE_SUFFIXES)
+    ]
+    return files + extra
 
 def estrai_librerie(componenti: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Keeps the components that are monitored libraries, under their canonical
+    name: exact names first, then purl / CPE / alias lookups (ComponentMatcher).
+    """
+    matcher = get_matcher()
     out = []
     for c in componenti:
         name = c.get("name")
         version = c.get("version")
-        if name in FIRMWARE_LIBRARIES and version:
+        if name not in FIRMWARE_LIBRARIES:
+            name = matcher.match(name, c.get("purl"), c.get("cpe"))
+        if name and version:
             out.append({"name": name, "version": version})
     return out
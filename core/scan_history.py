@@ -0,0 +1,461 @@
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from core.db_manager import library_checksums
+from core.version_resolver import reset_catalog, risolvi_versioni
+from utils.paths import HISTORY_DB_PATH
+
+_conn = None
+
+STATUS_CODES = {"up-to-date": 0, "needs update": 1, "unknown": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Results live in their own database so Version.db stays a read-mostly catalog.
+# SBOM paths, library names and versions are interned into lookup tables so a
+# scan row is a handful of integers; ScanSummary holds the per-scan rollup that
+# trend queries read instead of the raw rows.
+#
+# CatalogState keeps the per-library catalog checksums each scan was resolved
+# against. A refresh (ScanRefresh) re-resolves only the libraries whose
+# checksum changed: it stores just the re-resolved rows and reads every other
+# row from its base scan, plus a complete ScanSummary.
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS "Scans" (
+        ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at  TEXT    NOT NULL,
+        sbom_count  INTEGER NOT NULL
+    )""",
+    'CREATE TABLE IF NOT EXISTS "Sboms" (ID INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS "Libraries" (ID INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS "Versions" (ID INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE)',
+    """CREATE TABLE IF NOT EXISTS "ScanResults" (
+        scan_id     INTEGER NOT NULL REFERENCES "Scans"(ID),
+        sbom_id     INTEGER NOT NULL REFERENCES "Sboms"(ID),
+        library_id  INTEGER NOT NULL REFERENCES "Libraries"(ID),
+        status      INTEGER NOT NULL,
+        current_id  INTEGER REFERENCES "Versions"(ID),
+        latest_id   INTEGER REFERENCES "Versions"(ID),
+        PRIMARY KEY (scan_id, sbom_id, library_id)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS "ScanSummary" (
+        scan_id     INTEGER NOT NULL REFERENCES "Scans"(ID),
+        library_id  INTEGER NOT NULL REFERENCES "Libraries"(ID),
+        status      INTEGER NOT NULL,
+        count       INTEGER NOT NULL,
+        PRIMARY KEY (library_id, scan_id, status)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS "CatalogState" (
+        scan_id     INTEGER NOT NULL REFERENCES "Scans"(ID),
+        library_id  INTEGER NOT NULL REFERENCES "Libraries"(ID),
+        checksum    TEXT    NOT NULL,
+        PRIMARY KEY (scan_id, library_id)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS "ScanRefresh" (
+        scan_id       INTEGER PRIMARY KEY REFERENCES "Scans"(ID),
+        base_scan_id  INTEGER NOT NULL REFERENCES "Scans"(ID)
+    )""",
+    'CREATE INDEX IF NOT EXISTS "ScanResults_sbom" ON "ScanResults"(sbom_id, scan_id)',
+    'CREATE INDEX IF NOT EXISTS "ScanResults_library" ON "ScanResults"(library_id, scan_id)',
+]
+for _table in ("Scans", "ScanResults", "ScanSummary", "CatalogState", "ScanRefresh"):
+    for _op in ("UPDATE", "DELETE"):
+        _SCHEMA.append(
+            f'CREATE TRIGGER IF NOT EXISTS "{_table}_no_{_op.lower()}" BEFORE {_op} ON "{_table}" '
+            "BEGIN SELECT RAISE(ABORT, 'scan history is append-only'); END"
+        )
+
+
+def _ensure_connection():
+    global _conn
+    if _conn is None:
+        try:
+            _conn = sqlite3.connect(str(HISTORY_DB_PATH))
+            with _conn:
+                for statement in _SCHEMA:
+                    _conn.execute(statement)
+        except Exception:
+            _conn = None
+
+
+def _intern(table: str, column: str, values) -> Dict[str, int]:
+    """Returns {value: ID} for the given values, inserting the missing ones."""
+
+    values = sorted({v for v in values if v is not None})
+    _conn.executemany(
+        f'INSERT OR IGNORE INTO "{table}"({column}) VALUES (?)', [(v,) for v in values]
+    )
+    ids = {}
+    for start in range(0, len(values), 500):
+        chunk = values[start : start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        ids.update(
+            (value, row_id)
+            for row_id, value in _conn.execute(
+                f'SELECT ID, {column} FROM "{table}" WHERE {column} IN ({placeholders})', chunk
+            )
+        )
+    return ids
+
+
+def record_scan(reports, started_at: Optional[str] = None) -> Optional[int]:
+    """
+    Appends one batch scan (the (sbom_file, data, count) tuples built by
+    main._build_reports) to the history database. Returns the scan ID.
+    """
+
+    _ensure_connection()
+    if _conn is None:
+        return None
+
+    started_at = started_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+    try:
+        with _conn:
+            scan_id = _conn.execute(
+                'INSERT INTO "Scans"(started_at, sbom_count) VALUES (?, ?)',
+                (started_at, len(reports)),
+            ).lastrowid
+
+            sbom_ids = _intern("Sboms", "path", (str(f) for f, _, _ in reports))
+            library_ids = _intern("Libraries", "name", (lib["name"] for _, d, _ in reports for lib in d))
+            version_ids = _intern(
+                "Versions",
+                "value",
+                (v for _, d, _ in reports for lib in d for v in (lib["current"], lib["latest"])),
+            )
+
+            rows = {}
+            summary: Dict[tuple, int] = {}
+            for sbom_file, data, _ in reports:
+                sbom_id = sbom_ids[str(sbom_file)]
+                for lib in data:
+                    library_id = library_ids[lib["name"]]
+                    status = STATUS_CODES.get(lib["status"], STATUS_CODES["unknown"])
+                    key = (scan_id, sbom_id, library_id)
+                    if key in rows:
+                        continue
+                    rows[key] = key + (
+                        status,
+                        version_ids.get(lib["current"]),
+                        version_ids.get(lib["latest"]),
+                    )
+                    summary[(library_id, status)] = summary.get((library_id, status), 0) + 1
+
+            _conn.executemany(
+                'INSERT INTO "ScanResults"(scan_id, sbom_id, library_id, status, current_id, latest_id) '
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows.values(),
+            )
+            _conn.executemany(
+                'INSERT INTO "ScanSummary"(scan_id, library_id, status, count) VALUES (?, ?, ?, ?)',
+                [(scan_id, lib_id, status, count) for (lib_id, status), count in summary.items()],
+            )
+            _record_catalog_state(scan_id, library_ids)
+        return scan_id
+    except sqlite3.Error:
+        return None
+
+
+def _record_catalog_state(scan_id: int, library_ids: Dict[str, int]) -> Dict[int, str]:
+    """Stores the catalog checksum of every library of the scan; returns {library ID: checksum}."""
+
+    checksums = {name.lower(): value for name, value in library_checksums().items()}
+    state = {
+        library_id: checksums[name.lower()]
+        for name, library_id in library_ids.items()
+        if name.lower() in checksums
+    }
+    _conn.executemany(
+        'INSERT INTO "CatalogState"(scan_id, library_id, checksum) VALUES (?, ?, ?)',
+        [(scan_id, library_id, checksum) for library_id, checksum in state.items()],
+    )
+    return state
+
+
+def refresh_latest(started_at: Optional[str] = None) -> Optional[Dict[str, object]]:
+    """
+    Re-evaluates the latest scan against the current release catalog without
+    reading any SBOM: only the libraries whose catalog checksum changed since
+    that scan are resolved again, from the versions stored for each SBOM.
+
+    When something changed, a refresh scan is appended holding the rows whose
+    status or latest version moved and a complete summary. Returns
+    {scan_id, base_scan_id, changed, rows, transitions}, where transitions
+    maps library -> {(old status, new status): SBOM count}; None when no scan
+    has been recorded.
+    """
+
+    _ensure_connection()
+    if _conn is None:
+        return None
+
+    try:
+        row = _conn.execute('SELECT ID, sbom_count FROM "Scans" ORDER BY ID DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+        latest, sbom_count = row
+        row = _conn.execute('SELECT base_scan_id FROM "ScanRefresh" WHERE scan_id = ?', (latest,)).fetchone()
+        root = row[0] if row else latest
+
+        libraries = dict(
+            _conn.execute(
+                'SELECT DISTINCT s.library_id, l.name FROM "ScanSummary" s '
+                'JOIN "Libraries" l ON l.ID = s.library_id WHERE s.scan_id = ?',
+                (latest,),
+            ).fetchall()
+        )
+        recorded = dict(
+            _conn.execute(
+                'SELECT library_id, checksum FROM "CatalogState" WHERE scan_id = ?', (latest,)
+            ).fetchall()
+        )
+        current = {name.lower(): value for name, value in library_checksums().items()}
+        # Scans recorded before checksums were kept have no state: every
+        # library is re-resolved, which still needs no SBOM parsing.
+        changed = sorted(
+            library_id
+            for library_id, name in libraries.items()
+            if current.get(name.lower()) != recorded.get(library_id)
+        )
+        result = {"scan_id": latest, "base_scan_id": root, "changed": [], "rows": 0, "transitions": {}}
+        if not changed:
+            return result
+
+        # Effective rows: those of the base scan, overridden by later refreshes.
+        placeholders = ", ".join("?" * len(changed))
+        effective: Dict[tuple, tuple] = {}
+        for sbom_id, library_id, status, current_id, latest_id, scan_id in _conn.execute(
+            'SELECT sbom_id, library_id, status, current_id, latest_id, scan_id FROM "ScanResults" '
+            f"WHERE library_id IN ({placeholders}) AND scan_id <= ? AND (scan_id = ? OR scan_id IN "
+            '(SELECT scan_id FROM "ScanRefresh" WHERE base_scan_id = ?)) ORDER BY scan_id',
+            changed + [latest, root, root],
+        ):
+            effective[(sbom_id, library_id)] = (status, current_id, latest_id)
+
+        version_ids = sorted({row[1] for row in effective.values() if row[1] is not None})
+        values: Dict[int, str] = {}
+        for start in range(0, len(version_ids), 500):
+            chunk = version_ids[start : start + 500]
+            values.update(
+                _conn.execute(
+                    f'SELECT ID, value FROM "Versions" WHERE ID IN ({", ".join("?" * len(chunk))})', chunk
+                ).fetchall()
+            )
+
+        # Each distinct (library, version) pair is resolved once.
+        pairs = sorted(
+            {(libraries[lib_id], values.get(row[1], "")) for (_, lib_id), row in effective.items()}
+        )
+        reset_catalog()
+        resolved = {
+            pair: (STATUS_CODES.get(r["status"], STATUS_CODES["unknown"]), r["latest"])
+            for pair, r in zip(pairs, risolvi_versioni([{"name": n, "version": v} for n, v in pairs]))
+        }
+
+        with _conn:
+            scan_id = _conn.execute(
+                'INSERT INTO "Scans"(started_at, sbom_count) VALUES (?, ?)',
+                (started_at or datetime.now(timezone.utc).isoformat(timespec="seconds"), sbom_count),
+            ).lastrowid
+            _conn.execute('INSERT INTO "ScanRefresh"(scan_id, base_scan_id) VALUES (?, ?)', (scan_id, root))
+            latest_ids = _intern("Versions", "value", (latest_value for _, latest_value in resolved.values()))
+
+            rows = []
+            summary: Dict[tuple, int] = {}
+            transitions: Dict[str, Dict[tuple, int]] = {}
+            for (sbom_id, library_id), (status, current_id, latest_id) in effective.items():
+                new_status, latest_value = resolved[(libraries[library_id], values.get(current_id, ""))]
+                new_latest_id = latest_ids.get(latest_value)
+                summary[(library_id, new_status)] = summary.get((library_id, new_status), 0) + 1
+                if (new_status, new_latest_id) != (status, latest_id):
+                    rows.append((scan_id, sbom_id, library_id, new_status, current_id, new_latest_id))
+                if new_status != status:
+                    moves = transitions.setdefault(libraries[library_id], {})
+                    key = (STATUS_NAMES[status], STATUS_NAMES[new_status])
+                    moves[key] = moves.get(key, 0) + 1
+
+            _conn.executemany(
+                'INSERT INTO "ScanResults"(scan_id, sbom_id, library_id, status, current_id, latest_id) '
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            _conn.execute(
+                'INSERT INTO "ScanSummary"(scan_id, library_id, status, count) '
+                'SELECT ?, library_id, status, count FROM "ScanSummary" '
+                f"WHERE scan_id = ? AND library_id NOT IN ({placeholders})",
+                [scan_id, latest] + changed,
+            )
+            _conn.executemany(
+                'INSERT INTO "ScanSummary"(scan_id, library_id, status, count) VALUES (?, ?, ?, ?)',
+                [(scan_id, lib_id, status, count) for (lib_id, status), count in summary.items()],
+            )
+            _record_catalog_state(scan_id, {name: lib_id for lib_id, name in libraries.items()})
+    except sqlite3.Error:
+        return None
+
+    result.update(
+        scan_id=scan_id,
+        changed=[libraries[lib_id] for lib_id in changed],
+        rows=len(effective),
+        transitions=transitions,
+    )
+    return result
+
+
+def _righe_effettive(scan_id: Optional[int], columns: str):
+    """
+    (scan_id, started_at, sbom_count, rows) of one scan (default: the
+    latest), selecting `columns` from its effective ScanResults rows: a
+    refresh scan yields its base rows overridden by the refreshes up to it.
+    None when there is no such scan. Raises sqlite3.Error.
+    """
+
+    if scan_id is None:
+        row = _conn.execute('SELECT ID, started_at, sbom_count FROM "Scans" ORDER BY ID DESC LIMIT 1').fetchone()
+    else:
+        row = _conn.execute('SELECT ID, started_at, sbom_count FROM "Scans" WHERE ID = ?', (scan_id,)).fetchone()
+    if row is None:
+        return None
+    scan_id, started_at, sbom_count = row
+    row = _conn.execute('SELECT base_scan_id FROM "ScanRefresh" WHERE scan_id = ?', (scan_id,)).fetchone()
+    if row is None:
+        rows = _conn.execute(f'SELECT {columns} FROM "ScanResults" WHERE scan_id = ?', (scan_id,)).fetchall()
+    else:
+        # SQLite takes the bare columns of an aggregate query from the row
+        # holding MAX(): the most recent value of every (SBOM, library).
+        rows = _conn.execute(
+            f'SELECT {columns}, MAX(scan_id) FROM "ScanResults" '
+            "WHERE scan_id = ? OR scan_id IN "
+            '(SELECT scan_id FROM "ScanRefresh" WHERE base_scan_id = ? AND scan_id <= ?) '
+            "GROUP BY sbom_id, library_id",
+            (row[0], row[0], scan_id),
+        ).fetchall()
+    return scan_id, started_at, sbom_count, rows
+
+
+def scan_results_packed(scan_id: Optional[int] = None) -> Optional[Dict[str, object]]:
+    """
+    Effective rows of one scan (default: the latest) for bulk analysis, one
+    integer per (SBOM, library) row: library_id << 32 | current_id << 2 | status.
+    A refresh scan yields its base rows overridden by the refreshes up to it.
+
+    Returns {scan_id, started_at, sbom_count, keys, libraries {ID: name},
+    versions {ID: value}}, or None when there is no such scan.
+    """
+
+    _ensure_connection()
+    if _conn is None:
+        return None
+    try:
+        scan = _righe_effettive(scan_id, "(library_id << 32) | (IFNULL(current_id, 0) << 2) | status")
+        if scan is None:
+            return None
+        libraries = dict(_conn.execute('SELECT ID, name FROM "Libraries"').fetchall())
+        versions = dict(_conn.execute('SELECT ID, value FROM "Versions"').fetchall())
+    except sqlite3.Error:
+        return None
+    scan_id, started_at, sbom_count, rows = scan
+    return {
+        "scan_id": scan_id,
+        "started_at": started_at,
+        "sbom_count": sbom_count,
+        "keys": [r[0] for r in rows],
+        "libraries": libraries,
+        "versions": versions,
+    }
+
+
+def scan_versions(scan_id: Optional[int] = None) -> Optional[Dict[str, object]]:
+    """
+    Library versions shipped by each SBOM of one scan (default: the latest),
+    e.g. to answer fleet queries without reading the SBOMs again.
+
+    Returns {scan_id, started_at, sbom_count, rows: [(SBOM path, library,
+    current version)]}, or None when there is no such scan.
+    """
+
+    _ensure_connection()
+    if _conn is None:
+        return None
+    try:
+        scan = _righe_effettive(scan_id, "sbom_id, library_id, current_id")
+        if scan is None:
+            return None
+        sboms = dict(_conn.execute('SELECT ID, path FROM "Sboms"').fetchall())
+        libraries = dict(_conn.execute('SELECT ID, name FROM "Libraries"').fetchall())
+        versions = dict(_conn.execute('SELECT ID, value FROM "Versions"').fetchall())
+    except sqlite3.Error:
+        return None
+    scan_id, started_at, sbom_count, rows = scan
+    return {
+        "scan_id": scan_id,
+        "started_at": started_at,
+        "sbom_count": sbom_count,
+        "rows": [
+            (sboms[r[0]], libraries[r[1]], versions.get(r[2], "")) for r in sorted(rows, key=lambda r: (r[0], r[1]))
+        ],
+    }
+
+
+def list_scans(limit: int = 90) -> List[Dict[str, object]]:
+    """Returns the most recent scans, newest first."""
+
+    _ensure_connection()
+    if _conn is None:
+        return []
+    try:
+        rows = _conn.execute(
+            'SELECT s.ID, s.started_at, s.sbom_count, r.base_scan_id FROM "Scans" s '
+            'LEFT JOIN "ScanRefresh" r ON r.scan_id = s.ID ORDER BY s.ID DESC LIMIT ?',
+            (int(limit),),
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [{"scan_id": i, "started_at": t, "sbom_count": n, "refresh_of": b} for i, t, n, b in rows]
+
+
+def status_trend(
+    status: str = "needs update", library: Optional[str] = None, last: int = 90
+) -> List[Dict[str, object]]:
+    """
+    Per-library count of SBOMs with the given status over the last N scans,
+    oldest scan first. Scans where a library had no such SBOM report 0.
+    """
+
+    scans = list(reversed(list_scans(last)))
+    if not scans:
+        return []
+
+    first_scan = scans[0]["scan_id"]
+    sql = (
+        'SELECT s.scan_id, l.name, s.count FROM "ScanSummary" s '
+        'JOIN "Libraries" l ON l.ID = s.library_id '
+        "WHERE s.status = ? AND s.scan_id >= ?"
+    )
+    params = [STATUS_CODES[status], first_scan]
+    if library:
+        sql += " AND LOWER(l.name) = LOWER(?)"
+        params.append(library)
+
+    try:
+        rows = _conn.execute(sql, params).fetchall()
+        if library:
+            names = [r[0] for r in _conn.execute(
+                'SELECT name FROM "Libraries" WHERE LOWER(name) = LOWER(?)', (library,)
+            )]
+        else:
+            names = [r[0] for r in _conn.execute('SELECT name FROM "Libraries" ORDER BY name')]
+    except sqlite3.Error:
+        return []
+
+    counts = {(scan_id, name): count for scan_id, name, count in rows}
+    return [
+        {
+            "scan_id": scan["scan_id"],
+            "started_at": scan["started_at"],
+            "library": name,
+            "count": counts.get((scan["scan_id"], name), 0),
+        }
+        for scan in scans
+        for name in names
+    ]
@@ -0,0 +1,158 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from core.db_manager import catalog_fingerprint
+
+PARTIAL_FORMAT = "sbom-checker-partial"
+FLEET_FORMAT = "sbom-checker-fleet"
+PARTIAL_VERSION = 1
+
+# Only the resolved columns are kept: release-note bodies can be looked up
+# again from the catalog and would dominate the size of the partial files.
+_FIELDS = ("name", "current", "current_date", "latest", "latest_date", "security_label", "status")
+_ERROR_FIELDS = ("stage", "kind", "detail")
+
+
+def chiave_shard(path: Path, base: Path) -> str:
+    """Node-independent key of an input file: its POSIX path relative to the input folder."""
+
+    try:
+        return path.relative_to(base).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def shard_of(key: str, shards: int) -> int:
+    # hash() is salted per process, so use a stable digest instead.
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def seleziona_shard(files: List[Path], base: Path, index: int, shards: int) -> List[Path]:
+    """Returns the files that belong to shard `index` of `shards`."""
+
+    if not 0 <= index < shards:
+        raise ValueError(f"shard index {index} out of range for {shards} shards")
+    return [f for f in files if shard_of(chiave_shard(f, base), shards) == index]
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parses a 'K/N' shard spec (0-based K)."""
+
+    try:
+        index, shards = (int(part) for part in spec.split("/", 1))
+    except ValueError:
+        raise ValueError(f"invalid shard '{spec}', expected K/N (e.g. 0/4)")
+    if shards < 1 or not 0 <= index < shards:
+        raise ValueError(f"invalid shard '{spec}', expected 0 <= K < N")
+    return index, shards
+
+
+def scrivi_parziale(out: Path, reports, base: Path, index: int, shards: int, errors=()) -> None:
+    """
+    Writes the reports of one shard as a self-describing JSON partial, with
+    the SBOMs the scan could not analyze (core.pipeline errors).
+    """
+
+    payload = {
+        "format": PARTIAL_FORMAT,
+        "version": PARTIAL_VERSION,
+        "shard": index,
+        "shards": shards,
+        "input": str(base.resolve()),
+        "catalog": catalog_fingerprint(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sboms": [
+            {
+                "path": chiave_shard(sbom_file, base),
+                "libraries": [{k: lib.get(k, "") for k in _FIELDS} for lib in data],
+            }
+            for sbom_file, data, _ in reports
+        ],
+        "errors": [
+            {"path": chiave_shard(error["sbom"], base), **{k: error[k] for k in _ERROR_FIELDS}}
+            for error in errors
+        ],
+    }
+    tmp = out.with_name(out.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    # Atomic rename: a merge never sees a half-written partial.
+    tmp.replace(out)
+
+
+def unisci_parziali(paths: List[Path]) -> Tuple[list, Dict[str, object]]:
+    """
+    Merges shard partials into one list of (sbom path, data, count) reports.
+    Raises ValueError when the partials do not belong to the same sharded run.
+    """
+
+    seen: Dict[int, Path] = {}
+    shards = None
+    catalog = None
+    reports = []
+    errors = []
+    for path in paths:
+        with path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != PARTIAL_FORMAT or payload.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"{path} is not a scan partial")
+        if shards is None:
+            shards, catalog = payload["shards"], payload["catalog"]
+        elif payload["shards"] != shards:
+            raise ValueError(f"{path} was written for {payload['shards']} shards, expected {shards}")
+        elif payload["catalog"] != catalog:
+            raise ValueError(f"{path} was resolved against a different release catalog")
+        if payload["shard"] in seen:
+            raise ValueError(f"shard {payload['shard']} appears in both {seen[payload['shard']]} and {path}")
+        seen[payload["shard"]] = path
+
+        for sbom in payload["sboms"]:
+            data = sbom["libraries"]
+            count = sum(1 for lib in data if lib["status"] == "needs update")
+            reports.append((Path(sbom["path"]), data, count))
+        # Partials written before errors were recorded have none.
+        for error in payload.get("errors", []):
+            errors.append({"sbom": Path(error["path"]), **{k: error[k] for k in _ERROR_FIELDS}})
+
+    reports.sort(key=lambda r: r[0].as_posix())
+    info = {
+        "shards": shards,
+        "catalog": catalog,
+        "missing": sorted(set(range(shards or 0)) - set(seen)),
+        "errors": sorted(errors, key=lambda e: e["sbom"].as_posix()),
+    }
+    return reports, info
+
+
+def scrivi_flotta(out: Path, reports, info: Dict[str, object]) -> None:
+    """Writes merged reports plus a library -> version -> [SBOM paths] index."""
+
+    index: Dict[str, Dict[str, List[str]]] = {}
+    for sbom_file, data, _ in reports:
+        for lib in data:
+            index.setdefault(lib["name"], {}).setdefault(lib["current"], []).append(sbom_file.as_posix())
+
+    payload = {
+        "format": FLEET_FORMAT,
+        "version": PARTIAL_VERSION,
+        "shards": info["shards"],
+        "missing_shards": info["missing"],
+        "catalog": info["catalog"],
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sboms": [
+            {"path": sbom_file.as_posix(), "libraries": data} for sbom_file, data, _ in reports
+        ],
+        "errors": [
+            {"path": error["sbom"].as_posix(), **{k: error[k] for k in _ERROR_FIELDS}}
+            for error in info.get("errors", [])
+        ],
+        "index": index,
+    }
+    tmp = out.with_name(out.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    tmp.replace(out)
@@ -1,23 +1,55 @@
-from typing import Dict, List, Optional
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from core.db_manager import get_releases_for_library
+from core.catalog_snapshot import leggi_snapshot, scrivi_snapshot
+from core.db_manager import get_library_names, get_release_metadata, get_release_texts
+from utils.paths import DB_PATH, SNAPSHOT_PATH
+
+_catalog: Dict[str, "LibraryCatalog"] = {}
+_texts: Dict[int, Dict[str, str]] = {}
+_snapshot = None
+_snapshot_loaded = False
+_VERSION_TOKEN = re.compile(r"\d+|[^\W\d_]+")
+# Single letters are left out: in "R0.14b" a letter is a later patch.
+_PRE_RELEASE = {
+    tag: (-1, rank, "")
+    for rank, tags in enumerate((("dev",), ("alpha",), ("beta",), ("pre", "preview"), ("rc",)))
+    for tag in tags
+}
+_KEY_END = (0, -1, "")
 
 
 def _normalizza(v: Optional[str]) -> str:
     return v.lstrip("vV") if isinstance(v, str) else ""
 
 
-def _sort_releases(releases: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    def _version_key(version: Optional[str]):
-        cleaned = _normalizza(version)
-        key_parts = []
-        for part in cleaned.replace("-", ".").split("."):
-            try:
-                key_parts.append(int(part))
-            except ValueError:
-                key_parts.append(part)
-        return tuple(key_parts)
+def _version_key(version: Optional[str]):
+    # Digit and letter runs are split apart ("R0.14b" -> R, 0, 14, b) so that
+    # patch letters and vendor suffixes sort after their base release.
+    # Tagged parts keep numeric and textual components comparable.
+    # Pre-release tags ("1.11.5-rc1", "2.0.0-beta") sort before the final
+    # release: every key ends with a marker that is above them and below
+    # any further part.
+    parts = tuple(
+        (0, int(part), "") if part.isdecimal() else _PRE_RELEASE.get(part.lower(), (1, 0, part.lower()))
+        for part in _VERSION_TOKEN.findall(_normalizza(version))
+    )
+    return parts + (_KEY_END,) if parts else parts
+
+
+def chiave_versione(version: Optional[str]):
+    """
+    Sort key of a version string: release order for well-formed versions,
+    pre-release tags before their final release, vendor suffixes after it
+    ("2.2.1-rc1" < "2.2.1" < "2.2.1-st1"). Keys of any two versions compare.
+    """
 
+    return _version_key(version)
+
+
+def _sort_releases(releases: List[Dict[str, str]]) -> List[Dict[str, str]]:
     def _key(release: Dict[str, str]):
         date = release.get("release_date") or ""
         version_key = _version_key(release.get("version"))
@@ -34,70 +66,354 @@ def _is_security_update(flag: Optional[str]) -> bool:
     return value not in {"0", "false", ""}
 
 
-def _find_release(releases: List[Dict[str, str]], version: str) -> Optional[Dict[str, str]]:
-    norm = _normalizza(version)
-    for rel in releases:
-        if _normalizza(rel.get("version")) == norm:
-            return rel
-    return None
+class IntervalIndex:
+    """
+    Stabbing index over half-open [start, end) intervals that may overlap.
+    The intervals are flattened once into sorted, disjoint segments carrying
+    the labels of every interval that covers them, so a lookup is a single
+    binary search.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, str]]) -> None:
+        events = []
+        for start, end, label in intervals:
+            if start < end:
+                events.append((start, 1, label))
+                events.append((end, -1, label))
+        events.sort(key=lambda e: e[0])
+
+        self._bounds: List[int] = []
+        self._labels: List[Tuple[str, ...]] = []
+        active: Dict[str, int] = {}
+        i = 0
+        while i < len(events):
+            point = events[i][0]
+            while i < len(events) and events[i][0] == point:
+                _, delta, label = events[i]
+                count = active.get(label, 0) + delta
+                if count:
+                    active[label] = count
+                else:
+                    active.pop(label, None)
+                i += 1
+            self._bounds.append(point)
+            self._labels.append(tuple(active))
 
+    def to_state(self) -> tuple:
+        return tuple(self._bounds), tuple(self._labels)
 
-def risolvi_versioni(libs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    @classmethod
+    def from_state(cls, state: tuple) -> "IntervalIndex":
+        index = cls.__new__(cls)
+        index._bounds, index._labels = list(state[0]), list(state[1])
+        return index
+
+    def labels_at(self, point: int) -> Tuple[str, ...]:
+        i = bisect_right(self._bounds, point) - 1
+        return self._labels[i] if i >= 0 else ()
+
+
+class LibraryCatalog:
     """
-    For each input library [{name, version}] calculates:
-      - latest available version and date
-      - release date of the current version
-      - whether security updates exist in subsequent releases
+    One library's releases compiled for classification.
+
+    Versions are placed on the release-order axis: a catalogued version at
+    its own position, any other version at the position of the closest lower
+    catalogued version (binary search over the version keys), so a vendor
+    patch build such as "10.4.3-st1" is judged like 10.4.3. Affected ranges
+    are intervals on that axis:
+      - every position before the last security release;
+      - [first, last + 1) for each run of consecutive releases listing an
+        advisory in the "cve" column, when a later release exists.
+
+    Releases are kept as compact metadata: {id, version, release_date,
+    security, cve_ids, has_cve}. Note and CVE bodies stay in the database
+    until a report displays them (see testi_release).
     """
 
-    result = []
-    for lib in libs:
-        name = lib["name"]
-        current_version = _normalizza(lib.get("version"))
-        releases = _sort_releases(get_releases_for_library(name))
+    def __init__(self, name: str, releases: List[Dict[str, str]]) -> None:
+        from core.cve_index import normalizza_cve  # cve_index imports this module
+
+        self.name = name
+        self.releases = _sort_releases(
+            [
+                {
+                    "id": rel.get("id"),
+                    "version": rel.get("version"),
+                    "release_date": rel.get("release_date"),
+                    "security": rel.get("security"),
+                    "cve_ids": tuple(normalizza_cve(rel.get("cve"))),
+                    "has_cve": bool((rel.get("cve") or "").strip()),
+                }
+                for rel in releases
+            ]
+        )
+
+        self._positions: Dict[str, int] = {}
+        for pos, rel in enumerate(self.releases):
+            self._positions.setdefault(_normalizza(rel.get("version")), pos)
+        self._by_version = sorted(
+            range(len(self.releases)), key=lambda pos: _version_key(self.releases[pos].get("version"))
+        )
+        self._keys = [_version_key(self.releases[pos].get("version")) for pos in self._by_version]
+
+        self._security = [
+            pos for pos, rel in enumerate(self.releases) if _is_security_update(rel.get("security"))
+        ]
+        self._cve = [pos for pos, rel in enumerate(self.releases) if rel["has_cve"]]
+
+        # Contiguous runs of affected positions per advisory: a release
+        # between two affected ones that does not list it is not affected.
+        runs: Dict[str, List[List[int]]] = {}
+        for pos in self._cve:
+            for cve_id in self.releases[pos]["cve_ids"]:
+                spans = runs.setdefault(cve_id, [])
+                if spans and spans[-1][1] == pos - 1:
+                    spans[-1][1] = pos
+                else:
+                    spans.append([pos, pos])
+
+        intervals = []
+        if self._security:
+            intervals.append((-1, self._security[-1], "security"))
+        for cve_id, spans in runs.items():
+            for first, last in spans:
+                if last + 1 < len(self.releases):
+                    intervals.append((first, last + 1, cve_id))
+        self.affected = IntervalIndex(intervals)
+
+    def to_state(self) -> tuple:
+        """Plain-data form of the compiled catalog, as stored in the snapshot."""
+
+        return (
+            self.name,
+            tuple(self.releases),
+            self._positions,
+            tuple(self._by_version),
+            tuple(self._keys),
+            tuple(self._security),
+            tuple(self._cve),
+            self.affected.to_state(),
+        )
 
-        latest_release = releases[-1] if releases else None
-        current_release = _find_release(releases, current_version)
+    @classmethod
+    def from_state(cls, state: tuple) -> "LibraryCatalog":
+        catalog = cls.__new__(cls)
+        name, releases, positions, by_version, keys, security, cve, affected = state
+        catalog.name = name
+        catalog.releases = list(releases)
+        catalog._positions = positions
+        catalog._by_version = list(by_version)
+        catalog._keys = list(keys)
+        catalog._security = list(security)
+        catalog._cve = list(cve)
+        catalog.affected = IntervalIndex.from_state(affected)
+        return catalog
 
-        latest_version = _normalizza(latest_release.get("version")) if latest_release else "not available"
-        latest_date = (latest_release.get("release_date") or "n/a") if latest_release else "n/a"
-        current_date = (current_release.get("release_date") or "n/a") if current_release else "n/a"
+    def locate(self, version: str) -> Tuple[Optional[int], bool]:
+        """
+        Returns (position, exact) of a version on the release-order axis;
+        position -1 is before the first release, None means unclassifiable.
+        """
 
-        if releases and current_release:
-            idx = releases.index(current_release)
-            intermediate = releases[idx + 1 :]
-            trailing_releases = releases[idx:]
+        pos = self._positions.get(version)
+        if pos is not None:
+            return pos, True
+        key = _version_key(version)
+        if not key or not self._keys:
+            return None, False
+        i = bisect_right(self._keys, key) - 1
+        # Only versions following the catalogue's numbering scheme (same kind
+        # of leading token) are placed; anything else stays unknown.
+        neighbour = self._keys[max(i, 0)]
+        if key[0][:1] + key[0][2:] != neighbour[0][:1] + neighbour[0][2:]:
+            return None, False
+        return (self._by_version[i] if i >= 0 else -1), False
+
+    def security_after(self, pos: int) -> List[Dict[str, str]]:
+        return [self.releases[p] for p in self._security[bisect_right(self._security, pos) :]]
+
+    def cve_from(self, pos: int) -> List[Dict[str, str]]:
+        return [self.releases[p] for p in self._cve[bisect_left(self._cve, pos) :]]
+
+
+def _snapshot_states() -> Optional[Dict[str, tuple]]:
+    global _snapshot, _snapshot_loaded
+    if not _snapshot_loaded:
+        _snapshot = leggi_snapshot(SNAPSHOT_PATH, DB_PATH)
+        _snapshot_loaded = True
+    return _snapshot
+
+
+def get_library_catalog(name: str) -> LibraryCatalog:
+    """
+    Compiled catalog of one library, built once per process. It comes from
+    the precompiled snapshot when that matches Version.db, from SQLite otherwise.
+    """
+
+    catalog = _catalog.get(name)
+    if catalog is None:
+        states = _snapshot_states()
+        if states is None:
+            catalog = LibraryCatalog(name, get_release_metadata(name))
+        elif name.lower() in states:
+            catalog = LibraryCatalog.from_state(states[name.lower()])
         else:
-            intermediate = []
-            trailing_releases = releases
+            # A current snapshot holds every library of the database.
+            catalog = LibraryCatalog(name, [])
+        _catalog[name] = catalog
+    return catalog
+
 
-        security_releases = [r for r in intermediate if _is_security_update(r.get("security"))]
-        has_security_updates = bool(security_releases)
+def get_catalog_names() -> List[str]:
+    states = _snapshot_states()
+    if states is None:
+        return get_library_names()
+    return [state[0] for state in states.values()]
 
-        cve_releases = [r for r in trailing_releases if (r.get("cve") or "").strip()]
 
-        if not releases or current_release is None:
-            status = "unknown"
-            security_label = "n/a"
-        elif has_security_updates:
+def reset_catalog() -> None:
+    """Drops the compiled catalogs, e.g. after Version.db has been updated."""
+
+    global _snapshot, _snapshot_loaded
+    _catalog.clear()
+    _texts.clear()
+    _snapshot, _snapshot_loaded = None, False
+
+
+def compila_snapshot(out: Path = SNAPSHOT_PATH) -> int:
+    """
+    Build step: compiles every library of Version.db and writes the snapshot
+    loaded at startup (see core.catalog_snapshot). Returns the library count.
+    """
+
+    libraries = {}
+    for name in get_library_names():
+        libraries[name.lower()] = LibraryCatalog(name, get_release_metadata(name)).to_state()
+    scrivi_snapshot(out, DB_PATH, libraries)
+    reset_catalog()
+    return len(libraries)
+
+
+def testi_release(releases: Iterable[Dict[str, object]]) -> Dict[int, Dict[str, str]]:
+    """
+    Note and CVE bodies of catalog releases (e.g. a row's security_notes),
+    {release id: {release_notes, cve}}. Everything not cached yet is fetched
+    with one query; bodies stay cached until reset_catalog().
+    """
+
+    ids = {rel["id"] for rel in releases if rel.get("id") is not None}
+    missing = [i for i in ids if i not in _texts]
+    if missing:
+        _texts.update(get_release_texts(missing))
+    return {i: _texts[i] for i in ids if i in _texts}
+
+
+def _risolvi(name: str, current_version: str) -> Dict[str, object]:
+    """Resolves one library at one (normalized) version; see risolvi_versioni."""
+
+    catalog = get_library_catalog(name)
+    releases = catalog.releases
+
+    latest_release = releases[-1] if releases else None
+    latest_version = _normalizza(latest_release.get("version")) if latest_release else "not available"
+    latest_date = (latest_release.get("release_date") or "n/a") if latest_release else "n/a"
+
+    pos, exact = catalog.locate(current_version)
+    current_release = releases[pos] if exact else None
+    current_date = (current_release.get("release_date") or "n/a") if current_release else "n/a"
+    matched = _normalizza(releases[pos].get("version")) if pos is not None and pos >= 0 else ""
+
+    if pos is None:
+        status = "unknown"
+        security_label = "n/a"
+        security_releases = []
+        cve_releases = catalog.cve_from(0)
+    else:
+        security_releases = catalog.security_after(pos)
+        cve_releases = catalog.cve_from(pos)
+        if catalog.affected.labels_at(pos):
             status = "needs update"
             security_label = "not secure"
         else:
             status = "up-to-date"
             security_label = "secure"
 
-        result.append(
-            {
-                "name": name,
-                "current": current_version,
-                "current_date": current_date,
-                "latest": latest_version,
-                "latest_date": latest_date,
-                "security_label": security_label,
-                "status": status,
-                "security_notes": security_releases,
-                "cve_notes": cve_releases,
-            }
-        )
+    return {
+        "name": name,
+        "current": current_version,
+        "current_date": current_date,
+        "latest": latest_version,
+        "latest_date": latest_date,
+        "security_label": security_label,
+        "status": status,
+        "matched": matched,
+        "security_notes": security_releases,
+        "cve_notes": cve_releases,
+    }
+
+
+def risolvi_versioni(libs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    For each input library [{name, version}] calculates:
+      - latest available version and date
+      - release date of the current version
+      - whether security updates exist in subsequent releases
+    Versions missing from the catalog are classified from the closest lower
+    catalogued release ("matched" holds that version). The security_notes
+    and cve_notes releases are metadata only; renderers get their bodies
+    with testi_release.
+
+    For many SBOMs use risolvi_batch (or a BatchResolver), which resolves
+    every distinct library version once.
+    """
+
+    return [_risolvi(lib["name"], _normalizza(lib.get("version"))) for lib in libs]
+
+
+class BatchResolver:
+    """
+    Resolves the library lists of many SBOMs, each distinct (library,
+    normalized version) pair exactly once: the cost grows with the distinct
+    library versions of a fleet, not with its component count.
+
+    Rows are shared: every SBOM listing the same library version gets the
+    same dict, so callers must treat them as read-only. They are cached for
+    the life of the resolver; use one per scan, or a new one after
+    reset_catalog().
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[Tuple[str, str], Dict[str, object]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def row(self, name: str, version: Optional[str]) -> Dict[str, object]:
+        key = (name, _normalizza(version))
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = _risolvi(*key)
+        return row
+
+    def resolve(self, libs: Iterable[Dict[str, str]]) -> List[Dict[str, object]]:
+        """Same rows as risolvi_versioni(libs), shared with every other SBOM of the batch."""
+
+        return [self.row(lib["name"], lib.get("version")) for lib in libs]
+
+
+def risolvi_batch(
+    batch: Iterable[List[Dict[str, str]]], resolver: Optional[BatchResolver] = None
+) -> List[List[Dict[str, object]]]:
+    """
+    risolvi_versioni for many SBOMs in one pass: [libs, ...] -> [rows, ...].
+    The batch is first grouped by (library, normalized version), each pair is
+    resolved once, one library after the other, and every SBOM gets the
+    shared rows (see BatchResolver).
+    """
 
-    return result
+    resolver = resolver if resolver is not None else BatchResolver()
+    batch = [list(libs) for libs in batch]
+    for name, version in sorted({(lib["name"], _normalizza(lib.get("version"))) for libs in batch for lib in libs}):
+        resolver.row(name, version)
+    return [resolver.resolve(libs) for libs in batch]
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+from typing import Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Default per-file budgets of a scan (see ParseLimits).
+MAX_SECONDS = 60.0
+MAX_BYTES = 256 << 20
+MAX_MEMORY = 2 << 30
+
+# Workers are started fresh rather than forked: the parent runs threads, and a
+# spawned interpreter behaves the same on Linux, macOS and Windows.
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class ParseLimits:
+    """
+    Per-file budgets of a scan: wall time of one parse, size of the input and
+    memory of the parsing process. None disables a limit.
+
+    The memory budget is enforced with RLIMIT_AS where the resource module
+    exists (Linux, macOS); on Windows only time and size are enforced, and a
+    parse that exhausts memory still only loses its own worker.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = MAX_SECONDS,
+        max_bytes: Optional[int] = MAX_BYTES,
+        memory: Optional[int] = MAX_MEMORY,
+    ) -> None:
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.memory = memory
+
+
+class WorkerFailure(Exception):
+    """
+    A job that did not complete. `kind` is one of:
+      timeout - the job ran past its time budget and the worker was killed;
+      memory  - the worker ran out of its memory budget;
+      crashed - the worker died (killed by the OS, interpreter crash);
+      error   - the job raised; worker functions may raise WorkerFailure
+                themselves to report a more specific kind.
+    """
+
+    def __init__(self, kind: str, detail: str) -> None:
+        super().__init__(kind, detail)
+        self.kind = kind
+        self.detail = detail
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.detail}"
+
+
+def _memoria_virtuale() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _limita_memoria(memory: Optional[int]) -> None:
+    if not memory or resource is None:
+        return
+    # The budget is on top of what the idle worker already maps (interpreter,
+    # imported modules), so it means the same on every platform.
+    limit = _memoria_virtuale() + memory
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _ciclo_worker(
+    conn, fn: Callable, memory: Optional[int], initializer: Optional[Callable], initargs: tuple
+) -> None:
+    if initializer is not None:
+        initializer(*initargs)
+    _limita_memoria(memory)
+    # Imports are done by now: the time budget of a job never includes them.
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        try:
+            reply = ("ok", fn(*job))
+        except WorkerFailure as exc:
+            reply = (exc.kind, exc.detail)
+        except MemoryError:
+            reply = ("memory", f"exceeded the {memory >> 20} MB memory budget" if memory else "out of memory")
+        except Exception as exc:
+            reply = ("error", f"{type(exc).__name__}: {exc}")
+        try:
+            conn.send(reply)
+        except MemoryError:
+            conn.send(("memory", "result too large for the memory budget"))
+
+
+class IsolatedWorker:
+    """
+    Runs fn(*args) in a dedicated process, one job at a time, under the time
+    and memory budgets of `limits`. A job that overruns has its process
+    killed; the next job starts a fresh one, so a pathological input costs at
+    most one budget and never the rest of the batch.
+
+    `fn` must be a module-level function (it is pickled by reference); like
+    multiprocessing.Pool, `initializer(*initargs)` runs once in every new
+    worker process before its first job, outside the budgets.
+    run() blocks: call it from a thread when used from asyncio.
+    """
+
+    def __init__(
+        self,
+        fn: Callable,
+        limits: Optional[ParseLimits] = None,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+    ) -> None:
+        self.fn = fn
+        self.limits = limits or ParseLimits()
+        self.initializer = initializer
+        self.initargs = initargs
+        self._process = None
+        self._conn = None
+
+    def _avvia(self) -> None:
+        parent, child = _CONTEXT.Pipe()
+        process = _CONTEXT.Process(
+            target=_ciclo_worker,
+            args=(child, self.fn, self.limits.memory, self.initializer, self.initargs),
+            daemon=True,
+        )
+        try:
+            process.start()
+        finally:
+            child.close()
+        self._process, self._conn = process, parent
+        try:
+            parent.recv()
+        except (EOFError, OSError):
+            code = self._termina()
+            raise WorkerFailure("crashed", f"worker failed to start (exit code {code})") from None
+
+    def _termina(self) -> Optional[int]:
+        process, self._process = self._process, None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if process is None:
+            return None
+        if process.is_alive():
+            process.kill()
+        process.join()
+        return process.exitcode
+
+    def run(self, *args):
+        if self._process is None:
+            self._avvia()
+        try:
+            self._conn.send(args)
+            if not self._conn.poll(self.limits.seconds):
+                self._termina()
+                raise WorkerFailure("timeout", f"killed after {self.limits.seconds:g} s")
+            kind, value = self._conn.recv()
+        except (EOFError, OSError):
+            code = self._termina()
+            raise WorkerFailure("crashed", f"worker exited with code {code}") from None
+        if kind == "ok":
+            return value
+        if kind == "memory":
+            # The interpreter survived, but its heap may be fragmented to the limit.
+            self._termina()
+        raise WorkerFailure(kind, value)
+
+    def close(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            try:
+                self._conn.send(None)
+                self._process.join(1)
+            except OSError:
+                pass
+        self._termina()
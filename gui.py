@@ -3,10 +3,14 @@ import webbrowser
 from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
 
-from core.db_manager import get_library_names, get_releases_for_library
+from core.db_manager import (
+    get_library_names,
+    get_releases_for_library,
+    search_release_notes,
+)
 from core.report_generator import HEADERS
 from core.sbom_reader import carica_sbom_generico, estrai_librerie
-from core.version_resolver import risolvi_versioni
+from core.version_resolver import BatchResolver, chiave_versione, testi_release
 
 
 class SBOMCheckerGUI:
@@ -18,6 +22,10 @@ class SBOMCheckerGUI:
     MUTED_TEXT_COLOR = "#60708f"
     SIDEBAR_COLOR = "#e8f0fb"  # sidebar color
 
+    # Sort ranks: the rows that need attention come first in ascending order.
+    STATUS_ORDER = {"needs update": 0, "unknown": 1, "up-to-date": 2}
+    SECURITY_ORDER = {"not secure": 0, "n/a": 1, "secure": 2}
+
     LIBRARY_LINKS = {
         "FreeRTOS": "https://www.freertos.org/",
         "LwIP": "https://www.nongnu.org/lwip/",
@@ -39,6 +47,9 @@ class SBOMCheckerGUI:
         self.root.title("SBOM Checker - GUI")
         self.root.configure(bg=self.BG_COLOR)
         self.root.geometry("960x620")
+        # Shared by every SBOM opened in this session: a library version
+        # already seen is not resolved again (the catalog is cached the same way).
+        self.resolver = BatchResolver()
 
         self._configure_style()
         self._build_layout()
@@ -117,6 +128,7 @@ class SBOMCheckerGUI:
             ("📄", "sbom", lambda: self._show_view("sbom")),
             ("☰", "about", lambda: self._show_view("about")),
             ("🛡️", "libraries", lambda: self._show_view("libraries")),
+            ("🔍", "search", lambda: self._show_view("search")),
         ]
 
         for icon, key, command in buttons:
@@ -154,6 +166,7 @@ class SBOMCheckerGUI:
         self._build_sbom_view()
         self._build_about_view()
         self._build_libraries_view()
+        self._build_search_view()
 
         self._show_view("sbom")
 
@@ -175,7 +188,7 @@ class SBOMCheckerGUI:
 
         subtitle = tk.Label(
             header,
-            text="View and inspect the loaded SBOM (.json or .spdx)",
+            text="View and inspect the loaded SBOM (CycloneDX JSON/XML, SPDX tag-value/JSON)",
             fg=self.MUTED_TEXT_COLOR,
             bg=self.BG_COLOR,
             font=("Inter", 11),
@@ -354,6 +367,80 @@ class SBOMCheckerGUI:
         self.library_canvas = canvas
         self._populate_library_view()
 
+    def _build_search_view(self) -> None:
+        search_view = tk.Frame(self.content_container, bg=self.BG_COLOR)
+        self.views["search"] = search_view
+
+        header = tk.Frame(search_view, bg=self.BG_COLOR)
+        header.pack(fill="x", pady=(16, 8), padx=16)
+
+        tk.Label(
+            header,
+            text="Search release notes",
+            fg=self.ACCENT_COLOR,
+            bg=self.BG_COLOR,
+            font=("Inter", 18, "bold"),
+        ).pack(anchor="w")
+
+        tk.Label(
+            header,
+            text="Find releases by keyword or CVE ID (e.g. heap overflow, CVE-2020-22283)",
+            fg=self.MUTED_TEXT_COLOR,
+            bg=self.BG_COLOR,
+            font=("Inter", 11),
+        ).pack(anchor="w")
+
+        controls = tk.Frame(search_view, bg=self.BG_COLOR)
+        controls.pack(fill="x", padx=16, pady=(0, 12))
+
+        self.search_var = tk.StringVar()
+        entry = ttk.Entry(controls, textvariable=self.search_var, font=("Inter", 11))
+        entry.pack(side="left", fill="x", expand=True, padx=(4, 8), pady=8)
+        entry.bind("<Return>", lambda _evt: self._run_search())
+
+        ttk.Button(
+            controls,
+            text="Search",
+            command=self._run_search,
+            style="TButton",
+        ).pack(side="left")
+
+        self.search_box = tk.Text(
+            search_view,
+            bg=self.PANEL_COLOR,
+            fg=self.TEXT_COLOR,
+            font=("Inter", 10),
+            relief="flat",
+            wrap="word",
+            state="disabled",
+        )
+        self.search_box.pack(fill="both", expand=True, padx=16, pady=(0, 16))
+        self.search_box.tag_configure(
+            "title", foreground=self.ACCENT_COLOR, font=("Inter", 11, "bold")
+        )
+        self.search_box.tag_configure(
+            "cve", foreground=self.ALERT_COLOR, font=("Inter", 10, "bold")
+        )
+
+    def _run_search(self) -> None:
+        query = self.search_var.get().strip()
+        hits = search_release_notes(query, limit=100) if query else []
+
+        self.search_box.config(state="normal")
+        self.search_box.delete("1.0", "end")
+        if query and not hits:
+            self.search_box.insert("end", f"No release notes matching '{query}'.")
+        for hit in hits:
+            date = hit.get("release_date") or "date n/a"
+            self.search_box.insert(
+                "end", f"{hit['library']} {hit['version']} ({date})\n", ("title",)
+            )
+            self.search_box.insert("end", f"    {' '.join(hit['snippet'].split())}\n")
+            if hit.get("cve"):
+                self.search_box.insert("end", f"    CVE: {hit['cve']}\n", ("cve",))
+            self.search_box.insert("end", "\n")
+        self.search_box.config(state="disabled")
+
     def _show_view(self, key: str) -> None:
         for name, frame in self.views.items():
             if name == key:
@@ -374,25 +461,40 @@ class SBOMCheckerGUI:
         table_frame = tk.Frame(self.body, bg=self.BG_COLOR)
         self.body.add(table_frame, minsize=150, stretch="always")
 
-        columns = [h for h in HEADERS]
+        filter_row = tk.Frame(table_frame, bg=self.BG_COLOR)
+        filter_row.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 6))
+        tk.Label(
+            filter_row,
+            text="Filter",
+            fg=self.MUTED_TEXT_COLOR,
+            bg=self.BG_COLOR,
+            font=("Segoe UI", 10),
+        ).pack(side="left", padx=(4, 8))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_args: self._apply_view())
+        ttk.Entry(filter_row, textvariable=self.filter_var, font=("Inter", 10)).pack(
+            side="left", fill="x", expand=True
+        )
+
+        self.columns = [h for h in HEADERS]
         self.tree = ttk.Treeview(
             table_frame,
-            columns=columns,
+            columns=self.columns,
             show="headings",
             selectmode="browse",
         )
 
-        for col in columns:
-            self.tree.heading(col, text=col)
+        for index, col in enumerate(self.columns):
+            self.tree.heading(col, text=col, command=lambda i=index: self._sort_by(i))
             self.tree.column(col, anchor="center", stretch=True, width=200)
 
         vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=vsb.set)
 
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vsb.grid(row=1, column=1, sticky="ns")
 
-        table_frame.grid_rowconfigure(0, weight=1)
+        table_frame.grid_rowconfigure(1, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
 
         self.tree.tag_configure(
@@ -405,6 +507,14 @@ class SBOMCheckerGUI:
             "unknown", background="#f7f5ed", foreground="#9c640c"
         )
 
+        # Sorting/filtering state, filled by _populate_table.
+        self.row_ids = []
+        self.row_text = {}
+        self.sort_keys = []
+        self.sort_orders = {}
+        self.sort_column = None
+        self.sort_descending = False
+
     def _build_notes_panel(self) -> None:
         notes_frame = tk.LabelFrame(
             self.body,
@@ -446,7 +556,10 @@ class SBOMCheckerGUI:
     def _on_select_file(self) -> None:
         filepath = filedialog.askopenfilename(
             title="Select an SBOM file",
-            filetypes=[("SBOM files", "*.json *.spdx"), ("All files", "*.*")],
+            filetypes=[
+                ("SBOM files", "*.json *.spdx *.xml *.json.gz *.spdx.gz *.xml.gz"),
+                ("All files", "*.*"),
+            ],
         )
         if not filepath:
             return
@@ -456,7 +569,7 @@ class SBOMCheckerGUI:
         try:
             comps = carica_sbom_generico(path)
             libs = estrai_librerie(comps)
-            data = risolvi_versioni(libs)
+            data = self.resolver.resolve(libs)
         except Exception as exc:
             messagebox.showerror(
                 "Error", f"Unable to read the SBOM file:\n{exc}"
@@ -470,24 +583,88 @@ class SBOMCheckerGUI:
 
     def _clear_selection(self) -> None:
         self.selected_file_label.config(text="No file selected", fg=self.MUTED_TEXT_COLOR)
-        self.tree.delete(*self.tree.get_children())
+        self._populate_table([])
         self.notes_box.config(state="normal")
         self.notes_box.delete("1.0", "end")
         self.notes_box.config(state="disabled")
         self.update_label.config(text="", fg=self.TEXT_COLOR)
 
     def _populate_table(self, data) -> None:
-        self.tree.delete(*self.tree.get_children())
+        """
+        Inserts every row once and precomputes what sorting and filtering
+        need: one key list per column and the lower-cased name, status and
+        security label of each row. Later sorts and filters only reorder,
+        detach or reattach the existing items.
+        """
+
+        # Deleting by ID also removes the rows currently detached by the filter.
+        self.tree.delete(*self.row_ids)
+        self.row_ids = []
+        self.row_text = {}
+        self.sort_keys = [[] for _ in self.columns]
         for lib in data:
+            status = lib.get("status", "")
             values = (
                 lib.get("name", ""),
                 lib.get("current", ""),
                 lib.get("latest", ""),
                 lib.get("security_label", ""),
             )
-            self.tree.insert(
-                "", "end", values=values, tags=(lib.get("status", ""),)
+            iid = self.tree.insert("", "end", values=values, tags=(status,))
+            self.row_ids.append(iid)
+            # The name is matched by substring, status and security label
+            # only as whole values ("secure" must not match "not secure").
+            self.row_text[iid] = (values[0].lower(), (status.lower(), values[3].lower()))
+            self.sort_keys[0].append(values[0].lower())
+            self.sort_keys[1].append(chiave_versione(values[1]))
+            self.sort_keys[2].append(chiave_versione(values[2]))
+            self.sort_keys[3].append(
+                (self.SECURITY_ORDER.get(values[3].lower(), 1), self.STATUS_ORDER.get(status, 1))
             )
+        # Dense integer ranks: every later column sort is a plain int sort.
+        for index, keys in enumerate(self.sort_keys):
+            rank = {key: r for r, key in enumerate(sorted(set(keys)))}
+            self.sort_keys[index] = [rank[key] for key in keys]
+        self.sort_orders = {}
+        self.sort_column = None
+        self.sort_descending = False
+        self._update_headings()
+        self._apply_view()
+
+    def _sort_by(self, column: int) -> None:
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        self._update_headings()
+        self._apply_view()
+
+    def _update_headings(self) -> None:
+        for index, col in enumerate(self.columns):
+            arrow = ""
+            if index == self.sort_column:
+                arrow = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(col, text=col + arrow)
+
+    def _apply_view(self) -> None:
+        """Shows the rows matching the filter, in the current sort order, with one Tk call."""
+
+        order = self.row_ids
+        if self.sort_column is not None:
+            if self.sort_column not in self.sort_orders:
+                keys = self.sort_keys[self.sort_column]
+                positions = sorted(range(len(keys)), key=keys.__getitem__)
+                self.sort_orders[self.sort_column] = [self.row_ids[i] for i in positions]
+            order = self.sort_orders[self.sort_column]
+            if self.sort_descending:
+                order = order[::-1]
+
+        query = self.filter_var.get().strip().lower()
+        if query:
+            text = self.row_text
+            order = [iid for iid in order if query in text[iid][0] or query in text[iid][1]]
+        # Items missing from the new child list are detached, not deleted.
+        self.tree.set_children("", *order)
 
     def _populate_notes(self, data) -> None:
         self.notes_box.config(state="normal")
@@ -496,10 +673,16 @@ class SBOMCheckerGUI:
         cve_sections = [
             lib
             for lib in data
-            if any((rel.get("cve") or "").strip() for rel in lib.get("cve_notes", []))
+            if any(rel.get("has_cve") for rel in lib.get("cve_notes", []))
         ]
 
         notes_to_print = [lib for lib in data if lib.get("security_notes")]
+        # Bodies of the releases shown below, fetched in one query.
+        texts = testi_release(
+            rel
+            for lib in data
+            for rel in lib.get("cve_notes", []) + lib.get("security_notes", [])
+        )
 
         if not cve_sections and not notes_to_print:
             self.notes_box.insert(
@@ -512,7 +695,7 @@ class SBOMCheckerGUI:
                 for lib in cve_sections:
                     self.notes_box.insert("end", f"{lib['name']}\n", ("title",))
                     for rel in lib.get("cve_notes", []):
-                        cve = (rel.get("cve") or "").strip()
+                        cve = (texts.get(rel.get("id"), {}).get("cve") or "").strip()
                         if not cve:
                             continue
                         version = rel.get("version", "")
@@ -535,8 +718,9 @@ class SBOMCheckerGUI:
                     for rel in lib["security_notes"]:
                         version = rel.get("version", "")
                         date = rel.get("release_date") or "date n/a"
-                        notes = rel.get("release_notes") or "Release notes not available."
-                        cve = rel.get("cve") or ""
+                        text = texts.get(rel.get("id"), {})
+                        notes = text.get("release_notes") or "Release notes not available."
+                        cve = text.get("cve") or ""
                         self.notes_box.insert(
                             "end", f"  - {version} ({date})\n", ("subtitle",)
                         )
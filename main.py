@@ -1,29 +1,106 @@
+import argparse
+import multiprocessing
 import sys
 from pathlib import Path
 
 from utils.colors import Fore, Style
-from utils.paths import SBOM_DIR
+from utils.paths import SBOM_DIR, SNAPSHOT_PATH
 from core.constants import FIRMWARE_LIBRARIES
-from core.sbom_reader import carica_sbom_generico, estrai_librerie
-from core.version_resolver import risolvi_versioni
-from core.report_generator import report_for_sbom
+from core.cve_index import CveIndex, FleetIndex, sbom_esposti
+from core.db_manager import rebuild_search_index, search_release_notes
+from core.html_report import HtmlReportWriter
+from core.pipeline import analizza_sbom
+from core.sbom_reader import elenca_file_sbom
+from core.dependency_graph import PATH_LIMIT, carica_grafo, percorsi_librerie
+from core.fleet_stats import TOP_VERSIONS, FleetColumns, statistiche_flotta
+from core.report_generator import (
+    report_for_diff,
+    report_for_errors,
+    report_for_fleet,
+    report_for_paths,
+    report_for_sbom,
+    report_for_stats,
+)
+from core.sbom_diff import diff_cartelle, diff_sbom
+from core.scan_history import record_scan, refresh_latest, scan_versions, status_trend
+from core.sharding import chiave_shard, parse_shard, scrivi_flotta, scrivi_parziale, seleziona_shard, unisci_parziali
+from core.version_resolver import compila_snapshot
+from core.worker_pool import MAX_BYTES, MAX_MEMORY, MAX_SECONDS, ParseLimits
 
-def _build_reports(sbom_files):
+def _build_reports(sbom_files, jobs=None, on_report=None, limits=None):
     reports = []
-    for sbom_file in sbom_files:
-        libs = estrai_librerie(carica_sbom_generico(sbom_file))
-        data = risolvi_versioni(libs)
-        count_needs_update = sum(1 for lib in data if lib['status'] == 'needs update')
+
+    # Called in input order while later files are still being read and parsed.
+    def sink(sbom_file, data, count_needs_update):
         reports.append((sbom_file, data, count_needs_update))
-    return reports
+        if on_report:
+            on_report(sbom_file, data)
+
+    # Byte-identical SBOMs are analyzed once and share the same result.
+    # SBOMs over a size, time or memory budget are returned as errors.
+    errors = analizza_sbom(sbom_files, sink, parsers=jobs, limits=limits)
+    return reports, errors
+
+def _limits(args):
+    # 0 disables a budget.
+    return ParseLimits(
+        seconds=args.max_seconds or None,
+        max_bytes=(args.max_size << 20) or None,
+        memory=(args.max_memory << 20) or None,
+    )
+
+def _print_exposure(cve_id, cve_index, fleet):
+    entries = cve_index.lookup(cve_id)
+    if not entries:
+        print(f" '{cve_id}' is not listed for any library in the release database.")
+        return
+    for entry in entries:
+        fixed_in = entry["fixed_in"] or "no fixed release"
+        print(f" {entry['library']}: affected {', '.join(entry['affected'])} | fixed in: {fixed_in}")
+    exposed = sbom_esposti(cve_id, cve_index, fleet)
+    if not exposed:
+        print(f"\n No SBOMs exposed to '{cve_id}'.")
+        return
+    print(f"\n SBOMs exposed to '{cve_id}':")
+    for hit in exposed:
+        print(f" {hit['sbom'].name} → {hit['library']} {hit['version']}")
+
+def _cve(cve_id, jobs, limits):
+    # A query: answered from the latest recorded scan, never recorded itself.
+    scan = scan_versions()
+    if scan is not None:
+        print(f" From scan #{scan['scan_id']} ({scan['started_at']}, {scan['sbom_count']} SBOMs)\n")
+        _print_exposure(cve_id, CveIndex.from_catalog(), FleetIndex.from_scan(scan["rows"]))
+        return
+    reports, errors = _build_reports(_sbom_files(), jobs, limits=limits)
+    _print_exposure(cve_id, CveIndex.from_catalog(), FleetIndex.from_reports(reports))
+    report_for_errors(errors)
+
+def _sbom_files():
+    print(f"\nUsing SBOM folder: {Fore.CYAN}{SBOM_DIR.resolve()}{Style.RESET_ALL}")
+
+    if not SBOM_DIR.is_dir():
+        print(f" Folder not found: {SBOM_DIR}")
+        sys.exit(1)
+
+    # Search for CycloneDX (*.json) and SPDX tag-value (*.spdx), plain or in archives
+    sbom_files = elenca_file_sbom(SBOM_DIR)
+    if not sbom_files:
+        print(" No .json, .spdx or archive files found in SBOM_DIR.")
+        sys.exit(1)
+    return sbom_files
 
 def _menu(reports):
+    cve_index = None
+    fleet = None
     while True:
         print("\n Do you want to run a search?")
         print("1. Find a library that needs an update")
         print("2. Find a specific SBOM")
-        print("3. Exit")
-        scelta = input(" Enter your choice (1/2/3): ").strip()
+        print("3. Find SBOMs exposed to a CVE")
+        print("4. Fleet statistics")
+        print("5. Exit")
+        scelta = input(" Enter your choice (1/2/3/4/5): ").strip()
 
         if scelta == "1":
             query = input(" Library name: ").strip()
@@ -41,37 +118,281 @@ def _menu(reports):
                 print(f" Library '{query}' not recognized.")
         elif scelta == "2":
             nome_sbom = input(" Enter the SBOM file name (e.g., SBOM_FIRMWARE.json or TMB2.spdx): ").strip().lower()
-            path_match = next((x[0] for x in reports if x[0].name.strip().lower() == nome_sbom), None)
-            if path_match:
-                report_for_sbom(path_match)
+            match = next((x for x in reports if x[0].name.strip().lower() == nome_sbom), None)
+            if match:
+                report_for_sbom(match[0], match[1])
             else:
                 print(f" File '{nome_sbom}' not found.")
         elif scelta == "3":
+            cve_id = input(" CVE ID (e.g., CVE-2021-31571): ").strip()
+            if cve_index is None:
+                cve_index = CveIndex.from_catalog()
+                fleet = FleetIndex.from_reports(reports)
+            _print_exposure(cve_id, cve_index, fleet)
+        elif scelta == "4":
+            report_for_stats("Fleet statistics", len(reports), statistiche_flotta(FleetColumns.from_reports(reports)))
+        elif scelta == "5":
             print(" Exiting program.")
             sys.exit(0)
         else:
             print(" Invalid choice. Please try again.")
 
-def main():
-    print(f"\nFirmware Checker - by {Fore.LIGHTYELLOW_EX}Logika{Fore.LIGHTGREEN_EX}Control{Style.RESET_ALL} (v1.0)\n")
-    print(f"\nUsing SBOM folder: {Fore.CYAN}{SBOM_DIR.resolve()}{Style.RESET_ALL}")
+def _search(query, limit, library, rebuild):
+    if rebuild:
+        rebuild_search_index()
+    hits = search_release_notes(query, limit=limit, library=library)
+    if not hits:
+        print(f" No release notes matching '{query}'.")
+        return
+    print(f"\n Release notes matching '{query}':")
+    for hit in hits:
+        date = hit["release_date"] or "date n/a"
+        security = str(hit["security"] or "").strip().lower() not in {"", "0", "false"}
+        flag = f" {Fore.RED}[security]{Style.RESET_ALL}" if security else ""
+        print(f"\n {Fore.CYAN}{hit['library']}{Style.RESET_ALL} {Fore.YELLOW}{hit['version']}{Style.RESET_ALL} ({date}){flag}")
+        print(f"    {' '.join(hit['snippet'].split())}")
+        if hit["cve"]:
+            print(f"    CVE: {hit['cve']}")
 
-    if not SBOM_DIR.is_dir():
-        print(f" Folder not found: {SBOM_DIR}")
+def _diff(old, new):
+    old, new = Path(old), Path(new)
+    if old.is_dir() and new.is_dir():
+        results = diff_cartelle(old, new)
+        if not results:
+            print(" No differences between the two folders.")
+        for entry in results:
+            if entry["change"] == "changed":
+                report_for_diff(entry["sbom"], entry["components"])
+            else:
+                print(f"\n SBOM {entry['change']}: {entry['sbom']}")
+    elif old.is_file() and new.is_file():
+        report_for_diff(f"{old.name} → {new.name}", diff_sbom(old, new))
+    else:
+        print(" Both arguments must be SBOM files or both must be folders.")
         sys.exit(1)
 
-    # Search for both CycloneDX (*.json) and SPDX tag-value (*.spdx)
-    sbom_files = list(SBOM_DIR.glob("*.json")) + list(SBOM_DIR.glob("*.spdx"))
-    if not sbom_files:
-        print(" No .json or .spdx files found in SBOM_DIR.")
+def _paths(sbom, library, limit):
+    path = Path(sbom)
+    graph = carica_grafo(path)
+    if graph is None:
+        print(f" {path} is not a readable CycloneDX JSON SBOM.")
+        sys.exit(1)
+    report_for_paths(path, graph, percorsi_librerie(graph, library, limit))
+
+def _history(library, scans):
+    trend = status_trend("needs update", library=library, last=scans)
+    if not trend:
+        print(" No scans recorded yet.")
+        return
+    if library:
+        print(f"\n SBOMs with '{library}' needing an update, last {scans} scans:")
+        for row in trend:
+            print(f" #{row['scan_id']} {row['started_at']} → {row['count']}")
+        return
+    per_library = {}
+    for row in trend:
+        per_library.setdefault(row["library"], []).append(row["count"])
+    print(f"\n SBOMs needing an update per library, last {scans} scans (oldest → newest):")
+    width = max(len(name) for name in per_library)
+    for name, counts in per_library.items():
+        delta = counts[-1] - counts[0]
+        print(f" {name.ljust(width)}  now {counts[-1]:>5} ({delta:+d})  {' '.join(str(c) for c in counts[-12:])}")
+
+def _stats(scan, library, top):
+    columns = FleetColumns.from_history(scan)
+    if columns is None:
+        print(f" Scan #{scan} not found." if scan else " No scans recorded yet.")
+        return
+    stats = statistiche_flotta(columns, top=None if library else top)
+    if library:
+        stats = [row for row in stats if row["library"].lower() == library.lower()]
+        if not stats:
+            print(f" Library '{library}' not found in scan #{columns.scan_id}.")
+            return
+    title = f"Fleet statistics, scan #{columns.scan_id} ({columns.started_at})"
+    report_for_stats(title, columns.sboms, stats, detail=bool(library))
+
+def _refresh():
+    result = refresh_latest()
+    if result is None:
+        print(" No scans recorded yet.")
+        return
+    if not result["changed"]:
+        print(f" Catalog unchanged since scan #{result['scan_id']}, nothing to re-evaluate.")
+        return
+    print(f" Scan #{result['scan_id']} re-evaluated against the current catalog (base scan #{result['base_scan_id']}).")
+    print(f" Changed libraries: {', '.join(result['changed'])}; {result['rows']} SBOM rows re-resolved.")
+    for name, moves in sorted(result["transitions"].items()):
+        for (old, new), count in sorted(moves.items()):
+            print(f" {name}: {count} SBOMs {old} → {new}")
+    if not result["transitions"]:
+        print(" No status changed.")
+
+def _scan_shard(folder, shard, out, jobs, limits):
+    try:
+        index, shards = parse_shard(shard)
+    except ValueError as exc:
+        print(f" {exc}")
+        sys.exit(1)
+    folder = Path(folder)
+    files = seleziona_shard(elenca_file_sbom(folder), folder, index, shards)
+    reports, errors = _build_reports(files, jobs, limits=limits)
+    scrivi_parziale(Path(out), reports, folder, index, shards, errors)
+    print(f" Shard {index}/{shards}: {len(reports)} SBOMs written to {out}")
+    report_for_errors(errors)
+
+def _export(folder, out, page_size, jobs, limits):
+    folder = Path(folder)
+    files = elenca_file_sbom(folder) if folder.is_dir() else []
+    if not files:
+        print(f" No SBOM files found in {folder}.")
+        sys.exit(1)
+    # The writer is the pipeline sink: pages are written while the scan runs.
+    writer = HtmlReportWriter(Path(out), page_size)
+    errors = analizza_sbom(
+        files,
+        lambda f, data, count: writer.add(Path(chiave_shard(f, folder)), data, count),
+        parsers=jobs,
+        limits=limits,
+    )
+    for error in errors:
+        writer.add_error(dict(error, sbom=Path(chiave_shard(error["sbom"], folder))))
+    index = writer.close()
+    print(f" HTML report for {writer.sboms} SBOMs written to {index}")
+    report_for_errors(errors)
+
+def _merge(partials, out, history, html=None):
+    try:
+        reports, info = unisci_parziali([Path(p) for p in partials])
+    except (OSError, ValueError, KeyError) as exc:
+        print(f" Cannot merge partials: {exc}")
         sys.exit(1)
+    if info["missing"]:
+        print(f" {Fore.YELLOW}Warning: missing shards {info['missing']} of {info['shards']}{Style.RESET_ALL}")
+    report_for_fleet(reports)
+    report_for_errors(info["errors"])
+    if out:
+        scrivi_flotta(Path(out), reports, info)
+        print(f"\n Fleet report written to {out}")
+    if html:
+        writer = HtmlReportWriter(Path(html))
+        for report in reports:
+            writer.add(*report)
+        for error in info["errors"]:
+            writer.add_error(error)
+        print(f" HTML report written to {writer.close()}")
+    if history:
+        record_scan(reports)
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check firmware libraries listed in SBOMs.")
+    parser.add_argument("--no-history", action="store_true", help="do not record this scan in the history database")
+    parser.add_argument("-j", "--jobs", type=int, help="parser processes (default: one per CPU)")
+    budgets = parser.add_argument_group("per-SBOM budgets (0 disables one)")
+    budgets.add_argument("--max-seconds", type=float, default=MAX_SECONDS, help="parse time (default %(default)g)")
+    budgets.add_argument("--max-size", type=int, default=MAX_BYTES >> 20, help="file size in MB (default %(default)d)")
+    budgets.add_argument("--max-memory", type=int, default=MAX_MEMORY >> 20, help="parser memory in MB (default %(default)d)")
+    sub = parser.add_subparsers(dest="command")
+
+    search = sub.add_parser("search", help="full-text search over release notes and CVEs")
+    search.add_argument("query", help="words, a CVE ID or an FTS5 query")
+    search.add_argument("-n", "--limit", type=int, default=20)
+    search.add_argument("-l", "--library", help="restrict hits to one library")
+    search.add_argument("--rebuild", action="store_true", help="rebuild the search index first")
+
+    cve = sub.add_parser("cve", help="list the SBOMs exposed to a CVE")
+    cve.add_argument("cve_id", help="e.g. CVE-2021-31571")
+
+    diff = sub.add_parser("diff", help="compare two SBOM revisions (files or folders)")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    paths = sub.add_parser("paths", help="dependency paths from the product to each outdated library")
+    paths.add_argument("sbom", help="CycloneDX JSON file (.json or .json.gz)")
+    paths.add_argument("-l", "--library", help="only this library")
+    paths.add_argument("-n", "--limit", type=int, default=PATH_LIMIT, help="paths listed per library")
+
+    history = sub.add_parser("history", help="needs-update trend over the recorded scans")
+    history.add_argument("-l", "--library", help="show one library scan by scan")
+    history.add_argument("-s", "--scans", type=int, default=90, help="number of recent scans")
+
+    stats = sub.add_parser("stats", help="fleet version distribution and releases behind latest, per library")
+    stats.add_argument("-s", "--scan", type=int, help="recorded scan ID (default: the latest)")
+    stats.add_argument("-l", "--library", help="full version distribution of one library")
+    stats.add_argument("--top", type=int, default=TOP_VERSIONS, help="versions listed per library (default %(default)d)")
+
+    sub.add_parser("refresh", help="re-evaluate the latest scan after Version.db changed, without re-reading SBOMs")
+
+    scan = sub.add_parser("scan", help="scan one shard of a folder and write a partial results file")
+    scan.add_argument("--folder", default=str(SBOM_DIR))
+    scan.add_argument("--shard", default="0/1", help="K/N: this node scans shard K of N (default 0/1)")
+    scan.add_argument("-o", "--out", required=True, help="partial results file (.json)")
+
+    merge = sub.add_parser("merge", help="merge shard partials into one fleet report")
+    merge.add_argument("partials", nargs="+")
+    merge.add_argument("-o", "--out", help="write the merged fleet report and index (.json)")
+    merge.add_argument("--html", help="also write a static HTML report set to this folder")
+
+    export = sub.add_parser("export", help="write a static HTML report set for a folder of SBOMs")
+    export.add_argument("--folder", default=str(SBOM_DIR))
+    export.add_argument("-o", "--out", required=True, help="output folder (index.html + pages)")
+    export.add_argument("--page-size", type=int, default=100, help="SBOMs per page (default 100)")
+
+    sub.add_parser("snapshot", help="precompile Version.db into the startup snapshot (build step)")
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    print(f"\nFirmware Checker - by {Fore.LIGHTYELLOW_EX}Logika{Fore.LIGHTGREEN_EX}Control{Style.RESET_ALL} (v1.0)\n")
+
+    if args.command == "search":
+        _search(args.query, args.limit, args.library, args.rebuild)
+        return
+    if args.command == "diff":
+        _diff(args.old, args.new)
+        return
+    if args.command == "paths":
+        _paths(args.sbom, args.library, args.limit)
+        return
+    if args.command == "history":
+        _history(args.library, args.scans)
+        return
+    if args.command == "stats":
+        _stats(args.scan, args.library, args.top)
+        return
+    if args.command == "refresh":
+        _refresh()
+        return
+    if args.command == "scan":
+        _scan_shard(args.folder, args.shard, args.out, args.jobs, _limits(args))
+        return
+    if args.command == "merge":
+        _merge(args.partials, args.out, not args.no_history, args.html)
+        return
+    if args.command == "export":
+        _export(args.folder, args.out, args.page_size, args.jobs, _limits(args))
+        return
+    if args.command == "snapshot":
+        count = compila_snapshot()
+        print(f" Catalog snapshot written to {SNAPSHOT_PATH} ({count} libraries)")
+        return
+
+    if args.command == "cve":
+        _cve(args.cve_id, args.jobs, _limits(args))
+        return
 
-    reports = _build_reports(sbom_files)
+    sbom_files = _sbom_files()
 
-    for sbom_file, _, _ in reports:
-        report_for_sbom(sbom_file)
+    # Reports are printed as soon as each SBOM is resolved.
+    reports, errors = _build_reports(sbom_files, args.jobs, on_report=report_for_sbom, limits=_limits(args))
+    report_for_errors(errors)
+    if not args.no_history:
+        record_scan(reports)
 
     _menu(reports)
 
 if __name__ == "__main__":
+    # Needed by the parse worker processes in the frozen (PyInstaller) build.
+    multiprocessing.freeze_support()
     main()
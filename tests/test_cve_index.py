@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import main
+from core import scan_history
+from core.cve_index import CveIndex, FleetIndex, sbom_esposti
+from core.version_resolver import risolvi_versioni
+
+
+def test_vendor_build_is_exposed_like_its_release():
+    cve_index = CveIndex.from_catalog(["FreeRTOS"])
+    fleet = FleetIndex()
+    fleet.add(Path("vendor.json"), risolvi_versioni([{"name": "FreeRTOS", "version": "10.4.3-st1"}]))
+    fleet.add(Path("fixed.json"), risolvi_versioni([{"name": "FreeRTOS", "version": "10.4.6-st1"}]))
+
+    # CVE-2021-43997 affects 10.4.3 and is fixed in 10.4.6.
+    exposed = sbom_esposti("CVE-2021-43997", cve_index, fleet)
+
+    assert [(hit["sbom"].name, hit["version"], hit["fixed_in"]) for hit in exposed] == [
+        ("vendor.json", "10.4.3-st1", "10.4.6")
+    ]
+    # Fixed in 10.4.3, which the vendor build is based on.
+    assert not sbom_esposti("CVE-2021-31571", cve_index, fleet)
+
+
+def test_cve_query_answers_from_the_latest_scan_without_recording(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(scan_history, "HISTORY_DB_PATH", tmp_path / "ScanHistory.db")
+    monkeypatch.setattr(scan_history, "_conn", None)
+    data = risolvi_versioni([{"name": "FreeRTOS", "version": "10.4.3-st1"}])
+    scan_history.record_scan([(Path("vendor.json"), data, 1)])
+
+    def no_rescan(*args, **kwargs):
+        raise AssertionError("the SBOM folder was scanned")
+
+    monkeypatch.setattr(main, "_build_reports", no_rescan)
+    main._cve("CVE-2021-43997", None, None)
+
+    assert "vendor.json → FreeRTOS 10.4.3-st1" in capsys.readouterr().out
+    assert len(scan_history.list_scans()) == 1
+    scan_history._conn.close()
@@ -0,0 +1,31 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from core import db_manager
+
+
+def test_catalog_fingerprint_accepts_non_text_columns(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "FirmwareLibraries" (ID INTEGER PRIMARY KEY, name TEXT)')
+    conn.execute(
+        'CREATE TABLE "ReleaseNotes" ("IDLibraries" INTEGER, version, release_notes TEXT, '
+        "release_date TEXT, security, cve TEXT)"
+    )
+    conn.execute("INSERT INTO \"FirmwareLibraries\" VALUES (1, 'LwIP')")
+    # An imported row: numeric version and security flag, no date.
+    conn.execute("INSERT INTO \"ReleaseNotes\" VALUES (1, 2.2, '', NULL, 1, NULL)")
+    monkeypatch.setattr(db_manager, "_conn", conn)
+    monkeypatch.setattr(db_manager, "_cursor", conn.cursor())
+
+    fingerprint = db_manager.catalog_fingerprint()
+    assert len(fingerprint) == 16
+    assert fingerprint == db_manager.catalog_fingerprint()
+
+
+def test_releases_are_read_from_any_thread():
+    on_main = db_manager.get_releases_for_library("FreeRTOS")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        off_main = pool.submit(db_manager.get_releases_for_library, "FreeRTOS").result()
+
+    assert on_main
+    assert off_main == on_main
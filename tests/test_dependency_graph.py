@@ -0,0 +1,56 @@
+from core.dependency_graph import DependencyGraph, percorsi_librerie
+
+
+def _grafo():
+    # app -> net -> FreeRTOS, app -> ui -> widgets -> FreeRTOS, with a
+    # widgets <-> ui cycle and a component nested under net.
+    return DependencyGraph.from_cyclonedx(
+        {
+            "metadata": {"component": {"bom-ref": "app", "name": "app", "version": "1.0"}},
+            "components": [
+                {
+                    "bom-ref": "net",
+                    "name": "net",
+                    "version": "2.0",
+                    "components": [{"bom-ref": "rtos", "name": "FreeRTOS", "version": "10.4.3"}],
+                },
+                {"bom-ref": "ui", "name": "ui", "version": "3.0"},
+                {"bom-ref": "widgets", "name": "widgets", "version": "3.1"},
+            ],
+            "dependencies": [
+                {"ref": "app", "dependsOn": ["net", "ui"]},
+                {"ref": "ui", "dependsOn": ["widgets"]},
+                {"ref": "widgets", "dependsOn": ["rtos", "ui"]},
+            ],
+        }
+    )
+
+
+def _nomi(graph, path):
+    return [graph.names[node] for node in path]
+
+
+def test_shortest_path_and_every_simple_path():
+    graph = _grafo()
+    rtos = graph.refs.index("rtos")
+
+    assert graph.roots == [graph.product]
+    assert _nomi(graph, graph.shortest_path(rtos)) == ["app", "net", "FreeRTOS"]
+    assert sorted(_nomi(graph, path) for path in graph.paths(rtos)) == [
+        ["app", "net", "FreeRTOS"],
+        ["app", "ui", "widgets", "FreeRTOS"],
+    ]
+    # Nodes that cannot reach FreeRTOS are never entered.
+    mask = graph.reaching(rtos)
+    assert [graph.refs[node] for node in range(len(graph)) if mask[node]] == ["app", "net", "rtos", "ui", "widgets"]
+
+
+def test_library_paths_are_capped():
+    graph = _grafo()
+
+    (hit,) = percorsi_librerie(graph, "FreeRTOS", limit=1)
+
+    assert hit["version"] == "10.4.3"
+    assert [graph.refs[node] for node in hit["via"]] == ["net", "ui"]
+    assert len(hit["paths"]) == 1 and hit["truncated"]
+    assert not percorsi_librerie(graph, "LwIP")
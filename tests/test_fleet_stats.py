@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from core import fleet_stats
+from core.fleet_stats import FleetColumns, releases_behind, statistiche_flotta
+from core.version_resolver import get_library_catalog
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "array":
+        monkeypatch.setattr(fleet_stats, "np", None)
+    elif fleet_stats.np is None:
+        pytest.skip("NumPy is not installed")
+    return request.param
+
+
+def test_packed_columns_decode_large_codes(backend):
+    library, version = 70_000, (1 << 30) - 1
+    columns = FleetColumns([library << 32 | version << 2 | 2, 1 << 32 | 5 << 2 | 1] * 2, {}, {}, 2)
+
+    assert list(columns.library) == [library, 1] * 2
+    assert list(columns.version) == [version, 5] * 2
+    assert list(columns.status) == [2, 1] * 2
+    assert columns.group_counts() == {(library, version, 2): 2, (1, 5, 1): 2}
+
+
+def test_fleet_statistics(backend):
+    latest = get_library_catalog("FreeRTOS").releases[-1]["version"]
+
+    def report(version, status):
+        return (Path(f"{version}.json"), [{"name": "FreeRTOS", "current": version, "status": status}], 0)
+
+    reports = [
+        report(latest, "up-to-date"),
+        report(latest, "up-to-date"),
+        report("10.4.3", "needs update"),
+        report("not-a-version", "unknown"),
+    ]
+
+    (row,) = statistiche_flotta(FleetColumns.from_reports(reports), top=2)
+
+    behind = releases_behind("FreeRTOS", "10.4.3")
+    assert (row["sboms"], row["up_to_date"], row["needs_update"], row["unknown"]) == (4, 2, 1, 1)
+    assert (row["on_latest"], row["on_latest_pct"], row["unplaced"], row["distinct"]) == (2, 50.0, 1, 3)
+    assert row["behind_median"] == 0 and row["behind_max"] == behind > 0
+    assert row["versions"] == [(latest, 2, 0), ("10.4.3", 1, behind)]
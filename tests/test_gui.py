@@ -0,0 +1,69 @@
+from gui import SBOMCheckerGUI
+
+
+class _Albero:
+    def __init__(self) -> None:
+        self.shown = []
+        self.values = {}
+
+    def insert(self, parent, index, values, tags):
+        iid = f"I{len(self.values)}"
+        self.values[iid] = values
+        return iid
+
+    def delete(self, *iids) -> None:
+        pass
+
+    def heading(self, column, text) -> None:
+        pass
+
+    def set_children(self, parent, *iids) -> None:
+        self.shown = [self.values[iid][0] for iid in iids]
+
+
+class _Testo:
+    def __init__(self) -> None:
+        self.value = ""
+
+    def get(self) -> str:
+        return self.value
+
+
+class _Tabella(SBOMCheckerGUI):
+    """The table logic of the GUI, without a Tk window."""
+
+    def __init__(self) -> None:
+        self.columns = ["Library", "Current", "Latest", "Security"]
+        self.tree = _Albero()
+        self.filter_var = _Testo()
+        self.row_ids = []
+
+
+def _riga(name, current, security, status):
+    return {"name": name, "current": current, "latest": "9.9", "security_label": security, "status": status}
+
+
+def test_filter_matches_whole_status_and_security_values():
+    table = _Tabella()
+    table._populate_table(
+        [
+            _riga("FreeRTOS", "10.4.3", "not secure", "needs update"),
+            _riga("LwIP", "2.2.1-rc1", "secure", "up-to-date"),
+            _riga("mbedTLS", "2.2.1", "n/a", "unknown"),
+        ]
+    )
+
+    def shown(query):
+        table.filter_var.value = query
+        table._apply_view()
+        return table.tree.shown
+
+    assert shown("secure") == ["LwIP"]
+    assert shown("Not Secure") == ["FreeRTOS"]
+    assert shown("up-to-date") == ["LwIP"]
+    assert shown("tls") == ["mbedTLS"]
+    assert shown("") == ["FreeRTOS", "LwIP", "mbedTLS"]
+
+    table.filter_var.value = ""
+    table._sort_by(1)
+    assert table.tree.shown == ["LwIP", "mbedTLS", "FreeRTOS"]
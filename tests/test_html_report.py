@@ -0,0 +1,42 @@
+import re
+from pathlib import Path
+
+from core.html_report import HtmlReportWriter
+
+
+def _lib(name, current, status):
+    return {"name": name, "current": current, "latest": "2.0", "security_label": "", "status": status}
+
+
+def _nav(html):
+    return [set(re.findall(r'href="([^"]+)"', nav)) for nav in re.findall(r"<nav>.*?</nav>", html)]
+
+
+def test_pages_link_both_ways_from_header_and_footer(tmp_path):
+    (tmp_path / "sboms-00009.html").write_text("stale", encoding="utf-8")
+    writer = HtmlReportWriter(tmp_path, page_size=2)
+    for i in range(5):
+        status = "needs update" if i % 2 else "up-to-date"
+        writer.add(Path(f"fw{i}<x>.json"), [_lib("FreeRTOS", f"1.{i}", status)], 1 if i % 2 else 0)
+    writer.add_error({"sbom": Path("bad.json"), "stage": "parse", "kind": "malformed", "detail": "x"})
+    index = writer.close()
+
+    pages = sorted(p.name for p in tmp_path.glob("sboms-*.html"))
+    assert pages == ["sboms-00001.html", "sboms-00002.html", "sboms-00003.html"]
+    expected = [
+        {"index.html", "sboms-00002.html"},
+        {"index.html", "sboms-00001.html", "sboms-00003.html"},
+        {"index.html", "sboms-00002.html"},
+    ]
+    for name, links in zip(pages, expected):
+        html = (tmp_path / name).read_text(encoding="utf-8")
+        assert _nav(html) == [links, links]
+        assert html.endswith("</body></html>\n")
+
+    page = (tmp_path / "sboms-00001.html").read_text(encoding="utf-8")
+    assert "fw0&lt;x&gt;.json" in page and "fw1&lt;x&gt;.json" in page
+
+    summary = index.read_text(encoding="utf-8")
+    assert "5 SBOMs, 2 requiring updates, 1 not analyzed" in summary
+    assert "bad.json" in summary and "malformed" in summary
+    assert summary.count('href="sboms-') == 3
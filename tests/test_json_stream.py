@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from core import sbom_reader
+from core.json_stream import itera_json
+
+
+class _Goccia(io.BytesIO):
+    """Returns at most 7 bytes per read, so values straddle buffer refills."""
+
+    def read(self, size=-1):
+        return super().read(7)
+
+
+def test_selected_arrays_are_yielded_element_by_element():
+    doc = {
+        "spdxVersion": "SPDX-2.3",
+        "files": [{"name": f"f{i}"} for i in range(50)],
+        "packages": [{"name": "café", "size": 12345678901234}, [], {"name": "x"}],
+        "empty": [],
+        "count": 1.5e3,
+    }
+    raw = b"\xef\xbb\xbf" + json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+    items = list(itera_json(_Goccia(raw), arrays={"packages", "empty"}))
+
+    assert items == [
+        ("spdxVersion", "SPDX-2.3"),
+        ("files", None),
+        ("packages", {"name": "café", "size": 12345678901234}),
+        ("packages", []),
+        ("packages", {"name": "x"}),
+        ("count", 1500.0),
+    ]
+
+
+def test_malformed_json_raises():
+    for raw in (b'{"a": [1 2]}', b'{"a": 1 "b": 2}', b'[1, 2]', b'{"a": [1, 2'):
+        with pytest.raises(ValueError):
+            list(itera_json(io.BytesIO(raw)))
+
+
+def test_spdx_json_reader_streams_packages():
+    packages = [{"name": f"pkg{i}", "versionInfo": "1.0"} for i in range(200)]
+    packages.append(
+        {
+            "name": "amazon-freertos-kernel",
+            "versionInfo": "10.4.3",
+            "externalRefs": [{"referenceType": "purl", "referenceLocator": "pkg:github/freertos/freertos-kernel@10.4.3"}],
+        }
+    )
+    raw = json.dumps({"spdxVersion": "SPDX-2.3", "packages": packages}).encode("utf-8")
+
+    assert sbom_reader._spdx_json_da_stream(_Goccia(raw)) == [{"name": "FreeRTOS", "version": "10.4.3"}]
+    with pytest.raises(sbom_reader.SbomParseError):
+        sbom_reader._spdx_json_da_stream(io.BytesIO(raw[:-10]))
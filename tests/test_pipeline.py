@@ -0,0 +1,64 @@
+import zipfile
+
+from core import pipeline
+from core.db_manager import get_release_texts
+from core.pipeline import analizza_sbom
+from core.report_generator import report_for_sbom
+from core.sbom_reader import elenca_file_sbom
+from utils.paths import SBOM_DIR
+
+
+def test_report_prints_release_note_bodies(capsys):
+    reports = []
+
+    def sink(sbom_file, data, count):
+        # The pipeline calls the sink from a worker thread, as main.py does.
+        reports.append(data)
+        report_for_sbom(sbom_file, data)
+
+    errors = analizza_sbom(elenca_file_sbom(SBOM_DIR), sink, parsers=1)
+    out = capsys.readouterr().out
+
+    assert not errors
+    notes = [rel for data in reports for lib in data for rel in lib["security_notes"]]
+    assert notes
+    texts = get_release_texts(rel["id"] for rel in notes)
+    bodies = [texts[rel["id"]]["release_notes"] for rel in notes if texts.get(rel["id"], {}).get("release_notes")]
+    assert bodies
+    for body in bodies:
+        assert body.splitlines()[0] in out
+    assert "No release notes available." not in out
+
+
+def test_only_files_of_a_shared_size_are_hashed(tmp_path, monkeypatch):
+    sample = next(SBOM_DIR.glob("*.json")).read_bytes()
+    (tmp_path / "a.json").write_bytes(sample)
+    (tmp_path / "b.json").write_bytes(sample + b"\n")
+    (tmp_path / "c.json").write_bytes(sample + b"\n")
+    with zipfile.ZipFile(tmp_path / "bundle.zip", "w") as bundle:
+        bundle.writestr("copy.json", sample)
+
+    by_size = pipeline._dimensioni(elenca_file_sbom(tmp_path))
+    assert pipeline._leggi_file(tmp_path / "a.json", None, by_size) == ("p:" + str(tmp_path / "a.json"), sample)
+    assert pipeline._leggi_file(tmp_path / "b.json", None, by_size)[0].startswith("f:")
+
+    hashed = []
+    real_digest_file = pipeline._digest_file
+
+    def digest_file(path):
+        hashed.append(path.name)
+        return real_digest_file(path)
+
+    monkeypatch.setattr(pipeline, "_digest_file", digest_file)
+    results = {}
+
+    def sink(path, data, count):
+        results[path.name] = data
+
+    errors = analizza_sbom(elenca_file_sbom(tmp_path), sink, parsers=1)
+
+    assert not errors
+    # a.json is hashed once, only to match the archive member of its size.
+    assert hashed == ["a.json"]
+    assert results["b.json"] is results["c.json"]
+    assert results["copy.json"] is results["a.json"]
@@ -0,0 +1,84 @@
+import gzip
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from core import json_backend, sbom_reader
+
+
+def _cyclonedx_xml(components: int, dependencies: int) -> bytes:
+    parts = ['<bom xmlns="http://cyclonedx.org/schema/bom/1.5" version="1">']
+    parts.append("<metadata><component><name>firmware</name><version>1.0</version></component></metadata>")
+    parts.append("<components>")
+    for i in range(components):
+        parts.append(f"<component type=\"library\"><name>lib{i}</name><version>1.{i}</version></component>")
+    parts.append("<component type=\"library\"><name>FreeRTOS</name><version>10.4.3</version></component>")
+    parts.append("</components><dependencies>")
+    for i in range(dependencies):
+        parts.append(f'<dependency ref="lib{i}"><dependency ref="lib{i + 1}"/></dependency>')
+    parts.append("</dependencies><vulnerabilities><vulnerability><id>CVE-1</id></vulnerability></vulnerabilities></bom>")
+    return "".join(parts).encode("utf-8")
+
+
+def test_cyclonedx_xml_keeps_no_finished_subtree(monkeypatch):
+    roots = []
+    iterparse = ET.iterparse
+
+    def recording_iterparse(source, events=None):
+        for event, elem in iterparse(source, events=events):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(sbom_reader.ET, "iterparse", recording_iterparse)
+    components = sbom_reader._cyclonedx_xml_da_stream(io.BytesIO(_cyclonedx_xml(200, 500)))
+
+    assert len(components) == 201
+    assert components[-1]["name"] == "FreeRTOS"
+    assert len(roots[0]) == 0
+
+
+def test_json_backends_extract_the_same_components(monkeypatch):
+    doc = (
+        b'\xef\xbb\xbf{"bomFormat": "CycloneDX", "components": ['
+        b'{"name": "FreeRTOS", "version": "10.4.3", "hashes": []}, "junk", '
+        b'{"name": "lwip", "purl": "pkg:github/lwip-tcpip/lwip@2.1.2"}]}'
+    )
+    results = {}
+    for name in json_backend.backend_disponibili():
+        monkeypatch.setattr(json_backend, "_backend", name)
+        results[name] = sbom_reader._cyclonedx_da_bytes(doc)
+
+    assert results["json"]
+    assert all(result == results["json"] for result in results.values())
+
+
+def test_formats_are_recognized_by_content_not_by_name():
+    spdx_json = b'{"spdxVersion": "SPDX-2.3", "packages": [{"name": "FreeRTOS", "versionInfo": "10.4.3"}]}'
+    tag_value = b"SPDXVersion: SPDX-2.3\nPackageName: FreeRTOS\nPackageVersion: 10.4.3\n"
+    xml = _cyclonedx_xml(0, 0)
+
+    assert sbom_reader.riconosci_formato(spdx_json, "firmware.json").name == "spdx-json"
+    assert sbom_reader.riconosci_formato(b"\xef\xbb\xbf  " + xml, "firmware.txt").name == "cyclonedx-xml"
+    assert sbom_reader.riconosci_formato(tag_value, "firmware.json").name == "spdx-tag-value"
+    # Unrecognizable content falls back to the file name, then to nothing.
+    assert sbom_reader.riconosci_formato(b"<?xml version='1.0'?><other/>", "x.xml").name == "cyclonedx-xml"
+    assert sbom_reader.riconosci_formato(b"plain text", "notes.txt") is None
+
+    for name, raw in (("a.bin", spdx_json), ("b.bin", xml), ("c.bin", tag_value)):
+        packed = gzip.compress(raw)
+        assert sbom_reader.leggi_sbom(name + ".gz", io.BytesIO(packed))[-1]["name"] == "FreeRTOS"
+    with pytest.raises(sbom_reader.SbomParseError):
+        sbom_reader.leggi_sbom("notes.txt", io.BytesIO(b"plain text"))
+
+
+def test_registered_format_is_sniffed_first():
+    fmt = sbom_reader.SbomFormat("custom", lambda stream: [{"name": "custom"}], lambda head: head.startswith(b"{"))
+    saved = list(sbom_reader.FORMATS)
+    try:
+        sbom_reader.registra_formato(fmt)
+        assert sbom_reader.formati_aggiunti() == [fmt]
+        assert sbom_reader.leggi_sbom("x.json", io.BytesIO(b'{"bomFormat": "CycloneDX"}')) == [{"name": "custom"}]
+    finally:
+        sbom_reader.FORMATS[:] = saved
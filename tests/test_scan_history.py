@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from core import scan_history
+from core.db_manager import library_checksums
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_history, "HISTORY_DB_PATH", tmp_path / "ScanHistory.db")
+    monkeypatch.setattr(scan_history, "_conn", None)
+    yield scan_history
+    scan_history._conn.close()
+
+
+def _lib(name, current, status):
+    return {"name": name, "current": current, "latest": current, "status": status}
+
+
+def test_refresh_re_resolves_only_libraries_whose_catalog_changed(history, monkeypatch):
+    checksums = library_checksums()
+    # Recorded against an older FreeRTOS catalog, where 10.4.3 was current.
+    stale = {name: ("old" if name.lower() == "freertos" else value) for name, value in checksums.items()}
+    monkeypatch.setattr(scan_history, "library_checksums", lambda: stale)
+    reports = [
+        (Path("a.json"), [_lib("FreeRTOS", "10.4.3", "up-to-date"), _lib("LwIP", "0.0.0", "up-to-date")], 0),
+        (Path("b.json"), [_lib("FreeRTOS", "10.4.3", "up-to-date")], 0),
+    ]
+    base = history.record_scan(reports)
+    monkeypatch.setattr(scan_history, "library_checksums", lambda: checksums)
+
+    result = history.refresh_latest()
+
+    # LwIP kept its checksum, so its (wrong on purpose) row is not revisited.
+    assert result["base_scan_id"] == base
+    assert result["changed"] == ["FreeRTOS"]
+    assert result["rows"] == 2
+    assert result["transitions"] == {"FreeRTOS": {("up-to-date", "needs update"): 2}}
+
+    # The refresh scan reads as the base rows overridden by the refreshed ones.
+    packed = history.scan_results_packed()
+    assert packed["scan_id"] == result["scan_id"]
+    statuses = sorted((packed["libraries"][key >> 32], key & 3) for key in packed["keys"])
+    assert statuses == [("FreeRTOS", 1), ("FreeRTOS", 1), ("LwIP", 0)]
+
+    # Nothing changed since: no new scan is appended.
+    again = history.refresh_latest()
+    assert again["scan_id"] == result["scan_id"] and again["changed"] == []
+    assert len(history.list_scans()) == 2
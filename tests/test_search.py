@@ -0,0 +1,36 @@
+import shutil
+import sqlite3
+from contextlib import closing
+
+from core import db_manager
+from core.catalog_snapshot import firma_db
+from core.db_manager import search_release_notes
+from utils.paths import DB_PATH
+
+
+def test_search_leaves_version_db_unchanged():
+    before = firma_db(DB_PATH)
+    hits = search_release_notes("overflow")
+    assert hits
+    assert all("overflow" in hit["snippet"].lower() for hit in hits)
+    assert firma_db(DB_PATH) == before
+
+
+def test_search_index_follows_catalog_changes(tmp_path, monkeypatch):
+    db_path = tmp_path / "Version.db"
+    shutil.copyfile(DB_PATH, db_path)
+    monkeypatch.setattr(db_manager, "DB_PATH", db_path)
+    monkeypatch.setattr(db_manager, "SEARCH_DB_PATH", tmp_path / "ReleaseSearch.db")
+    for name in ("_conn", "_cursor", "_owner", "_search_ready", "_search_built"):
+        monkeypatch.setattr(db_manager, name, None)
+
+    assert not search_release_notes("zorblaxoverflow")
+    # Another process (e.g. a catalog update) edits Version.db meanwhile.
+    with closing(sqlite3.connect(str(db_path))) as other, other:
+        other.execute(
+            'INSERT INTO "ReleaseNotes"(version, "IDLibraries", release_notes) '
+            "SELECT '99.0', ID, 'fixes a zorblaxoverflow' FROM \"FirmwareLibraries\" LIMIT 1"
+        )
+
+    assert [hit["version"] for hit in search_release_notes("zorblaxoverflow")] == ["99.0"]
+    db_manager._conn.close()
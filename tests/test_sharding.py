@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core.sharding import parse_shard, scrivi_parziale, seleziona_shard, unisci_parziali
+
+
+def _lib(name, status):
+    return {"name": name, "current": "1.0", "latest": "1.1", "status": status}
+
+
+def _parziale(tmp_path, index, shards, reports, errors=()):
+    out = tmp_path / f"part{index}.json"
+    scrivi_parziale(out, reports, tmp_path / "in", index, shards, errors)
+    return out
+
+
+def test_shards_partition_the_input():
+    base = Path("in")
+    files = [base / f"fw{i}.json" for i in range(50)]
+    shards = [seleziona_shard(files, base, k, 4) for k in range(4)]
+
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert parse_shard("3/4") == (3, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+
+
+def test_merge_joins_shards_and_reports_the_missing_ones(tmp_path):
+    base = tmp_path / "in"
+    first = _parziale(tmp_path, 0, 3, [(base / "b.json", [_lib("LwIP", "needs update")], 1)])
+    error = {"sbom": base / "bad.json", "stage": "parse", "kind": "malformed", "detail": "x"}
+    second = _parziale(tmp_path, 2, 3, [(base / "a.json", [_lib("FreeRTOS", "up-to-date")], 0)], [error])
+
+    reports, info = unisci_parziali([first, second])
+
+    assert [(path.as_posix(), count) for path, _, count in reports] == [("a.json", 0), ("b.json", 1)]
+    assert info["missing"] == [1]
+    assert [(e["sbom"].as_posix(), e["kind"]) for e in info["errors"]] == [("bad.json", "malformed")]
+
+
+def test_merge_rejects_partials_of_different_runs(tmp_path):
+    first = _parziale(tmp_path, 0, 2, [])
+    other_count = _parziale(tmp_path, 1, 3, [])
+    with pytest.raises(ValueError, match="3 shards"):
+        unisci_parziali([first, other_count])
+
+    with pytest.raises(ValueError, match="shard 0 appears"):
+        unisci_parziali([first, first])
+
+    other_catalog = tmp_path / "other.json"
+    payload = json.loads(first.read_text(encoding="utf-8"))
+    payload.update(shard=1, catalog="elsewhere")
+    other_catalog.write_text(json.dumps(payload), encoding="utf-8")
+    with pytest.raises(ValueError, match="different release catalog"):
+        unisci_parziali([first, other_catalog])
+
+    not_partial = tmp_path / "report.json"
+    not_partial.write_text(json.dumps({"format": "something else"}), encoding="utf-8")
+    with pytest.raises(ValueError, match="not a scan partial"):
+        unisci_parziali([not_partial])
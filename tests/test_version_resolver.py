@@ -0,0 +1,38 @@
+from core.version_resolver import LibraryCatalog, chiave_versione, risolvi_versioni
+
+
+def test_pre_releases_sort_before_the_final_release():
+    versions = ["2.2.1", "2.2.1-st1", "2.2.1-rc2", "2.2.0", "2.2.1-rc1", "2.2.1-beta", "2.2.1.1"]
+    assert sorted(versions, key=chiave_versione) == [
+        "2.2.0", "2.2.1-beta", "2.2.1-rc1", "2.2.1-rc2", "2.2.1", "2.2.1.1", "2.2.1-st1"
+    ]
+    # Single letters are patch levels, not pre-release tags.
+    assert sorted(["R0.14b", "R0.14", "R0.15"], key=chiave_versione) == ["R0.14", "R0.14b", "R0.15"]
+
+
+def test_release_candidate_is_classified_from_the_previous_release():
+    final, candidate = risolvi_versioni(
+        [{"name": "LwIP", "version": "2.2.1"}, {"name": "LwIP", "version": "2.2.1-rc1"}]
+    )
+    assert final["status"] == "up-to-date"
+    assert candidate["matched"] == "2.2.0"
+    assert candidate["status"] == "needs update"
+
+
+def test_release_between_affected_releases_is_not_affected():
+    releases = [
+        {"id": i, "version": version, "release_date": f"2024-0{i + 1}-01", "security": "0", "cve": cve}
+        for i, (version, cve) in enumerate(
+            [("1.0", "CVE-2024-0001"), ("1.1", ""), ("1.2", "CVE-2024-0001"), ("1.3", "")]
+        )
+    ]
+    catalog = LibraryCatalog("Demo", releases)
+
+    def labels(version):
+        return catalog.affected.labels_at(catalog.locate(version)[0])
+
+    assert labels("1.0") == ("CVE-2024-0001",)
+    assert labels("1.0.5") == ("CVE-2024-0001",)
+    assert labels("1.1") == ()
+    assert labels("1.2") == ("CVE-2024-0001",)
+    assert labels("1.3") == ()
@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+from core.worker_pool import IsolatedWorker, ParseLimits, WorkerFailure, resource
+
+
+def _lavoro(kind: str, value: int = 0):
+    if kind == "sleep":
+        time.sleep(value)
+    elif kind == "alloc":
+        return len(bytearray(value))
+    elif kind == "exit":
+        os._exit(3)
+    elif kind == "raise":
+        raise KeyError(value)
+    return os.getpid()
+
+
+def _esito(worker, *args):
+    try:
+        return worker.run(*args)
+    except WorkerFailure as failure:
+        return failure.kind
+
+
+def test_overrunning_jobs_only_cost_their_worker():
+    worker = IsolatedWorker(_lavoro, ParseLimits(seconds=1, memory=None))
+    try:
+        first = worker.run("pid")
+        assert worker.run("pid") == first
+
+        start = time.monotonic()
+        assert _esito(worker, "sleep", 30) == "timeout"
+        assert time.monotonic() - start < 10
+        assert _esito(worker, "exit") == "crashed"
+        assert _esito(worker, "raise", 1) == "error"
+
+        # Every failure but "error" restarts the worker for the next job.
+        assert worker.run("pid") not in (first, None)
+    finally:
+        worker.close()
+
+
+@pytest.mark.skipif(resource is None, reason="no RLIMIT_AS on this platform")
+def test_memory_budget():
+    worker = IsolatedWorker(_lavoro, ParseLimits(seconds=30, memory=64 << 20))
+    try:
+        assert worker.run("alloc", 16 << 20) == 16 << 20
+        assert _esito(worker, "alloc", 512 << 20) == "memory"
+        assert worker.run("alloc", 16 << 20) == 16 << 20
+    finally:
+        worker.close()
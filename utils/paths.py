@@ -11,3 +11,6 @@ BASE_DIR = _base_dir()
 DATA_DIR = BASE_DIR / "data"
 SBOM_DIR = DATA_DIR / "sbom"
 DB_PATH = DATA_DIR / "Version.db"
+SNAPSHOT_PATH = DATA_DIR / "Version.snapshot"
+SEARCH_DB_PATH = DATA_DIR / "ReleaseSearch.db"
+HISTORY_DB_PATH = DATA_DIR / "ScanHistory.db"